@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Regression benchmarks for the data path.
+
+Times the header readers, full reads (including the sniffing fallback for
+messy CSVs), column profiling, _prepare_mapping_text and generate_result_with_watch_data over
+fixed, seeded fixture files, and records wall time and peak traced memory.
+
+    PYTHONPATH=src python benchmarks/bench_datapath.py run
+    PYTHONPATH=src python benchmarks/bench_datapath.py compare [--tolerance 0.5]
+    PYTHONPATH=src python benchmarks/bench_datapath.py baseline
+
+``compare`` exits with status 1 when a case is slower or uses more memory
+than benchmarks/baseline.json allows. ``baseline`` rewrites that file; do it
+on the same machine the comparisons run on.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+# Keep benchmark artifacts out of the real upload directory
+os.environ["UPLOAD_DIR"] = os.path.join(FIXTURE_DIR, "uploads")
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from backend.api.endpoint.db import _prepare_mapping_text  # noqa: E402
+from backend.api.endpoint.mapping import generate_result_with_watch_data  # noqa: E402
+from backend.utils.profiling import get_column_profiles  # noqa: E402
+from backend.utils.readers import read_vendor_file, read_vendor_headers  # noqa: E402
+from backend.utils.storage import RESULT, ARTIFACT_DIRS, meta_path, storage  # noqa: E402
+from loadtest.fakes import fake_mapping  # noqa: E402
+from loadtest.generate import generate, iter_frames, vendor_headers  # noqa: E402
+
+# Bump when fixture contents change so stale files are regenerated
+FIXTURE_VERSION = 1
+
+# Differences below these are noise, whatever the ratio
+WALL_FLOOR_MS = 5.0
+MEMORY_FLOOR_MB = 1.0
+
+
+class Case(NamedTuple):
+    name: str
+    func: Callable[[], object]
+    setup: Optional[Callable[[], None]] = None
+    # Overrides --repeat for slow cases
+    repeat: Optional[int] = None
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+def _fixture(name: str, rows: int, columns: int) -> str:
+    path = os.path.join(FIXTURE_DIR, f"v{FIXTURE_VERSION}_{name}")
+    if not os.path.exists(path):
+        generate(path, rows, columns, seed=42)
+    return path
+
+
+def _messy_csv(rows: int, columns: int) -> str:
+    """
+    cp1252, semicolon-delimited CSV with a preamble: the shape that used to go
+    through the encoding/delimiter fallbacks.
+    """
+    path = os.path.join(FIXTURE_DIR, f"v{FIXTURE_VERSION}_messy_{rows}x{columns}.csv")
+    if not os.path.exists(path):
+        with open(path, "w", encoding="cp1252", newline="") as f:
+            f.write("Vendor price list – confidential\nExported 2024-01-01\n\n")
+            for i, frame in enumerate(iter_frames(rows, columns, seed=42)):
+                frame = frame.rename(columns={"Description": "Description (é)"})
+                frame.to_csv(f, sep=";", index=False, header=i == 0)
+    return path
+
+
+def _stored(path: str) -> str:
+    """
+    Register a fixture with storage under an alias and return the alias.
+    """
+    _, extension = os.path.splitext(path)
+    content_hash = os.path.basename(path).replace(".", "_").ljust(8, "_")
+    object_path = storage.object_path(content_hash, extension)
+    if not os.path.exists(object_path):
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        shutil.copyfile(path, object_path)
+    file_id = f"bench_{os.path.basename(path)}"
+    storage.add_alias(file_id, content_hash, extension)
+    return file_id
+
+
+def _forget_meta(path: str) -> Callable[[], None]:
+    """
+    Setup step dropping the recorded dialect/columns/profile, so the run pays for computing them.
+    """
+    def setup():
+        try:
+            os.remove(meta_path(path))
+        except FileNotFoundError:
+            pass
+    return setup
+
+
+def _clear_results() -> None:
+    shutil.rmtree(os.path.join(storage.storage_path, ARTIFACT_DIRS[RESULT]), ignore_errors=True)
+
+
+def build_cases() -> List[Case]:
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    csv_path = _fixture("50000x60.csv", 50_000, 60)
+    json_path = _fixture("20000x30.json", 20_000, 30)
+    xlsx_path = _fixture("5000x30.xlsx", 5_000, 30)
+    messy_path = _messy_csv(50_000, 60)
+    million_path = _fixture("1000000x20.csv", 1_000_000, 20)
+
+    csv_id = _stored(csv_path)
+    csv_object = storage.resolve(csv_id)
+    mapping = {"items": [fake_mapping(vendor_headers(60))]}
+    wide_mapping = {"items": [fake_mapping(vendor_headers(300))]}
+
+    def prepare_text():
+        for _ in range(1000):
+            _prepare_mapping_text(wide_mapping)
+
+    def generate_result():
+        generate_result_with_watch_data(mapping, csv_id)
+        _clear_results()
+
+    return [
+        Case("read_vendor_headers[csv]", lambda: read_vendor_headers(csv_path), _forget_meta(csv_path)),
+        Case("read_vendor_headers[json]", lambda: read_vendor_headers(json_path), _forget_meta(json_path)),
+        Case("read_vendor_headers[xlsx]", lambda: read_vendor_headers(xlsx_path)),
+        Case("read_vendor_file[csv]", lambda: read_vendor_file(csv_path)),
+        Case("read_vendor_file[csv-fallback]", lambda: read_vendor_file(messy_path), _forget_meta(messy_path)),
+        Case("read_vendor_file[json]", lambda: read_vendor_file(json_path)),
+        Case("get_column_profiles[csv-1M]", lambda: get_column_profiles(million_path), _forget_meta(million_path)),
+        Case("get_column_profiles[json]", lambda: get_column_profiles(json_path), _forget_meta(json_path)),
+        Case("_prepare_mapping_text[x1000]", prepare_text),
+        Case("generate_result_with_watch_data[csv]", generate_result,
+             lambda: read_vendor_headers(csv_object), repeat=2),
+    ]
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def measure(case: Case, repeat: int) -> Dict[str, float]:
+    """
+    Best-of-repeat wall time plus the traced peak of one extra run.
+    """
+    timings = []
+    for _ in range(case.repeat or repeat):
+        if case.setup:
+            case.setup()
+        start = time.perf_counter()
+        case.func()
+        timings.append(time.perf_counter() - start)
+
+    if case.setup:
+        case.setup()
+    tracemalloc.start()
+    try:
+        case.func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"wall_ms": round(min(timings) * 1000, 3), "peak_mb": round(peak / 1024 / 1024, 3)}
+
+
+def run_cases(pattern: Optional[str], repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for case in build_cases():
+        if pattern and pattern not in case.name:
+            continue
+        results[case.name] = measure(case, repeat)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float, memory_tolerance: float) -> bool:
+    """
+    Print results against the baseline and return whether all cases are within tolerance.
+    """
+    ok = True
+    print(f"{'case':<40}{'wall ms':>10}{'base':>10}{'ratio':>8}{'peak MB':>10}{'base':>10}{'ratio':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<40}{result['wall_ms']:>10.1f}{'-':>10}{'':>8}{result['peak_mb']:>10.1f}{'-':>10}  (no baseline)")
+            continue
+        wall_ratio = result["wall_ms"] / base["wall_ms"] if base["wall_ms"] else 1.0
+        peak_ratio = result["peak_mb"] / base["peak_mb"] if base["peak_mb"] else 1.0
+        flags = []
+        if wall_ratio > 1 + tolerance and result["wall_ms"] - base["wall_ms"] > WALL_FLOOR_MS:
+            flags.append("SLOWER")
+        if peak_ratio > 1 + memory_tolerance and result["peak_mb"] - base["peak_mb"] > MEMORY_FLOOR_MB:
+            flags.append("MORE MEMORY")
+        ok &= not flags
+        print(
+            f"{name:<40}{result['wall_ms']:>10.1f}{base['wall_ms']:>10.1f}{wall_ratio:>8.2f}"
+            f"{result['peak_mb']:>10.1f}{base['peak_mb']:>10.1f}{peak_ratio:>8.2f}"
+            f"{'  ' + ', '.join(flags) if flags else ''}"
+        )
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("run", "compare", "baseline"), nargs="?", default="run")
+    parser.add_argument("-k", "--filter", help="Only run cases whose name contains this string")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed relative wall-time increase before a case fails (default 0.5)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2,
+                        help="Allowed relative peak-memory increase before a case fails (default 0.2)")
+    args = parser.parse_args()
+
+    results = run_cases(args.filter, args.repeat)
+
+    if args.command == "baseline":
+        baseline = {}
+        if args.filter and os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Wrote {len(results)} cases to {BASELINE_PATH}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    ok = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    if args.command == "compare" and not ok:
+        print("Regression beyond tolerance")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
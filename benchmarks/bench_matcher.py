@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Accuracy and latency of the local header matcher, optionally against the agent.
+
+Scores every case of benchmarks/data/labeled_headers.json (vendor headers
+with the JC field each one should map to):
+
+    PYTHONPATH=src python benchmarks/bench_matcher.py
+    PYTHONPATH=src python benchmarks/bench_matcher.py --agent   # needs OPENAI_API_KEY
+
+Precision counts the fields a mapper filled that match the label; recall the
+labeled fields it got right. The "accepted" rows cover only fields at or above
+MATCHER_ACCEPT_CONFIDENCE, i.e. the ones /mapping/ai-suggested decides
+without calling the LLM.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_PATH = os.path.join(BENCH_DIR, "data", "labeled_headers.json")
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from backend.core.config import settings  # noqa: E402
+from backend.schemas.mapping import JC_FIELDS  # noqa: E402
+from backend.utils.matcher import get_matcher  # noqa: E402
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def score_case(item: Dict, labels: Dict[str, str], threshold: float) -> Dict[str, int]:
+    """
+    Count predicted, correct and labeled fields of one mapped case.
+    """
+    counts = {"labeled": len(labels), "predicted": 0, "correct": 0, "accepted": 0, "accepted_correct": 0}
+    for jc_field in JC_FIELDS:
+        mapping = item.get(jc_field) or {}
+        vendor_field = mapping.get("vendor_field") or ""
+        if not vendor_field:
+            continue
+        correct = labels.get(jc_field) == vendor_field
+        counts["predicted"] += 1
+        counts["correct"] += correct
+        if (mapping.get("confidence") or 0.0) >= threshold:
+            counts["accepted"] += 1
+            counts["accepted_correct"] += correct
+    return counts
+
+
+def summarize(name: str, counts: List[Dict[str, int]], latencies: List[float]) -> Dict:
+    totals = {key: sum(c[key] for c in counts) for key in counts[0]}
+    ratio = lambda a, b: round(a / b, 3) if b else 0.0  # noqa: E731
+    return {
+        "mapper": name,
+        "precision": ratio(totals["correct"], totals["predicted"]),
+        "recall": ratio(totals["correct"], totals["labeled"]),
+        "accepted_precision": ratio(totals["accepted_correct"], totals["accepted"]),
+        "accepted_coverage": ratio(totals["accepted_correct"], totals["labeled"]),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+    }
+
+
+def bench_matcher(cases: List[Dict], repeat: int, threshold: float) -> Dict:
+    matcher = get_matcher()
+    counts, latencies = [], []
+    for case in cases:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            item = matcher.match(case["headers"])
+            timings.append(time.perf_counter() - start)
+        latencies.append(min(timings))
+        counts.append(score_case(item, case["labels"], threshold))
+    return summarize("local", counts, latencies)
+
+
+def bench_agent(cases: List[Dict], threshold: float) -> Dict:
+    from backend.api.endpoint.mapping import _map_headers_with_agent, merge_mapping_outputs
+
+    async def run() -> Dict:
+        counts, latencies = [], []
+        for case in cases:
+            start = time.perf_counter()
+            outputs = await _map_headers_with_agent(case["headers"], JC_FIELDS, None)
+            latencies.append(time.perf_counter() - start)
+            item = merge_mapping_outputs(outputs)["items"][0]
+            counts.append(score_case(item, case["labels"], threshold))
+        return summarize("agent", counts, latencies)
+
+    return asyncio.run(run())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default=FIXTURE_PATH, help="labeled header cases (JSON)")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per case for the local matcher")
+    parser.add_argument("--threshold", type=float, default=settings.MATCHER_ACCEPT_CONFIDENCE)
+    parser.add_argument("--agent", action="store_true", help="also map every case with the agent")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    with open(args.fixture) as f:
+        cases = json.load(f)
+    results = [bench_matcher(cases, args.repeat, args.threshold)]
+    if args.agent:
+        results.append(bench_agent(cases, args.threshold))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{len(cases)} cases, accept threshold {args.threshold}")
+    columns = ["mapper", "precision", "recall", "accepted_precision", "accepted_coverage", "p50_ms", "p95_ms"]
+    print("  ".join(f"{column:>18}" for column in columns))
+    for result in results:
+        print("  ".join(f"{result[column]!s:>18}" for column in columns))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the metrics hot path.
+
+Measures the per-call cost of counter increments, histogram observations,
+stage timers and the request metrics middleware, and fails if any of them
+exceeds its budget.
+
+    PYTHONPATH=src python benchmarks/bench_metrics.py
+"""
+import asyncio
+import sys
+import time
+import timeit
+
+from backend.core.metrics import Counter, Histogram, track_stage
+from backend.middleware.metrics import MetricsMiddleware
+
+# Budgets in microseconds per call
+BUDGETS = {
+    "counter.inc": 2.0,
+    "histogram.observe": 3.0,
+    "track_stage": 5.0,
+    "middleware overhead": 25.0,
+}
+
+
+def _per_call_us(stmt, number: int = 200_000) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e6
+
+
+def bench_primitives() -> dict:
+    counter = Counter("bench_total", "bench", ("stage",)).labels("parse")
+    histogram = Histogram("bench_seconds", "bench", ("stage",)).labels("parse")
+
+    def timed():
+        with track_stage("bench"):
+            pass
+
+    return {
+        "counter.inc": _per_call_us(counter.inc),
+        "histogram.observe": _per_call_us(lambda: histogram.observe(0.042)),
+        "track_stage": _per_call_us(timed),
+    }
+
+
+def bench_middleware(requests: int = 50_000) -> float:
+    class Route:
+        path = "/mapping/ai-suggested"
+
+    async def app(scope, receive, send):
+        scope["route"] = Route
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    async def run(handler):
+        start = time.perf_counter()
+        for _ in range(requests):
+            await handler({"type": "http", "method": "POST", "path": "/mapping/ai-suggested"}, receive, send)
+        return time.perf_counter() - start
+
+    wrapped = MetricsMiddleware(app)
+    bare = min(asyncio.run(run(app)) for _ in range(3))
+    instrumented = min(asyncio.run(run(wrapped)) for _ in range(3))
+    return (instrumented - bare) / requests * 1e6
+
+
+def main() -> int:
+    results = bench_primitives()
+    results["middleware overhead"] = bench_middleware()
+
+    failed = False
+    print(f"{'operation':<22}{'us/call':>10}{'budget':>10}")
+    for name, value in results.items():
+        over = value > BUDGETS[name]
+        failed |= over
+        print(f"{name:<22}{value:>10.3f}{BUDGETS[name]:>10.1f}{'  OVER BUDGET' if over else ''}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
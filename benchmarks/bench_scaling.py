@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Core-scaling benchmark for result rendering.
+
+Renders one mapping of a seeded CSV fixture through render_result with 1, 2,
+4, ... worker processes, one row partition per worker, and reports the best
+wall time of each and the speedup over a single worker. The pool is started
+and warmed before timing, so spawn cost is not counted.
+
+    PYTHONPATH=src python benchmarks/bench_scaling.py [--rows 1000000] [--columns 30] [--max-workers 8]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import sys
+import time
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+
+# Keep benchmark artifacts out of the real upload directory
+os.environ["UPLOAD_DIR"] = os.path.join(FIXTURE_DIR, "uploads")
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from backend.api.endpoint.mapping import render_result  # noqa: E402
+from backend.core.config import settings  # noqa: E402
+from backend.core.workers import run_in_process, shutdown_process_pool  # noqa: E402
+from backend.utils.storage import ARTIFACT_DIRS, RESULT, storage  # noqa: E402
+from loadtest.fakes import fake_mapping  # noqa: E402
+from loadtest.generate import generate, vendor_headers  # noqa: E402
+
+
+def _fixture(rows: int, columns: int) -> str:
+    """
+    Generate the fixture once and register it with storage under an alias.
+    """
+    name = f"scaling_{rows}x{columns}.csv"
+    path = os.path.join(FIXTURE_DIR, name)
+    if not os.path.exists(path):
+        os.makedirs(FIXTURE_DIR, exist_ok=True)
+        generate(path, rows, columns, seed=42)
+    content_hash = name.replace(".", "_").ljust(8, "_")
+    object_path = storage.object_path(content_hash, ".csv")
+    if not os.path.exists(object_path):
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        shutil.copyfile(path, object_path)
+    file_id = f"bench_{name}"
+    storage.add_alias(file_id, content_hash, ".csv")
+    return file_id
+
+
+def _clear_results() -> None:
+    shutil.rmtree(os.path.join(storage.storage_path, ARTIFACT_DIRS[RESULT]), ignore_errors=True)
+
+
+def _worker_counts(max_workers: int) -> List[int]:
+    counts, workers = [], 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    return counts + [max_workers]
+
+
+async def measure(file_id: str, mapping: dict, workers: int, repeat: int) -> Dict[str, float]:
+    """
+    Best-of-repeat wall time of rendering with this many workers and partitions.
+    """
+    shutdown_process_pool()
+    settings.WORKER_PROCESSES = workers
+    size = os.path.getsize(storage.resolve(file_id))
+    settings.RENDER_PARTITION_BYTES = math.ceil(size / workers)
+    await asyncio.gather(*(run_in_process(os.getpid) for _ in range(workers)))
+
+    timings = []
+    for _ in range(repeat):
+        _clear_results()
+        start = time.perf_counter()
+        payload = await render_result(mapping, file_id)
+        timings.append(time.perf_counter() - start)
+    _clear_results()
+    return {"workers": workers, "rows": payload["total_rows"] - 1, "wall_s": round(min(timings), 3)}
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, float]]:
+    file_id = _fixture(args.rows, args.columns)
+    mapping = {"items": [fake_mapping(vendor_headers(args.columns))]}
+    results = []
+    try:
+        for workers in _worker_counts(args.max_workers):
+            results.append(await measure(file_id, mapping, workers, args.repeat))
+    finally:
+        shutdown_process_pool()
+    base = results[0]["wall_s"]
+    for result in results:
+        result["speedup"] = round(base / result["wall_s"], 2) if result["wall_s"] else 0.0
+        result["efficiency"] = round(result["speedup"] / result["workers"], 2)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--columns", type=int, default=30)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'workers':>8}{'rows':>10}{'wall s':>10}{'speedup':>10}{'efficiency':>12}")
+    for result in results:
+        print(
+            f"{result['workers']:>8}{result['rows']:>10}{result['wall_s']:>10.2f}"
+            f"{result['speedup']:>10.2f}{result['efficiency']:>12.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
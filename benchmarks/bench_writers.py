@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Result writer benchmark.
+
+Writes a seeded synthetic table of each size through every result writer,
+streaming it chunk by chunk as the partitioned render does, and through the
+legacy path that builds the whole DataFrame and calls to_csv / to_excel.
+Each case runs in a fresh interpreter, so its peak resident memory (above
+the interpreter with its imports loaded) is measured on its own.
+
+    PYTHONPATH=src python benchmarks/bench_writers.py [--rows 100000 1000000] [--columns 10] [--cases csv,xlsx]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import pandas as pd  # noqa: E402
+
+from backend.utils.writers import open_result_writer  # noqa: E402
+from loadtest.generate import iter_frames  # noqa: E402
+
+# Streaming writers by result format, plus the whole-frame calls they replace
+CASES = ("csv", "jsonl", "xlsx", "csv-legacy", "xlsx-legacy")
+
+
+def _rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_case(case: str, rows: int, columns: int, path: str) -> None:
+    frames = iter_frames(rows, columns, seed=42)
+    if case == "csv-legacy":
+        pd.concat(frames, ignore_index=True).to_csv(path, index=False)
+    elif case == "xlsx-legacy":
+        pd.concat(frames, ignore_index=True).to_excel(path, index=False)
+    else:
+        with open(path, "wb") as f, open_result_writer(f, f".{case}") as writer:
+            for frame in frames:
+                writer.write(frame)
+
+
+def run_case(case: str, rows: int, columns: int) -> Dict[str, float]:
+    """
+    Time one case in this process and report its wall time, peak memory and file size.
+    """
+    extension = case.split("-")[0]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"result.{extension}")
+        base_mb = _rss_mb()
+        start = time.perf_counter()
+        write_case(case, rows, columns, path)
+        wall_s = time.perf_counter() - start
+        size_mb = os.path.getsize(path) / 1024 / 1024
+    return {
+        "case": case, "rows": rows, "wall_s": round(wall_s, 2),
+        "peak_mb": round(_rss_mb() - base_mb, 1), "file_mb": round(size_mb, 1),
+    }
+
+
+def measure(case: str, rows: int, columns: int) -> Dict[str, float]:
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", case, "--rows", str(rows), "--columns", str(columns)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--cases", default=",".join(CASES), help="Comma-separated subset of " + ", ".join(CASES))
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_case(args.child, args.rows[0], args.columns)))
+        return 0
+
+    results: List[Dict[str, float]] = []
+    for rows in args.rows:
+        for case in args.cases.split(","):
+            results.append(measure(case, rows, args.columns))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'case':<14}{'rows':>10}{'wall s':>10}{'peak MB':>10}{'file MB':>10}")
+    for result in results:
+        print(
+            f"{result['case']:<14}{result['rows']:>10}{result['wall_s']:>10.2f}"
+            f"{result['peak_mb']:>10.1f}{result['file_mb']:>10.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
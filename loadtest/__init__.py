@@ -0,0 +1,8 @@
+"""
+Load-test harness for the upload -> /mapping/ai-suggested -> /export/final.csv flow.
+
+    generate.py  synthetic vendor files
+    fakes.py     local stand-ins for the agent runner, OpenAI embeddings and Pinecone
+    serve.py     run the API with the stand-ins installed
+    drive.py     load driver reporting throughput and latency percentiles
+"""
@@ -0,0 +1,182 @@
+"""
+Drive the upload -> /mapping/ai-suggested -> /export/final.csv flow with concurrent
+virtual users and report throughput and p50/p95/p99 latency per endpoint.
+
+    PYTHONPATH=src python -m loadtest.drive --base-url http://127.0.0.1:8001 \\
+        --file vendor_100k.csv --concurrency 16 --flows 200
+
+Without --file a synthetic file is generated from --rows/--columns. In the
+default "cold" cache mode every flow uses its own client number, so the
+mapping cache never answers and every flow reaches the agent; "warm" reuses a
+single client number to measure the cached path.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from loadtest.generate import generate
+
+ENDPOINTS = ("upload", "ai-suggested", "export")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values), math.ceil(q / 100 * len(sorted_values))) - 1)
+    return sorted_values[rank]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.flows_ok = 0
+        self.flows_failed = 0
+
+    def record(self, endpoint: str, seconds: float, error: Optional[str] = None) -> None:
+        self.latencies[endpoint].append(seconds)
+        if error:
+            self.errors[endpoint][error] += 1
+
+    def summary(self, wall_seconds: float) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint in ENDPOINTS:
+            values = sorted(self.latencies.get(endpoint, []))
+            errors = dict(self.errors.get(endpoint, {}))
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "errors": sum(errors.values()),
+                "error_kinds": errors,
+                "throughput_rps": len(values) / wall_seconds if wall_seconds else 0.0,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": (values[-1] if values else 0.0) * 1000,
+            }
+        return {
+            "wall_seconds": wall_seconds,
+            "flows_ok": self.flows_ok,
+            "flows_failed": self.flows_failed,
+            "flows_per_second": self.flows_ok / wall_seconds if wall_seconds else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+async def _timed(recorder: Recorder, endpoint: str, request) -> Optional[httpx.Response]:
+    start = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError as e:
+        recorder.record(endpoint, time.perf_counter() - start, type(e).__name__)
+        return None
+    elapsed = time.perf_counter() - start
+    if response.status_code >= 400:
+        recorder.record(endpoint, elapsed, f"HTTP {response.status_code}")
+        return None
+    recorder.record(endpoint, elapsed)
+    return response
+
+
+async def run_flow(client: httpx.AsyncClient, recorder: Recorder, content: bytes, filename: str,
+                   client_number: str) -> bool:
+    response = await _timed(recorder, "upload", client.post(
+        "/upload", files={"file": (filename, content)}, data={"client_number": client_number}
+    ))
+    if response is None:
+        return False
+    file_id = response.json()["file_id"]
+
+    response = await _timed(recorder, "ai-suggested", client.post(
+        "/mapping/ai-suggested", params={"file_id": file_id}, data={"client_number": client_number}
+    ))
+    if response is None:
+        return False
+    result_id = os.path.basename(response.json()["file_id"]["file_path"])
+
+    response = await _timed(recorder, "export", client.get("/export/final.csv", params={"file_id": result_id}))
+    return response is not None
+
+
+async def drive(base_url: str, path: str, concurrency: int, flows: int, duration: Optional[float],
+                cache_mode: str, timeout: float) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        content = f.read()
+    filename = os.path.basename(path)
+    recorder = Recorder()
+    counter = iter(range(flows if duration is None else 10 ** 12))
+    deadline = time.perf_counter() + duration if duration else None
+    run_id = os.urandom(4).hex()
+
+    async def user(client: httpx.AsyncClient) -> None:
+        for n in counter:
+            if deadline and time.perf_counter() >= deadline:
+                return
+            client_number = f"load-{run_id}-{n}" if cache_mode == "cold" else f"load-{run_id}"
+            if await run_flow(client, recorder, content, filename, client_number):
+                recorder.flows_ok += 1
+            else:
+                recorder.flows_failed += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(user(client) for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+    return recorder.summary(wall)
+
+
+def format_report(summary: Dict[str, Any]) -> str:
+    lines = [
+        f"{summary['flows_ok']} flows ok, {summary['flows_failed']} failed in {summary['wall_seconds']:.1f}s "
+        f"({summary['flows_per_second']:.2f} flows/s)",
+        f"{'endpoint':<14}{'reqs':>7}{'errs':>6}{'rps':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+    ]
+    for endpoint, stats in summary["endpoints"].items():
+        lines.append(
+            f"{endpoint:<14}{stats['requests']:>7}{stats['errors']:>6}{stats['throughput_rps']:>8.2f}"
+            f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}"
+        )
+        for kind, count in stats["error_kinds"].items():
+            lines.append(f"    {kind}: {count}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--file", help="Vendor file to upload; generated when omitted")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--columns", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--flows", type=int, default=100, help="Total flows to run")
+    parser.add_argument("--duration", type=float, help="Run for this many seconds instead of --flows")
+    parser.add_argument("--cache-mode", choices=("cold", "warm"), default="cold")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", dest="json_path", help="Also write the summary as JSON to this path")
+    args = parser.parse_args()
+
+    path = args.file
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), f"loadtest_{args.rows}x{args.columns}.csv")
+        if not os.path.exists(path):
+            generate(path, args.rows, args.columns)
+
+    summary = asyncio.run(drive(args.base_url, path, args.concurrency, args.flows, args.duration,
+                                args.cache_mode, args.timeout))
+    print(format_report(summary))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+In-process stand-ins for the agent runner, the OpenAI embeddings API and the
+Pinecone index, each with configurable latency and error injection.
+
+    from loadtest.fakes import FakeConfig, install_fakes
+    install_fakes(FakeConfig(llm_latency=2.0, llm_error_rate=0.05))
+"""
+import ast
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from backend.schemas.mapping import JC_FIELDS
+
+EMBEDDING_DIMENSIONS = 512
+
+
+class InjectedError(RuntimeError):
+    """Raised by a stand-in when error injection fires."""
+
+
+@dataclass
+class Latency:
+    """Latency distribution in seconds: mean with uniform +/- jitter."""
+
+    mean: float = 0.0
+    jitter: float = 0.0
+
+    def sample(self) -> float:
+        return max(0.0, self.mean + random.uniform(-self.jitter, self.jitter))
+
+
+@dataclass
+class FakeConfig:
+    llm_latency: float = 1.5
+    llm_jitter: float = 0.5
+    llm_error_rate: float = 0.0
+    embedding_latency: float = 0.15
+    embedding_jitter: float = 0.05
+    embedding_error_rate: float = 0.0
+    pinecone_latency: float = 0.05
+    pinecone_jitter: float = 0.02
+    pinecone_error_rate: float = 0.0
+    # Share of calls answered with a 429 carrying retry-after-ms
+    llm_rate_limit_rate: float = 0.0
+    embedding_rate_limit_rate: float = 0.0
+    rate_limit_retry_ms: float = 500
+    seed: Optional[int] = None
+
+
+def _maybe_fail(service: str, error_rate: float) -> None:
+    if error_rate and random.random() < error_rate:
+        raise InjectedError(f"Injected {service} failure")
+
+
+def _maybe_rate_limit(service: str, rate: float, retry_ms: float) -> None:
+    if rate and random.random() < rate:
+        import httpx
+        import openai
+
+        request = httpx.Request("POST", f"https://stand-in.local/{service}")
+        response = httpx.Response(429, headers={"retry-after-ms": str(int(retry_ms))}, request=request)
+        raise openai.RateLimitError(f"Injected {service} rate limit", response=response, body=None)
+
+
+# ============================================================================
+# AGENT RUNNER
+# ============================================================================
+
+_NORMALISE = re.compile(r"[^a-z0-9]")
+
+
+def _normalise(name: str) -> str:
+    return _NORMALISE.sub("", name.lower())
+
+
+def fake_mapping(vendor_headers: List[str], target_fields: List[str] = JC_FIELDS) -> Dict[str, Any]:
+    """
+    Deterministic stand-in for the agent's answer: exact (normalised) name matches
+    map with high confidence, everything else goes to other_fields.
+    """
+    by_name = {_normalise(header): header for header in vendor_headers}
+    item: Dict[str, Any] = {}
+    used = set()
+    for field in target_fields:
+        vendor_field = by_name.get(_normalise(field), "")
+        item[field] = {"vendor_field": vendor_field, "confidence": 0.95 if vendor_field else 0.0}
+        if vendor_field:
+            used.add(vendor_field)
+    item["other_fields"] = [
+        {"vendor_field": header, "confidence": 0.2} for header in vendor_headers if header not in used
+    ]
+    return item
+
+
+def _headers_from_prompt(prompt: str) -> List[str]:
+    match = re.search(r"Vendor headers: (\[.*?\])\n", prompt, re.S)
+    if not match:
+        return []
+    try:
+        return [str(header) for header in ast.literal_eval(match.group(1))]
+    except (ValueError, SyntaxError):
+        return []
+
+
+class FakeRunner:
+    """Replacement for agents.Runner.run returning an instance of the agent's output_type."""
+
+    def __init__(self, config: FakeConfig):
+        self.latency = Latency(config.llm_latency, config.llm_jitter)
+        self.error_rate = config.llm_error_rate
+        self.rate_limit_rate = config.llm_rate_limit_rate
+        self.retry_ms = config.rate_limit_retry_ms
+        self.calls = 0
+
+    async def run(self, agent: Any, prompt: str, **kwargs: Any) -> Any:
+        self.calls += 1
+        await asyncio.sleep(self.latency.sample())
+        _maybe_rate_limit("llm", self.rate_limit_rate, self.retry_ms)
+        _maybe_fail("LLM", self.error_rate)
+        item = fake_mapping(_headers_from_prompt(prompt))
+        final_output = agent.output_type.model_validate({"items": [item]})
+        return SimpleNamespace(final_output=final_output)
+
+    def run_streamed(self, agent: Any, prompt: str, **kwargs: Any) -> "FakeStreamedRun":
+        """Replacement for agents.Runner.run_streamed emitting the output as text deltas."""
+        self.calls += 1
+        return FakeStreamedRun(self, agent, prompt)
+
+
+class FakeStreamedRun:
+    """Stand-in for RunResultStreaming: the JSON output spread over the run's latency."""
+
+    def __init__(self, runner: FakeRunner, agent: Any, prompt: str, chunk_chars: int = 64):
+        self.runner = runner
+        self.agent = agent
+        self.prompt = prompt
+        self.chunk_chars = chunk_chars
+        self.final_output = None
+
+    async def stream_events(self):
+        item = fake_mapping(_headers_from_prompt(self.prompt))
+        text = json.dumps({"items": [item]})
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        delay = self.runner.latency.sample() / max(1, len(chunks))
+        _maybe_rate_limit("llm", self.runner.rate_limit_rate, self.runner.retry_ms)
+        for i, chunk in enumerate(chunks):
+            await asyncio.sleep(delay)
+            if i == len(chunks) // 2:
+                _maybe_fail("LLM", self.runner.error_rate)
+            data = SimpleNamespace(type="response.output_text.delta", delta=chunk)
+            yield SimpleNamespace(type="raw_response_event", data=data)
+        self.final_output = self.agent.output_type.model_validate({"items": [item]})
+
+
+# ============================================================================
+# OPENAI EMBEDDINGS
+# ============================================================================
+
+def fake_embedding(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> List[float]:
+    """Deterministic unit-length pseudo-embedding derived from the text hash."""
+    rng = random.Random(hashlib.sha256(text.encode()).digest())
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+class _FakeEmbeddings:
+    def __init__(self, config: FakeConfig):
+        self.latency = Latency(config.embedding_latency, config.embedding_jitter)
+        self.error_rate = config.embedding_error_rate
+        self.rate_limit_rate = config.embedding_rate_limit_rate
+        self.retry_ms = config.rate_limit_retry_ms
+        self.calls = 0
+
+    def create(self, input: Any, model: str, dimensions: int = EMBEDDING_DIMENSIONS, **kwargs: Any) -> Any:
+        self.calls += 1
+        time.sleep(self.latency.sample())
+        _maybe_rate_limit("embeddings", self.rate_limit_rate, self.retry_ms)
+        _maybe_fail("embedding", self.error_rate)
+        texts = input if isinstance(input, list) else [input]
+        data = [SimpleNamespace(index=i, embedding=fake_embedding(text, dimensions)) for i, text in enumerate(texts)]
+        return SimpleNamespace(data=data, model=model)
+
+
+class FakeOpenAI:
+    """Stand-in for openai.OpenAI exposing embeddings.create and models.list."""
+
+    def __init__(self, config: FakeConfig):
+        self.embeddings = _FakeEmbeddings(config)
+        self.models = SimpleNamespace(list=lambda **kwargs: SimpleNamespace(data=[]))
+
+
+# ============================================================================
+# PINECONE
+# ============================================================================
+
+class FakeIndex:
+    """In-memory stand-in for a Pinecone index (upsert, query, delete, describe_index_stats)."""
+
+    def __init__(self, config: FakeConfig):
+        self.latency = Latency(config.pinecone_latency, config.pinecone_jitter)
+        self.error_rate = config.pinecone_error_rate
+        self.vectors: Dict[str, Dict[str, Any]] = {}
+
+    def _call(self) -> None:
+        time.sleep(self.latency.sample())
+        _maybe_fail("Pinecone", self.error_rate)
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = "default", **kwargs: Any) -> Dict[str, int]:
+        self._call()
+        for vector in vectors:
+            self.vectors[vector["id"]] = vector
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector: List[float], top_k: int = 5, include_metadata: bool = False,
+              namespace: str = "default", filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Dict[str, Any]:
+        self._call()
+        filter = filter or {}
+        matches = []
+        for stored in self.vectors.values():
+            metadata = stored.get("metadata", {})
+            if any(metadata.get(key) != value for key, value in filter.items()):
+                continue
+            score = sum(a * b for a, b in zip(vector, stored["values"]))
+            matches.append({"id": stored["id"], "score": score, "metadata": metadata if include_metadata else {}})
+        matches.sort(key=lambda match: match["score"], reverse=True)
+        return {"matches": matches[:top_k], "namespace": namespace}
+
+    def delete(self, ids: List[str], namespace: str = "default", **kwargs: Any) -> Dict[str, Any]:
+        self._call()
+        for vector_id in ids:
+            self.vectors.pop(vector_id, None)
+        return {}
+
+    def describe_index_stats(self, **kwargs: Any) -> Dict[str, Any]:
+        self._call()
+        return {"dimension": EMBEDDING_DIMENSIONS, "total_vector_count": len(self.vectors)}
+
+
+class FakePinecone:
+    """Stand-in for pinecone.Pinecone handing out a single shared FakeIndex."""
+
+    def __init__(self, config: FakeConfig):
+        self.index = FakeIndex(config)
+
+    def Index(self, name: str = "", host: str = "", **kwargs: Any) -> FakeIndex:
+        return self.index
+
+    def list_indexes(self) -> List[Any]:
+        return []
+
+
+# ============================================================================
+# INSTALLATION
+# ============================================================================
+
+def install_fakes(config: Optional[FakeConfig] = None) -> Dict[str, Any]:
+    """
+    Route the application's agent, OpenAI and Pinecone calls to the stand-ins.
+
+    Returns:
+        Dict with the installed fakes, for inspecting call counts
+    """
+    import agents
+    from backend.api.endpoint import db
+
+    config = config or FakeConfig()
+    if config.seed is not None:
+        random.seed(config.seed)
+
+    runner = FakeRunner(config)
+    openai_client = FakeOpenAI(config)
+    pinecone_client = FakePinecone(config)
+
+    agents.Runner.run = runner.run
+    agents.Runner.run_streamed = runner.run_streamed
+    db._client = openai_client
+    db._pc = pinecone_client
+    db._index = pinecone_client.index
+
+    return {"runner": runner, "openai": openai_client, "pinecone": pinecone_client}
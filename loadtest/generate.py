@@ -0,0 +1,152 @@
+"""
+Generate synthetic vendor files for load tests and benchmarks.
+
+    python -m loadtest.generate --rows 100000 --columns 60 --format csv -o vendor_100k.csv
+
+Headers mix realistic jewelry vendor names (so the mapper has something to
+match) with generic attribute columns. Rows are written in chunks, so 1M x 300
+files are generated without holding the whole frame in memory.
+"""
+import argparse
+import json
+import os
+import zlib
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+MIN_ROWS, MAX_ROWS = 1_000, 1_000_000
+MIN_COLUMNS, MAX_COLUMNS = 10, 300
+FORMATS = ("csv", "tsv", "json", "ndjson", "xlsx")
+CHUNK_ROWS = 50_000
+
+VENDOR_HEADERS = [
+    "Style #", "SKU", "Parent SKU", "Item Name", "Description", "Product Type", "Category",
+    "Collection", "Wholesale Price", "MSRP", "Metal Type", "Metal Color", "Gender",
+    "Image URL", "Stone Type", "Stone Shape", "Carat Weight", "Ring Size", "Chain Length",
+    "Finish", "Brand", "UPC", "Vendor Stock #", "Visibility", "Status",
+]
+
+_CATEGORIES = {
+    "Product Type": ["Ring", "Necklace", "Bracelet", "Earrings", "Pendant", "Watch"],
+    "Category": ["Bridal", "Fashion", "Fine Jewelry", "Men's", "Gifts"],
+    "Collection": ["Classic", "Heritage", "Moderne", "Solitaire", "Eternity"],
+    "Metal Type": ["14K Gold", "18K Gold", "Platinum", "Sterling Silver", "Palladium"],
+    "Metal Color": ["Yellow", "White", "Rose", "Two-Tone"],
+    "Gender": ["Women", "Men", "Unisex"],
+    "Stone Type": ["Diamond", "Sapphire", "Ruby", "Emerald", "Pearl", "None"],
+    "Stone Shape": ["Round", "Princess", "Oval", "Cushion", "Emerald", "Pear"],
+    "Finish": ["Polished", "Matte", "Brushed", "Hammered"],
+    "Brand": ["Aurelia", "Northstar", "Lumen", "Vesta"],
+    "Visibility": ["Catalog, Search", "Catalog", "Not Visible"],
+    "Status": ["Active", "Discontinued", "Backorder"],
+}
+
+
+def vendor_headers(columns: int) -> List[str]:
+    """Header row of a synthetic file: known vendor names first, then generic attributes."""
+    headers = VENDOR_HEADERS[:columns]
+    headers += [f"Attribute {i}" for i in range(len(headers) + 1, columns + 1)]
+    return headers
+
+
+def _column(name: str, start: int, rows: int, rng: np.random.Generator) -> np.ndarray:
+    index = np.arange(start, start + rows)
+    if name in _CATEGORIES:
+        return rng.choice(np.array(_CATEGORIES[name], dtype=object), size=rows)
+    if name in ("Style #", "SKU", "Vendor Stock #"):
+        return np.char.add(f"{name[:2].upper().strip('#')}-", index.astype(str))
+    if name == "Parent SKU":
+        return np.char.add("SK-", (index - index % 4).astype(str))
+    if name == "UPC":
+        return (index + 600_000_000_000).astype(str)
+    if name in ("Item Name", "Description"):
+        words = rng.choice(np.array(["Diamond", "Halo", "Twist", "Solitaire", "Drop", "Link", "Band"]), size=rows)
+        return np.char.add(words.astype(str), np.char.add(" #", index.astype(str)))
+    if name in ("Wholesale Price", "MSRP"):
+        return np.round(rng.uniform(25, 5000, size=rows), 2)
+    if name == "Carat Weight":
+        return np.round(rng.uniform(0.05, 3.0, size=rows), 2)
+    if name in ("Ring Size", "Chain Length"):
+        return rng.integers(4, 24, size=rows)
+    if name == "Image URL":
+        return np.char.add("https://img.example.com/", np.char.add(index.astype(str), ".jpg"))
+    # Generic attributes alternate between numbers and short codes
+    if zlib.crc32(name.encode()) % 2:
+        return rng.integers(0, 10_000, size=rows)
+    return np.char.add("v", rng.integers(0, 500, size=rows).astype(str))
+
+
+def iter_frames(rows: int, columns: int, seed: int = 0, chunk_rows: int = CHUNK_ROWS):
+    """Yield the synthetic file as DataFrames of at most chunk_rows rows."""
+    rng = np.random.default_rng(seed)
+    headers = vendor_headers(columns)
+    for start in range(0, rows, chunk_rows):
+        size = min(chunk_rows, rows - start)
+        yield pd.DataFrame({name: _column(name, start, size, rng) for name in headers})
+
+
+def generate(path: str, rows: int, columns: int, fmt: Optional[str] = None, seed: int = 0) -> str:
+    """
+    Write a synthetic vendor file.
+
+    Args:
+        path: Output path
+        rows: Number of data rows (1k - 1M)
+        columns: Number of columns (10 - 300)
+        fmt: One of FORMATS; inferred from the extension if omitted
+        seed: Seed of the value generator, so runs are reproducible
+
+    Returns:
+        The output path
+    """
+    if not MIN_ROWS <= rows <= MAX_ROWS:
+        raise ValueError(f"rows must be between {MIN_ROWS} and {MAX_ROWS}")
+    if not MIN_COLUMNS <= columns <= MAX_COLUMNS:
+        raise ValueError(f"columns must be between {MIN_COLUMNS} and {MAX_COLUMNS}")
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+
+    frames = iter_frames(rows, columns, seed)
+    if fmt == "xlsx":
+        pd.concat(frames, ignore_index=True).to_excel(path, index=False)
+        return path
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "json":
+            f.write("[")
+        first = True
+        for frame in frames:
+            if fmt in ("csv", "tsv"):
+                frame.to_csv(f, sep="," if fmt == "csv" else "\t", index=False, header=first)
+            else:
+                separator = ",\n" if fmt == "json" else "\n"
+                for record in frame.to_dict(orient="records"):
+                    if fmt == "json" and not first:
+                        f.write(separator)
+                    f.write(json.dumps(record, default=str))
+                    if fmt == "ndjson":
+                        f.write(separator)
+                    first = False
+            first = False
+        if fmt == "json":
+            f.write("]\n")
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--columns", type=int, default=40)
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    path = generate(args.output, args.rows, args.columns, args.format, args.seed)
+    print(f"Wrote {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
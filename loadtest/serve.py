@@ -0,0 +1,34 @@
+"""
+Run the API with the agent runner, OpenAI and Pinecone replaced by local stand-ins.
+
+    PYTHONPATH=src python -m loadtest.serve --port 8001 --llm-latency 2 --llm-error-rate 0.02
+"""
+import argparse
+from dataclasses import fields
+
+import uvicorn
+
+from loadtest.fakes import FakeConfig, install_fakes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    defaults = FakeConfig()
+    for field in fields(FakeConfig):
+        option = "--" + field.name.replace("_", "-")
+        parser.add_argument(option, type=float if field.name != "seed" else int, default=getattr(defaults, field.name))
+    args = parser.parse_args()
+
+    config = FakeConfig(**{field.name: getattr(args, field.name) for field in fields(FakeConfig)})
+    install_fakes(config)
+
+    from backend.main import app
+
+    # A single worker: the stand-ins live in this process
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
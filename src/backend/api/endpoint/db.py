@@ -3,9 +3,15 @@ from openai import OpenAI
 import sys
 from typing import List, Dict, Any
 import json
-import uuid
 from datetime import datetime
 from backend.core.config import settings
+from backend.core.admission import is_rate_limit_error
+from backend.core.log import get_logger
+from backend.core.metrics import track_stage
+from backend.core.tracing import current_request_id
+from backend.schemas.mapping import JC_FIELDS
+
+logger = get_logger(__name__)
 
 # Global variables for lazy initialization
 _pc = None
@@ -43,75 +49,60 @@ def _get_pinecone_index():
         )
     return _index
 
-def upsert_mapping_data_to_pinecone(ai_response: Dict[str, Any], file_id: str, client_number: str = None) -> Dict[str, Any]:
-    """
-    Upsert AI agent response data to Pinecone JC index.
-    
-    Args:
-        ai_response: The response from the AI agent containing mapping data
-        file_id: The ID of the uploaded file
-        client_number: The client number (optional)
-    
-    Returns:
-        Dict containing the result of the upsert operation
-    """
-    try:
-        # Generate a unique ID for this mapping data
-        mapping_id = str(uuid.uuid4())
-        
-        # Prepare the text data for embedding
-        # Convert the AI response to a structured text representation
-        mapping_text = _prepare_mapping_text(ai_response)
-        
-        # Generate embedding using OpenAI text-embedding-3-small (512 dimensions)
+def _request_headers() -> Dict[str, str]:
+    """Propagate the current request ID to outbound API calls"""
+    request_id = current_request_id()
+    return {"X-Request-ID": request_id} if request_id else {}
+
+def _create_embeddings(texts: List[str]) -> List[List[float]]:
+    """Embed texts with text-embedding-3-small (512 dimensions) in one request"""
+    with track_stage("embedding", inputs=len(texts)):
         response = _get_openai_client().embeddings.create(
-            input=mapping_text, 
-            model="text-embedding-3-small", 
-            dimensions=512
+            input=texts,
+            model="text-embedding-3-small",
+            dimensions=512,
+            extra_headers=_request_headers()
         )
-        embedding = response.data[0].embedding
-        
-        # Verify embedding dimension
+    embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+    for embedding in embeddings:
         if len(embedding) != 512:
             raise ValueError(f"Embedding dimension {len(embedding)} does not match index dimension 512")
-        
-        # Prepare metadata
-        metadata = {
-            "mapping_id": mapping_id,
-            "file_id": file_id,
-            "client_number": client_number,
-            "mapping_data": json.dumps(ai_response),
-            "mapping_text": mapping_text,
-            "created_at": datetime.now().isoformat(),
-            "type": "jc_mapping"
-        }
-        
-        # Prepare vector for upsert
-        vector = {
-            "id": mapping_id,
+    return embeddings
+
+def _create_embedding(text: str) -> List[float]:
+    """Embed text with text-embedding-3-small (512 dimensions)"""
+    return _create_embeddings([text])[0]
+
+def upsert_mapping_vectors(records: List[Dict[str, Any]]) -> None:
+    """
+    Embed and upsert several mappings to the Pinecone JC index in one batch.
+
+    Args:
+        records: Dicts with mapping_id, ai_response, file_id, client_number
+            and (optionally) created_at; mapping_id becomes the vector ID, so
+            upserting the same record again overwrites rather than duplicates
+
+    Raises on any embedding or Pinecone error.
+    """
+    texts = [_prepare_mapping_text(record["ai_response"]) for record in records]
+    embeddings = _create_embeddings(texts)
+    vectors = []
+    for record, mapping_text, embedding in zip(records, texts, embeddings):
+        vectors.append({
+            "id": record["mapping_id"],
             "values": embedding,
-            "metadata": metadata
-        }
-        
-        # Upsert to Pinecone
-        _get_pinecone_index().upsert(vectors=[vector], namespace="default")
-        
-        print(f"✅ Successfully upserted mapping data to Pinecone with ID: {mapping_id}")
-        
-        return {
-            "success": True,
-            "mapping_id": mapping_id,
-            "message": "Mapping data successfully saved to Pinecone",
-            "vector_id": mapping_id
-        }
-        
-    except Exception as e:
-        print(f"❌ Error upserting mapping data to Pinecone: {e}")
-        return {
-            "success": False,
-            "error": str(e),
-            "message": "Failed to save mapping data to Pinecone"
-        }
+            "metadata": {
+                "mapping_id": record["mapping_id"],
+                "file_id": record["file_id"],
+                "client_number": record["client_number"],
+                "mapping_data": json.dumps(record["ai_response"]),
+                "mapping_text": mapping_text,
+                "created_at": record.get("created_at") or datetime.now().isoformat(),
+                "type": "jc_mapping"
+            }
+        })
+    with track_stage("pinecone_upsert", vectors=len(vectors)):
+        _get_pinecone_index().upsert(vectors=vectors, namespace="default")
 
 def _prepare_mapping_text(ai_response: Dict[str, Any]) -> str:
     """
@@ -128,33 +119,28 @@ def _prepare_mapping_text(ai_response: Dict[str, Any]) -> str:
         if not items:
             return "No mapping data available"
         
-        item = items[0]  # Get the first item
         mapping_text_parts = []
-        
-        # Add JC field mappings
-        jc_fields = [
-            "RetailerStockNumber", "StyleNumber", "VisibleAs", "ParentSKU", "ProductType",
-            "SelectedAttributes", "ProductName", "ProductDescription", "CustomAttribute",
-            "CustomAttributeLabel", "ConfigurableControlType", "IsConfigurableProduct",
-            "ControlDisplayOrder", "Categories", "Collections", "PriceType",
-            "WholesaleBasePrice", "MSRP", "MetalType", "MetalColor", "ImagePath", "Gender"
-        ]
-        
-        for jc_field in jc_fields:
-            if jc_field in item and jc_field != "other_fields":
-                mapping_data = item[jc_field]
-                vendor_field = mapping_data.get("vendor_field", "")
-                confidence = mapping_data.get("confidence", 0.0)
+        for index, item in enumerate(items):
+            # Workbooks with several sheet layouts carry one item per layout
+            if len(items) > 1:
+                mapping_text_parts.append(f"Sheet layout {index + 1}")
+
+            # Add JC field mappings
+            for jc_field in JC_FIELDS:
+                if jc_field in item and jc_field != "other_fields":
+                    mapping_data = item[jc_field]
+                    vendor_field = mapping_data.get("vendor_field", "")
+                    confidence = mapping_data.get("confidence", 0.0)
+                    if vendor_field:
+                        mapping_text_parts.append(f"{jc_field}: {vendor_field} (confidence: {confidence})")
+
+            # Add other fields
+            other_fields = item.get("other_fields", [])
+            for field in other_fields:
+                vendor_field = field.get("vendor_field", "")
+                confidence = field.get("confidence", 0.0)
                 if vendor_field:
-                    mapping_text_parts.append(f"{jc_field}: {vendor_field} (confidence: {confidence})")
-        
-        # Add other fields
-        other_fields = item.get("other_fields", [])
-        for field in other_fields:
-            vendor_field = field.get("vendor_field", "")
-            confidence = field.get("confidence", 0.0)
-            if vendor_field:
-                mapping_text_parts.append(f"Other field: {vendor_field} (confidence: {confidence})")
+                    mapping_text_parts.append(f"Other field: {vendor_field} (confidence: {confidence})")
         
         # Join all parts with newlines
         mapping_text = "\n".join(mapping_text_parts)
@@ -165,7 +151,7 @@ def _prepare_mapping_text(ai_response: Dict[str, Any]) -> str:
         return mapping_text
         
     except Exception as e:
-        print(f"Error preparing mapping text: {e}")
+        logger.error("Error preparing mapping text", extra={"error": str(e)})
         return "Error processing mapping data"
 
 def search_mapping_data(query_text: str, top_k: int = 5, client_number: str = None) -> Dict[str, Any]:
@@ -182,12 +168,7 @@ def search_mapping_data(query_text: str, top_k: int = 5, client_number: str = No
     """
     try:
         # Generate embedding for the query
-        query_response = _get_openai_client().embeddings.create(
-            input=query_text, 
-            model="text-embedding-3-small", 
-            dimensions=512
-        )
-        query_embedding = query_response.data[0].embedding
+        query_embedding = _create_embedding(query_text)
         
         # Verify query embedding dimension
         if len(query_embedding) != 512:
@@ -199,13 +180,14 @@ def search_mapping_data(query_text: str, top_k: int = 5, client_number: str = No
             filter_dict["client_number"] = client_number
         
         # Perform relevance search
-        results = _get_pinecone_index().query(
-            vector=query_embedding,
-            top_k=top_k,
-            include_metadata=True,
-            namespace="default",
-            filter=filter_dict
-        )
+        with track_stage("pinecone_query"):
+            results = _get_pinecone_index().query(
+                vector=query_embedding,
+                top_k=top_k,
+                include_metadata=True,
+                namespace="default",
+                filter=filter_dict
+            )
         
         # Process results
         processed_results = []
@@ -231,7 +213,10 @@ def search_mapping_data(query_text: str, top_k: int = 5, client_number: str = No
         }
         
     except Exception as e:
-        print(f"❌ Error searching mapping data: {e}")
+        if is_rate_limit_error(e):
+            # Paused and retried by embedding_admission.run, which this runs under
+            raise
+        logger.error("Error searching mapping data", extra={"error": str(e)})
         return {
             "success": False,
             "error": str(e),
@@ -253,7 +238,7 @@ def delete_mapping_data(mapping_id: str) -> Dict[str, Any]:
         # Delete from Pinecone
         _get_pinecone_index().delete(ids=[mapping_id], namespace="default")
         
-        print(f"✅ Successfully deleted mapping data from Pinecone with ID: {mapping_id}")
+        logger.info("Deleted mapping data from Pinecone", extra={"mapping_id": mapping_id})
         
         return {
             "success": True,
@@ -261,7 +246,7 @@ def delete_mapping_data(mapping_id: str) -> Dict[str, Any]:
         }
         
     except Exception as e:
-        print(f"❌ Error deleting mapping data from Pinecone: {e}")
+        logger.error("Error deleting mapping data from Pinecone", extra={"mapping_id": mapping_id, "error": str(e)})
         return {
             "success": False,
             "error": str(e),
@@ -1,257 +1,894 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Form, Query
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
 from sqlalchemy.orm import Session
-from typing import Any, List
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import asyncio
+import csv
+import hashlib
+import math
+import shutil
+import tempfile
+import time
 import uuid
 import os
 import json
+import numpy as np
 import pandas as pd
 from pydantic import BaseModel
 
+from backend.core.admission import AdmissionTimeout, embedding_admission, llm_admission
+from backend.core.audit import MAPPING_DELETED, MAPPING_GENERATED, MAPPING_SAVED, audit_log
+from backend.core.config import settings
 from backend.core.database import get_db
+from backend.core.files import COMPLETED, FAILED, PROCESSING, find_file_uuid, set_file_status
+from backend.core.log import get_logger
+from backend.core.metrics import BYTES_PROCESSED, ROWS_PROCESSED, Counter, registry, track_stage
+from backend.core.outbox import enqueue_pinecone_upsert, outbox_dispatcher, queue_pinecone_upsert
+from backend.core.singleflight import mapping_flights
+from backend.core.tracing import current_request_id, span
+from backend.core.workers import pool_size, run_in_process
 from backend.models.mapping import Mapping
-from backend.api.endpoint.db import upsert_mapping_data_to_pinecone, search_mapping_data, delete_mapping_data
+from backend.api.endpoint.db import search_mapping_data, delete_mapping_data
+from backend.schemas.mapping import JC_FIELDS, SCHEMA_VERSION, BatchMappingRequest, OutputModel
+from backend.utils.readers import (
+    DELIMITED_EXTENSIONS,
+    EXCEL_EXTENSIONS,
+    delimited_partitions,
+    estimate_frame_bytes,
+    iter_vendor_chunks,
+    load_upload_meta,
+    read_delimited_range,
+    excel_sheets,
+    read_excel_sheets,
+    read_vendor_file,
+    read_vendor_headers,
+    sheet_layouts,
+    update_upload_meta,
+)
+from backend.utils.matcher import get_matcher
+from backend.utils.profiling import describe_profile, get_column_profiles
+from backend.utils.storage import CACHE, storage
+from backend.utils.writers import RESULT_FORMATS, open_result_writer, read_jsonl_result
+from backend.utils.streaming import FieldStreamParser, format_sse, text_delta
 
 router = APIRouter()
+logger = get_logger(__name__)
+
+# Idle SSE streams get a comment line this often
+SSE_KEEPALIVE_SECONDS = 15
+
+# Bump when the layout of generated result files changes, so memoized results are not reused
+RESULT_FORMAT_VERSION = 3
+
+RESULT_MEMO = registry.register(Counter(
+    "result_memo_total", "Result renders answered by an existing file (hit) or written (miss)", ("result",)
+))
+RENDER_READS = registry.register(Counter(
+    "render_reads_total", "Vendor files read for rendering in one frame (memory) or in chunks (chunked)", ("path",)
+))
 
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
-def generate_result_with_watch_data(final_output: dict, file_id: str) -> None:
+def _frame_to_payload(final_df: pd.DataFrame, result_path: str) -> dict:
     """
-    Generate result.csv from final_output and enrich it using data from user_file_path.csv
-    where vendor_field matches watch column headers. Ensures row alignment.
+    Convert a result DataFrame into the 2D array payload returned to the frontend.
     """
-    try:
-        print("final_output: ", final_output)
+    # Convert DataFrame to 2D array (list of lists)
+    # Get headers as first row
+    headers = list(final_df.columns)
+    data_2d = [headers]  # First row contains headers
+    
+    # Add data rows; NaN becomes an empty string and all values are strings
+    data_2d.extend(final_df.astype(object).where(final_df.notna(), "").astype(str).to_numpy().tolist())
+    
+    logger.debug("Generated 2D array", extra={"rows": len(data_2d), "columns": len(headers)})
+    
+    # Return both the data and metadata
+    return {
+        "data": data_2d,
+        "headers": headers,
+        "total_rows": len(data_2d),
+        "total_columns": len(headers),
+        "file_path": result_path
+    }
 
-        _, extension = os.path.splitext(file_id)
-        file_output = str(uuid.uuid4()) + extension
-
-        print("file_output: ", file_output)
-
-        result_path = os.path.join("uploads", file_output) 
-        user_file_path = os.path.join("uploads", file_id) 
-        print("user_file_path: ", user_file_path)
-        # ---- Step 1: Build initial result DataFrame from final_output ----
-        item = final_output["items"][0]
-        column_data = {}
-        print("item: ", item)
-        # JC fields
-        for jc_field, mapping in item.items():
-            if jc_field == "other_fields":
-                continue
-            vendor_field = mapping.get("vendor_field", "")
-            column_data[jc_field] = [vendor_field]  # header row
-        print("column_data: ", column_data)
-        # Other fields
-        other_fields = item.get("other_fields", [])
-        for field in other_fields:
-            vendor_field = field.get("vendor_field", "").strip()
-            if vendor_field:
-                column_data[vendor_field] = [vendor_field]
-        print("column_data: ", column_data)
-        # Base DataFrame with headers and first row (vendor fields)
-        result_df = pd.DataFrame(column_data)
-        vendor_field_map = {col: result_df.iloc[0][col].strip() for col in result_df.columns}
-
-        # ---- Step 2: Load user_file_path ----
-        if not os.path.exists(user_file_path):
-            raise FileNotFoundError(f"user_file_path not found at {user_file_path}")
-        
-        # Determine file type and read accordingly
-        if user_file_path.lower().endswith('.csv'):
-            try:
-                # Try reading with default settings first
-                watch_df = pd.read_csv(user_file_path)
-            except Exception as csv_error:
-                print(f"Error reading CSV with default settings: {csv_error}")
-                # Try with different encoding and separator
-                try:
-                    watch_df = pd.read_csv(user_file_path, encoding='utf-8', sep=',')
-                except Exception as csv_error2:
-                    print(f"Error reading CSV with utf-8 encoding: {csv_error2}")
-                    # Try with latin-1 encoding
-                    watch_df = pd.read_csv(user_file_path, encoding='latin-1', sep=',')
-        elif user_file_path.lower().endswith(('.xlsx', '.xls')):
-            watch_df = pd.read_excel(user_file_path)
-        else:
-            raise ValueError(f"Unsupported file type: {user_file_path}")
-        print("watch_df: ", watch_df)
-        # Extract all values from userfile
-        watch_headers = watch_df.columns
-        max_data_len = max(len(watch_df[col].dropna()) - 1 for col in watch_headers if len(watch_df[col]) > 1)
-        print("max_data_len: ", max_data_len)
-        # Initialize aligned data storage
-        aligned_data = {}
-
-        for result_col in result_df.columns:
-            matched_watch_col = next((col for col in watch_headers if vendor_field_map[result_col] == col.strip()), None)
-            if matched_watch_col:
-                # Take all values except the header
-                values = watch_df[matched_watch_col].tolist()[1:]
-                # Pad if shorter than max
-                if len(values) < max_data_len:
-                    values += [''] * (max_data_len - len(values))
-                aligned_data[result_col] = [vendor_field_map[result_col]] + values
-                print(f"✅ Matched: {matched_watch_col} → {result_col}")
-            else:
-                # Fill with blanks if not matched
-                aligned_data[result_col] = [vendor_field_map[result_col]] + [''] * max_data_len
 
-        # ---- Step 3: Finalize and Save ----
-        final_df = pd.DataFrame(aligned_data)
-        
-        # Save the file based on the extension
-        if result_path.lower().endswith('.csv'):
-            final_df.to_csv(result_path, index=False)
-        elif result_path.lower().endswith(('.xlsx', '.xls')):
-            final_df.to_excel(result_path, index=False)
+def _stack_sheets(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate rendered sheets, keeping only the first sheet's vendor-field row.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    stacked = pd.concat([frames[0]] + [frame.iloc[1:] for frame in frames[1:]], ignore_index=True)
+    return stacked.fillna("")
+
+
+def load_result_payload(result_path: str) -> dict:
+    """
+    Rebuild the response payload of a previously generated result file.
+    """
+    if result_path.lower().endswith('.csv'):
+        return _frame_to_payload(pd.read_csv(result_path, dtype=str, keep_default_na=False), result_path)
+    if result_path.lower().endswith('.jsonl'):
+        return _frame_to_payload(read_jsonl_result(result_path), result_path)
+    sheets = pd.read_excel(result_path, sheet_name=None)
+    payload = _frame_to_payload(_stack_sheets(list(sheets.values())), result_path)
+    if len(sheets) > 1:
+        payload["sheets"] = list(sheets)
+    return payload
+
+
+def mapping_hash(final_output: dict) -> str:
+    """
+    Hash of the parts of a mapping that shape the result file.
+
+    Only the column layout counts, so mappings that differ in confidences
+    alone render to the same result.
+    """
+    layouts = []
+    for item in final_output["items"]:
+        layouts.append({
+            "columns": [
+                [jc_field, mapping.get("vendor_field", "")]
+                for jc_field, mapping in item.items() if jc_field != "other_fields"
+            ],
+            "other_fields": [field.get("vendor_field", "").strip() for field in item.get("other_fields", [])],
+        })
+    canonical = {"version": RESULT_FORMAT_VERSION, "layouts": layouts}
+    if len(layouts) > 1:
+        canonical["sheet_output"] = settings.EXCEL_SHEET_OUTPUT
+    return hashlib.sha256(json.dumps(canonical, separators=(",", ":")).encode()).hexdigest()
+
+
+def _result_columns(item: dict) -> Dict[str, str]:
+    """
+    Output columns of a mapping item and the vendor field each one takes its values from.
+    """
+    columns = {}
+    # JC fields
+    for jc_field, mapping in item.items():
+        if jc_field == "other_fields":
+            continue
+        columns[jc_field] = mapping.get("vendor_field", "").strip()
+    # Other fields
+    for field in item.get("other_fields", []):
+        vendor_field = field.get("vendor_field", "").strip()
+        if vendor_field:
+            columns[vendor_field] = vendor_field
+    return columns
+
+
+def _render_rows(item: dict, watch_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Lay out the vendor columns of watch_df under the output columns of one mapping item.
+    """
+    watch_columns = {str(col).strip(): col for col in reversed(list(watch_df.columns))}
+    aligned_data = {}
+    for result_col, vendor_field in _result_columns(item).items():
+        matched_watch_col = watch_columns.get(vendor_field)
+        if matched_watch_col is not None:
+            aligned_data[result_col] = watch_df[matched_watch_col].to_numpy()
         else:
-            # Default to Excel if unknown extension
-            final_df.to_excel(result_path, index=False)
-            
-        print(f"✅ Final result saved at: {result_path}")
-        
-        # Convert DataFrame to 2D array (list of lists)
-        # Get headers as first row
-        headers = list(final_df.columns)
-        data_2d = [headers]  # First row contains headers
-        
-        # Add data rows
-        for _, row in final_df.iterrows():
-            data_row = []
-            for col in headers:
-                value = row[col]
-                # Convert NaN to empty string and ensure all values are strings
-                if pd.isna(value):
-                    data_row.append("")
-                else:
-                    data_row.append(str(value))
-            data_2d.append(data_row)
-        
-        print(f"✅ Generated 2D array with {len(data_2d)} rows and {len(headers)} columns")
-        
-        # Return both the data and metadata
-        return {
-            "data": data_2d,
-            "headers": headers,
-            "total_rows": len(data_2d),
-            "total_columns": len(headers),
-            "file_path": result_path
+            # Fill with blanks if not matched
+            aligned_data[result_col] = np.full(len(watch_df), '', dtype=object)
+    return pd.DataFrame(aligned_data)
+
+
+def _vendor_usecols(item: dict, headers: List[str]) -> Optional[List[str]]:
+    """
+    Vendor headers a mapping item renders from, or None to read every column.
+    """
+    wanted = set(_result_columns(item).values())
+    usecols = [header for header in headers if str(header).strip() in wanted]
+    # Without any mapped column the row count still has to come from the file
+    return usecols or None
+
+
+def _render_frame(item: dict, watch_df: pd.DataFrame, skip_first: bool = True) -> pd.DataFrame:
+    """
+    Result table of one mapping item: the vendor-field row, then the vendor
+    values. With skip_first, the first row of watch_df is treated as a
+    header row and skipped.
+    """
+    columns = _result_columns(item)
+    header = pd.DataFrame([list(columns.values())], columns=list(columns))
+    return pd.concat([header, _render_rows(item, watch_df.iloc[1:] if skip_first else watch_df)], ignore_index=True)
+
+
+def _render_vendor_file(item: dict, file_path: str, file_id: str) -> Optional[pd.DataFrame]:
+    """
+    Result table of a single-layout upload, or None when reading it whole
+    would not fit the memory budget (see _render_vendor_chunks).
+
+    Only the mapped vendor columns are read, as compact dtypes and with
+    delimited values kept as written, like the row partitions of
+    render_result read them. Workbooks cannot be read in chunks and are
+    always read whole.
+    """
+    usecols = _vendor_usecols(item, read_vendor_headers(file_path))
+    budget = settings.READ_MEMORY_BUDGET_MB * 1024 * 1024
+    if budget and not file_path.lower().endswith(EXCEL_EXTENSIONS):
+        estimate = estimate_frame_bytes(file_path, usecols, as_text=True)
+        if estimate > budget:
+            logger.info("Vendor frame over memory budget, rendering in chunks", extra={
+                "file_id": file_id, "estimated_mb": round(estimate / 1024 / 1024, 1),
+                "budget_mb": settings.READ_MEMORY_BUDGET_MB
+            })
+            return None
+    RENDER_READS.labels("memory").inc()
+    watch_df = read_vendor_file(file_path, usecols=usecols, as_text=True)
+    _cache_columns(file_id, watch_df)
+    return _render_frame(item, watch_df)
+
+
+def _render_vendor_chunks(item: dict, file_path: str) -> Iterator[pd.DataFrame]:
+    """
+    Result table of a single-layout upload in pieces: the vendor-field row,
+    then the rows of one chunk of the upload at a time.
+
+    Each chunk is read only once the previous piece has been consumed, so a
+    caller writing the pieces out holds one chunk at a time.
+    """
+    RENDER_READS.labels("chunked").inc()
+    usecols = _vendor_usecols(item, read_vendor_headers(file_path))
+    columns = _result_columns(item)
+    yield pd.DataFrame([list(columns.values())], columns=list(columns))
+    rows = 0
+    with track_stage("parse", chunked=True):
+        for index, chunk in enumerate(iter_vendor_chunks(file_path, usecols=usecols, compact=True, as_text=True)):
+            rows += len(chunk)
+            # Matches _render_frame, which skips the first data row
+            yield _render_rows(item, chunk.iloc[1:] if index == 0 else chunk)
+    BYTES_PROCESSED.labels("parse").inc(os.path.getsize(file_path))
+    ROWS_PROCESSED.labels("parse").inc(rows)
+
+
+def _result_target(
+    final_output: dict,
+    file_id: str,
+    output_format: Optional[str] = None,
+) -> Tuple[str, Optional[str], str]:
+    """
+    Path, memo key and extension of the result file for a mapping of an upload.
+
+    Results are named after the upload's content hash, the mapping hash and
+    the output format; uploads without a content alias get a random name.
+    Without an output format (see RESULT_FORMATS) the result follows the
+    upload: CSV for CSV uploads, XLSX otherwise.
+    """
+    if output_format:
+        extension = RESULT_FORMATS[output_format]
+    else:
+        _, extension = os.path.splitext(file_id)
+        extension = extension.lower()
+        if extension not in ('.csv', '.xlsx'):
+            # JSON/TSV/TXT and legacy .xls sources are rendered as Excel
+            extension = '.xlsx'
+    alias = storage.get_alias(file_id)
+    key = f"{alias['content_hash'][:32]}-{mapping_hash(final_output)[:32]}" if alias else None
+    return storage.new_result_path(extension, key), key, extension
+
+
+def _memoized_result(result_path: str, key: Optional[str], file_id: str) -> Optional[dict]:
+    if not key or not os.path.exists(result_path):
+        return None
+    storage.touch(result_path)
+    RESULT_MEMO.labels("hit").inc()
+    logger.info("Reusing rendered result", extra={"file_id": file_id, "result_file": os.path.basename(result_path)})
+    return load_result_payload(result_path)
+
+
+def _write_result(pieces: Iterable[Tuple[str, pd.DataFrame]], result_path: str, extension: str) -> int:
+    """
+    Write rendered (sheet, frame) pieces to a result file with the streaming
+    writer of its format; pieces of one sheet are appended in order.
+    Returns the number of rows written.
+
+    The file is written under a temporary name and moved into place, so a
+    concurrent render of the same key never sees a partial file.
+    """
+    tmp_path = f"{result_path}.{uuid.uuid4().hex}.tmp"
+    with track_stage("result_write", format=extension.lstrip(".")):
+        try:
+            with open(tmp_path, "wb") as f, open_result_writer(f, extension) as writer:
+                for sheet, frame in pieces:
+                    writer.write(frame, sheet=sheet)
+            os.replace(tmp_path, result_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return writer.rows
+
+
+def _renders_per_sheet(file_path: str, extension: str) -> bool:
+    """
+    Whether the sheets of a workbook upload become separate output sheets (EXCEL_SHEET_OUTPUT).
+    """
+    if extension != '.xlsx' or settings.EXCEL_SHEET_OUTPUT != "per_sheet":
+        return False
+    return file_path.lower().endswith(EXCEL_EXTENSIONS) and len(excel_sheets(file_path)) > 1
+
+
+def _render_to_file(
+    final_output: dict,
+    file_id: str,
+    result_path: str,
+    key: Optional[str],
+    extension: str,
+) -> Tuple[Optional[pd.DataFrame], List[str]]:
+    """
+    Render a mapping of an upload into its result file.
+
+    Outputs with one item per sheet layout (see sheet_layouts) render every
+    vendor sheet with its layout's item, stacked into one table or written
+    as one output sheet per vendor sheet (EXCEL_SHEET_OUTPUT); with
+    per_sheet output, workbooks whose sheets share one layout are rendered
+    sheet by sheet too. Uploads too large to read whole are written one
+    chunk at a time.
+
+    Returns:
+        The stacked result frame (None when written in chunks) and the
+        names of the output sheets when there are several
+    """
+    user_file_path = storage.resolve(file_id) or os.path.join(settings.UPLOAD_DIR, file_id)
+    if not os.path.exists(user_file_path):
+        raise FileNotFoundError(f"user_file_path not found at {user_file_path}")
+
+    items = final_output["items"]
+    if len(items) > 1 or _renders_per_sheet(user_file_path, extension):
+        # One item per sheet layout; the sheets are parsed in parallel
+        sheets = read_excel_sheets(user_file_path, compact=True)
+        sheet_items = {
+            name: item for item, layout in zip(items, sheet_layouts(user_file_path)) for name in layout["sheets"]
         }
+        # In the workbook's sheet order; the legacy first-row skip applies
+        # once to the stacked output, not to every sheet
+        rendered = {}
+        for name, frame in sheets.items():
+            if name in sheet_items:
+                rendered[name] = _render_frame(sheet_items[name], frame, skip_first=not rendered)
+    else:
+        # Parse once using the dialect recorded at upload time
+        final_df = _render_vendor_file(items[0], user_file_path, file_id)
+        if final_df is None:
+            pieces = _render_vendor_chunks(items[0], user_file_path)
+            rows = _write_result((("Sheet1", piece) for piece in pieces), result_path, extension)
+            if key:
+                RESULT_MEMO.labels("miss").inc()
+            logger.info("Result saved", extra={
+                "file_id": file_id, "result_file": os.path.basename(result_path), "rows": rows, "chunked": True
+            })
+            return None, []
+        rendered = {"Sheet1": final_df}
+
+    # ---- Finalize and Save ----
+    final_df = _stack_sheets(list(rendered.values()))
+    per_sheet = len(rendered) > 1 and extension == '.xlsx' and settings.EXCEL_SHEET_OUTPUT == "per_sheet"
+    _write_result((rendered if per_sheet else {"Sheet1": final_df}).items(), result_path, extension)
+    if key:
+        RESULT_MEMO.labels("miss").inc()
+
+    logger.info("Result saved", extra={
+        "file_id": file_id, "result_file": os.path.basename(result_path), "rows": len(final_df),
+        "sheets": len(rendered)
+    })
+    return final_df, list(rendered) if per_sheet else []
+
+
+def generate_result_with_watch_data(final_output: dict, file_id: str, output_format: Optional[str] = None) -> dict:
+    """
+    Generate result.csv from final_output and enrich it using data from user_file_path.csv
+    where vendor_field matches watch column headers. Ensures row alignment.
+
+    Rendering the same mapping of the same content again returns the
+    existing file without reading the vendor file (see _result_target).
+    """
+    try:
+        result_path, key, extension = _result_target(final_output, file_id, output_format)
+        memoized = _memoized_result(result_path, key, file_id)
+        if memoized:
+            return memoized
+
+        final_df, sheets = _render_to_file(final_output, file_id, result_path, key, extension)
+        if final_df is None:
+            # Written in chunks; the whole frame never existed
+            return load_result_payload(result_path)
+        payload = _frame_to_payload(final_df, result_path)
+        if sheets:
+            payload["sheets"] = sheets
+        return payload
 
     except Exception as e:
-        print(f"❌ Error in generate_result_with_watch_data: {e}")
+        logger.exception("Error in generate_result_with_watch_data", extra={"file_id": file_id})
         raise e
 
+
+def write_result_with_watch_data(final_output: dict, file_id: str, output_format: Optional[str] = None) -> str:
+    """
+    Render the result file of a mapping like generate_result_with_watch_data,
+    without building its payload.
+
+    Runs in a pool worker: only the result path travels back to the API
+    process, which reads the payload from the file.
+    """
+    try:
+        result_path, key, extension = _result_target(final_output, file_id, output_format)
+        if key and os.path.exists(result_path):
+            # Rendered by a concurrent request since the caller checked
+            storage.touch(result_path)
+            RESULT_MEMO.labels("hit").inc()
+            return result_path
+        _render_to_file(final_output, file_id, result_path, key, extension)
+        return result_path
+
+    except Exception:
+        logger.exception("Error in write_result_with_watch_data", extra={"file_id": file_id})
+        raise
+
+
+def _render_partition(
+    file_path: str,
+    start: int,
+    end: int,
+    columns: List[str],
+    item: dict,
+    part_path: str,
+    skip_first: bool,
+    column_dir: Optional[str] = None,
+) -> int:
+    """
+    Render the records in one byte range of a delimited upload to a headerless CSV part.
+
+    With column_dir, the vendor columns read are also kept there for the
+    column cache (see _cache_partition_columns), named by the part file.
+    Runs in a pool worker; returns the number of rows written.
+    """
+    watch_df = read_delimited_range(file_path, start, end, columns, _vendor_usecols(item, columns))
+    if column_dir:
+        part_name = os.path.splitext(os.path.basename(part_path))[0]
+        for vendor_field, column in _vendor_columns(watch_df).items():
+            watch_df[column].to_pickle(os.path.join(column_dir, _column_part_name(part_name, vendor_field)))
+    if skip_first:
+        # Matches _render_frame, which skips the first data row
+        watch_df = watch_df.iloc[1:]
+    rows = _render_rows(item, watch_df)
+    rows.to_csv(part_path, index=False, header=False)
+    return len(rows)
+
+
+def _merge_partitions(
+    item: dict,
+    part_paths: List[str],
+    result_path: str,
+    key: Optional[str],
+    extension: str,
+    file_id: str,
+) -> dict:
+    """
+    Concatenate rendered CSV parts in order into the result file and build its payload.
+    """
+    columns = _result_columns(item)
+    headers = list(columns)
+    tmp_path = f"{result_path}.{uuid.uuid4().hex}.tmp"
+    with track_stage("result_write", format=extension.lstrip(".")):
+        try:
+            if extension == '.csv':
+                with open(tmp_path, "w", newline="") as out:
+                    out.write(pd.DataFrame([list(columns.values())], columns=headers).to_csv(index=False))
+                    for part_path in part_paths:
+                        with open(part_path, "r", newline="") as part:
+                            shutil.copyfileobj(part, out)
+            else:
+                # Parts go through the streaming writer one at a time
+                with open(tmp_path, "wb") as f, open_result_writer(f, extension) as writer:
+                    writer.write(pd.DataFrame([list(columns.values())], columns=headers))
+                    for part_path in part_paths:
+                        if os.path.getsize(part_path):
+                            writer.write(pd.read_csv(
+                                part_path, header=None, names=headers, dtype=str, keep_default_na=False
+                            ))
+            os.replace(tmp_path, result_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    # The parts hold exactly the rendered text, so the payload is read back from them
+    data = [headers, list(columns.values())]
+    for part_path in part_paths:
+        with open(part_path, "r", newline="") as part:
+            data.extend(csv.reader(part))
+    if key:
+        RESULT_MEMO.labels("miss").inc()
+    if extension == '.csv':
+        # Other formats are counted by their writer
+        ROWS_PROCESSED.labels("result_write").inc(len(data) - 1)
+    logger.info("Result saved", extra={
+        "file_id": file_id, "result_file": os.path.basename(result_path), "rows": len(data) - 1,
+        "partitions": len(part_paths)
+    })
+    return {
+        "data": data,
+        "headers": headers,
+        "total_rows": len(data),
+        "total_columns": len(headers),
+        "file_path": result_path
+    }
+
+
+def _render_partitions(final_output: dict, file_id: str) -> Optional[Tuple[str, List[Tuple[int, int]]]]:
+    """
+    Upload path and byte ranges to render in parallel, or None when the upload renders in one piece.
+    """
+    if len(final_output["items"]) != 1:
+        return None
+    file_path = storage.resolve(file_id)
+    if not file_path or not file_path.lower().endswith(DELIMITED_EXTENSIONS):
+        return None
+    parts = min(pool_size(), os.path.getsize(file_path) // settings.RENDER_PARTITION_BYTES)
+    if parts < 2:
+        return None
+    partitions = delimited_partitions(file_path, parts)
+    return (file_path, partitions) if len(partitions) > 1 else None
+
+
+async def render_result(final_output: dict, file_id: str, output_format: Optional[str] = None) -> dict:
+    """
+    Render the result file of a mapping off the event loop, in output_format
+    (see RESULT_FORMATS) or the format that follows the upload.
+
+    Large delimited uploads are split into row partitions rendered in
+    parallel by the process pool, each into a temporary CSV part; the parts
+    are concatenated in order. Other single-layout uploads are rendered by
+    one pool worker, and their payload is read back from the result file.
+    Multi-sheet workbooks render in a thread, which parses their sheets in
+    the pool.
+    """
+    result_path, key, extension = await asyncio.to_thread(_result_target, final_output, file_id, output_format)
+    memoized = await asyncio.to_thread(_memoized_result, result_path, key, file_id)
+    if memoized:
+        return memoized
+    if len(final_output["items"]) > 1:
+        return await asyncio.to_thread(generate_result_with_watch_data, final_output, file_id, output_format)
+    plan = await asyncio.to_thread(_render_partitions, final_output, file_id)
+    if plan is None:
+        result_path = await run_in_process(write_result_with_watch_data, final_output, file_id, output_format)
+        return await asyncio.to_thread(load_result_payload, result_path)
+
+    file_path, partitions = plan
+    item = final_output["items"][0]
+    columns = await asyncio.to_thread(read_vendor_headers, file_path)
+    part_dir = tempfile.mkdtemp(prefix="render-")
+    # Partitions keep their vendor columns for the column cache, like single reads do
+    column_dir = part_dir if key and settings.RESULT_COLUMN_CACHE else None
+    try:
+        part_paths = [os.path.join(part_dir, f"{index:05d}.csv") for index in range(len(partitions))]
+        with track_stage("render_partitions", partitions=len(partitions)):
+            await asyncio.gather(*(
+                run_in_process(
+                    _render_partition, file_path, start, end, columns, item, part_path, index == 0, column_dir
+                )
+                for index, ((start, end), part_path) in enumerate(zip(partitions, part_paths))
+            ))
+        payload = await asyncio.to_thread(
+            _merge_partitions, item, part_paths, result_path, key, extension, file_id
+        )
+        if column_dir:
+            vendor_fields = [str(column).strip() for column in _vendor_usecols(item, columns) or columns]
+            await asyncio.to_thread(_cache_partition_columns, file_id, column_dir, part_paths, vendor_fields)
+        return payload
+    except Exception:
+        logger.exception("Error rendering result partitions", extra={"file_id": file_id})
+        raise
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+
 # ============================================================================
-# MAPPING ENDPOINTS
+# RE-RENDERING FROM CACHED COLUMNS
 # ============================================================================
 
-@router.post("/mapping/ai-suggested")
-async def generate_ai_suggested_mappings(
-    file_id: str,
-    client_number: str = Form(None, description="Client number for the mapping"),
-    # current_user: User = Depends(get_current_active_superuser),
-    db: Session = Depends(get_db)
-) -> Any:
+def _field_digest(vendor_field: str) -> str:
+    return hashlib.sha1(vendor_field.encode()).hexdigest()[:16]
+
+
+def _column_cache_path(content_hash: str, vendor_field: str) -> str:
+    name = f"{content_hash[:32]}-{_field_digest(vendor_field)}-v{RESULT_FORMAT_VERSION}.col"
+    return storage.artifact_path(CACHE, name)
+
+
+def _column_part_name(part_name: str, vendor_field: str) -> str:
+    return f"{part_name}-{_field_digest(vendor_field)}.col"
+
+
+def _vendor_columns(watch_df: pd.DataFrame) -> Dict[str, Any]:
+    # The first column of a repeated header wins, as in _render_rows
+    return {str(col).strip(): col for col in reversed(list(watch_df.columns))}
+
+
+def _store_cached_column(content_hash: str, vendor_field: str, load_column: Callable[[], pd.Series]) -> None:
+    path = _column_cache_path(content_hash, vendor_field)
+    if os.path.exists(path):
+        storage.touch(path)
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    load_column().to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _cache_columns(file_id: str, watch_df: pd.DataFrame) -> None:
     """
-    Generate AI-suggested field mappings using OpenAI and Pinecone.
+    Keep the vendor columns of a full read of an upload, one cache file per
+    column, so mapping edits can re-render without parsing the upload again.
+    """
+    alias = storage.get_alias(file_id)
+    if not alias or not settings.RESULT_COLUMN_CACHE:
+        return
+    try:
+        for vendor_field, column in _vendor_columns(watch_df).items():
+            _store_cached_column(alias["content_hash"], vendor_field, lambda column=column: watch_df[column])
+    except Exception as e:
+        logger.warning("Failed to cache vendor columns", extra={"file_id": file_id, "error": str(e)})
+
+
+def _cache_partition_columns(file_id: str, column_dir: str, part_paths: List[str], vendor_fields: List[str]) -> None:
     """
-    print("generate_ai_suggested_mappings" ,file_id)
+    Keep the vendor columns of a partitioned render in the column cache.
 
-    # 1. Get the file record from DB
+    Each column is assembled from the pieces the partition workers left in
+    column_dir, one column at a time, so a catalog too large to read whole
+    is still re-rendered from the cache after an edit.
+    """
+    alias = storage.get_alias(file_id)
+    if not alias:
+        return
+    part_names = [os.path.splitext(os.path.basename(part_path))[0] for part_path in part_paths]
     try:
-        print("file_id: ", file_id)
-        file_path = os.path.join("uploads", file_id)
-        print("file_path: ", file_path)
-        
-        # Check if file exists
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail=f"File not found: {file_id}")
-        
-        # Determine file type and read accordingly
-        if file_id.lower().endswith('.csv'):
-            try:
-                # Try reading with default settings first
-                df = pd.read_csv(file_path)
-            except Exception as csv_error:
-                print(f"Error reading CSV with default settings: {csv_error}")
-                # Try with different encoding and separator
-                try:
-                    df = pd.read_csv(file_path, encoding='utf-8', sep=',')
-                except Exception as csv_error2:
-                    print(f"Error reading CSV with utf-8 encoding: {csv_error2}")
-                    # Try with latin-1 encoding
-                    df = pd.read_csv(file_path, encoding='latin-1', sep=',')
-        elif file_id.lower().endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(file_path)
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported file type: {file_id}")
-            
-        vendor_headers = list(df.columns)
-        print("vendor_headers: ", vendor_headers)
+        for vendor_field in vendor_fields:
+            _store_cached_column(alias["content_hash"], vendor_field, lambda vendor_field=vendor_field: pd.concat([
+                pd.read_pickle(os.path.join(column_dir, _column_part_name(part_name, vendor_field)))
+                for part_name in part_names
+            ], ignore_index=True))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading file: {str(e)}")
+        logger.warning("Failed to cache vendor columns", extra={"file_id": file_id, "error": str(e)})
+
 
-    # 3. Define the fixed JC headers
-    target_headers = [
-        "RetailerStockNumber", "StyleNumber", "VisibleAs", "ParentSKU", "ProductType",
-        "SelectedAttributes", "ProductName", "ProductDescription", "CustomAttribute",
-        "CustomAttributeLabel", "ConfigurableControlType", "IsConfigurableProduct",
-        "ControlDisplayOrder", "Categories", "Collections", "PriceType",
-        "WholesaleBasePrice", "MSRP", "MetalType", "MetalColor", "ImagePath", "Gender"
+def _cached_columns(file_id: str, vendor_fields: List[str]) -> Dict[str, pd.Series]:
+    """
+    Vendor columns of an upload found in the column cache, by vendor field.
+    """
+    alias = storage.get_alias(file_id)
+    if not alias:
+        return {}
+    columns = {}
+    for vendor_field in vendor_fields:
+        path = _column_cache_path(alias["content_hash"], vendor_field)
+        try:
+            columns[vendor_field] = pd.read_pickle(path)
+        except (OSError, ValueError, EOFError):
+            continue
+        storage.touch(path)
+    return columns
+
+
+def _load_columns(file_id: str, file_path: str, vendor_fields: List[str]) -> Dict[str, pd.Series]:
+    """
+    Vendor columns by vendor field, from the column cache where available and
+    otherwise read from the upload (only the missing columns) and cached.
+    Fields the upload does not have are left out; nothing is returned when
+    the missing columns would not fit the read memory budget.
+    """
+    columns = _cached_columns(file_id, vendor_fields)
+    missing = {field for field in vendor_fields if field not in columns}
+    if missing:
+        usecols = [header for header in read_vendor_headers(file_path) if str(header).strip() in missing]
+        budget = settings.READ_MEMORY_BUDGET_MB * 1024 * 1024
+        if usecols and budget and not file_path.lower().endswith(EXCEL_EXTENSIONS):
+            if estimate_frame_bytes(file_path, usecols, as_text=True) > budget:
+                return {}
+        if usecols:
+            watch_df = read_vendor_file(file_path, usecols=usecols, as_text=True)
+            _cache_columns(file_id, watch_df)
+            for column in reversed(list(watch_df.columns)):
+                columns[str(column).strip()] = watch_df[column]
+    return {field: columns[field] for field in vendor_fields if field in columns}
+
+
+def apply_mapping_edits(final_output: dict, edits: List[dict]) -> dict:
+    """
+    Apply manual edits from /mapping/save on top of an earlier mapping.
+
+    Each edit assigns a vendor field to a JC field; an empty vendor field
+    clears it. A vendor field taken over by a JC field leaves other_fields,
+    and one no JC field uses anymore moves to other_fields, so its column
+    stays in the result file (unless it is named like a JC field, whose
+    column it would replace). Edits of unknown JC fields are ignored.
+    """
+    items = []
+    for item in final_output["items"]:
+        item = dict(item)
+        released = []
+        assigned = set()
+        for edit in edits:
+            jc_field = edit.get("jc_field")
+            if jc_field not in JC_FIELDS:
+                continue
+            vendor_field = (edit.get("vendor_field") or "").strip()
+            previous = item.get(jc_field) or {}
+            if previous.get("vendor_field", "").strip() not in ("", vendor_field):
+                released.append(previous)
+            confidence = edit.get("confidence")
+            item[jc_field] = {"vendor_field": vendor_field, "confidence": 1.0 if confidence is None else confidence}
+            if vendor_field:
+                assigned.add(vendor_field)
+        in_use = {
+            (item.get(jc_field) or {}).get("vendor_field", "").strip() for jc_field in JC_FIELDS
+        } | {field.get("vendor_field", "").strip() for field in item.get("other_fields", [])}
+        other_fields = [
+            field for field in item.get("other_fields", [])
+            if field.get("vendor_field", "").strip() not in assigned
+        ]
+        for previous in released:
+            vendor_field = previous["vendor_field"].strip()
+            if vendor_field not in in_use and vendor_field not in JC_FIELDS:
+                other_fields.append({"vendor_field": vendor_field, "confidence": previous.get("confidence", 0.0)})
+                in_use.add(vendor_field)
+        item["other_fields"] = other_fields
+        items.append(item)
+    return {**final_output, "items": items}
+
+
+def rerender_result(
+    previous_output: dict,
+    final_output: dict,
+    file_id: str,
+    output_format: Optional[str] = None,
+) -> dict:
+    """
+    Re-render the result file of an upload after its mapping was edited.
+
+    The result is rebuilt from the column cache, filled by earlier renders
+    of the upload, so the upload is parsed only for vendor columns the
+    cache does not hold. This is not incremental: every output column is
+    laid out again and the whole file rewritten, since CSV and XLSX do not
+    allow replacing a column in place. Multi-layout mappings, workbooks
+    written sheet by sheet, and mappings that take no column from the
+    upload, are rendered in full.
+
+    Returns:
+        Dict with the result file path, its headers, the output columns
+        whose vendor field changed and how the result was produced
+        (memoized, cached, full)
+    """
+    result_path, key, extension = _result_target(final_output, file_id, output_format)
+    new_columns = _result_columns(final_output["items"][0])
+    changed = [
+        column for column, vendor_field in new_columns.items()
+        if len(previous_output["items"]) != 1 or _result_columns(previous_output["items"][0]).get(column) != vendor_field
     ]
-    print("target_headers: ", target_headers)
-    
-    # load agent
+
+    def summary(render: str, headers: List[str]) -> dict:
+        return {"file_path": result_path, "headers": headers, "changed_columns": changed, "render": render}
+
+    if key and os.path.exists(result_path):
+        storage.touch(result_path)
+        RESULT_MEMO.labels("hit").inc()
+        return summary("memoized", list(new_columns))
+
+    file_path = storage.resolve(file_id)
+    if not file_path:
+        raise FileNotFoundError(f"user_file_path not found for {file_id}")
+    vendor_fields = [field for field in dict.fromkeys(new_columns.values()) if field]
+    columns = None
+    if len(final_output["items"]) == 1 and vendor_fields and not _renders_per_sheet(file_path, extension):
+        with track_stage("rerender", changed=len(changed)):
+            columns = _load_columns(file_id, file_path, vendor_fields)
+    if not columns:
+        payload = generate_result_with_watch_data(final_output, file_id, output_format)
+        return summary("full", payload["headers"])
+
+    item = final_output["items"][0]
+    final_df = _render_frame(item, pd.DataFrame(columns))
+    _write_result([("Sheet1", final_df)], result_path, extension)
+    if key:
+        RESULT_MEMO.labels("miss").inc()
+    logger.info("Result re-rendered", extra={
+        "file_id": file_id, "result_file": os.path.basename(result_path), "rows": len(final_df),
+        "changed_columns": len(changed)
+    })
+    return summary("cached", list(final_df.columns))
+
+
+def shard_headers(headers: List[str], shard_size: int, threshold: int) -> List[List[str]]:
+    """
+    Split a header list into contiguous, evenly sized shards of at most shard_size.
+
+    Lists no longer than threshold stay in one shard. Neighbouring columns are
+    kept together since they tend to describe related attributes.
+    """
+    if len(headers) <= max(threshold, shard_size) or shard_size <= 0:
+        return [headers]
+    count = math.ceil(len(headers) / shard_size)
+    size, extra = divmod(len(headers), count)
+    shards, start = [], 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        shards.append(headers[start:end])
+        start = end
+    return shards
+
+
+def merge_mapping_outputs(outputs: List[dict]) -> dict:
+    """
+    Merge the agent outputs of several header shards into one OutputModel dict.
+
+    Each JC field keeps the candidate with the highest confidence; candidates
+    that lose go to other_fields so their columns still reach the result file.
+    other_fields are deduplicated by vendor field, keeping the highest confidence.
+    """
+    if len(outputs) == 1:
+        return outputs[0]
+
+    best = {}
+    others = {}
+
+    def add_other(vendor_field: str, confidence: float):
+        vendor_field = vendor_field.strip()
+        if vendor_field and confidence >= others.get(vendor_field, -1.0):
+            others[vendor_field] = confidence
+
+    for output in outputs:
+        for item in output.get("items", [])[:1]:
+            for jc_field in JC_FIELDS:
+                candidate = item.get(jc_field) or {"vendor_field": "", "confidence": 0.0}
+                if not candidate.get("vendor_field"):
+                    continue
+                current = best.get(jc_field)
+                if current is None or candidate["confidence"] > current["confidence"]:
+                    if current is not None:
+                        add_other(current["vendor_field"], current["confidence"])
+                    best[jc_field] = candidate
+                else:
+                    add_other(candidate["vendor_field"], candidate["confidence"])
+            for field in item.get("other_fields", []):
+                add_other(field.get("vendor_field", ""), field.get("confidence", 0.0))
+
+    assigned = {mapping["vendor_field"].strip() for mapping in best.values()}
+    merged = {jc_field: best.get(jc_field, {"vendor_field": "", "confidence": 0.0}) for jc_field in JC_FIELDS}
+    merged["other_fields"] = [
+        {"vendor_field": vendor_field, "confidence": confidence}
+        for vendor_field, confidence in others.items() if vendor_field not in assigned
+    ]
+    return {"items": [merged]}
+
+async def _map_headers_with_agent(
+    vendor_headers: List[str],
+    target_headers: List[str],
+    client_number: Optional[str],
+    on_field: Optional[Callable[[str, dict], None]] = None,
+    profiles: Optional[Dict[str, dict]] = None,
+) -> List[dict]:
+    """
+    Map vendor headers onto the given JC headers with the agent.
+
+    Wide header lists are split into shards mapped concurrently; each shard's
+    output is returned for merge_mapping_outputs. With on_field, the output is
+    streamed and on_field(jc_field, mapping) is called as each field completes.
+    Column profiles, when given, are summarised in the prompt so headers like
+    "Field1" can be mapped by their values.
+    """
     try:
-        from agents import Agent, Runner
-        from pydantic import BaseModel
-        from typing import List
-        print("Successfully imported openai_agents")
+        from agents import Agent, Runner, RunConfig
     except ImportError as e:
-        print(f"Error importing openai_agents: {e}")
+        logger.error("Error importing openai_agents", extra={"error": str(e)})
         raise HTTPException(
             status_code=500, 
             detail="AI agents module not available. Please install openai-agents package."
         )
     
-    class FieldMapping(BaseModel):
-        vendor_field: str
-        confidence: float
-
-    print("FieldMapping class defined successfully")
-
-    class MappingItem(BaseModel):
-        RetailerStockNumber: FieldMapping
-        StyleNumber: FieldMapping
-        VisibleAs: FieldMapping
-        ParentSKU: FieldMapping
-        ProductType: FieldMapping
-        SelectedAttributes: FieldMapping
-        ProductName: FieldMapping
-        ProductDescription: FieldMapping
-        CustomAttribute: FieldMapping
-        CustomAttributeLabel: FieldMapping
-        ConfigurableControlType: FieldMapping
-        IsConfigurableProduct: FieldMapping
-        ControlDisplayOrder: FieldMapping
-        Categories: FieldMapping
-        Collections: FieldMapping
-        PriceType: FieldMapping
-        WholesaleBasePrice: FieldMapping
-        MSRP: FieldMapping
-        MetalType: FieldMapping
-        MetalColor: FieldMapping
-        ImagePath: FieldMapping
-        Gender: FieldMapping
-        other_fields: List[FieldMapping]
-
-    class OutputModel(BaseModel):
-        items: List[MappingItem]
-    print("vendor_headers: ", vendor_headers)
     agent = Agent(
         name="Header Mapper",
         instructions=(
@@ -264,41 +901,639 @@ async def generate_ai_suggested_mappings(
         
         output_type=OutputModel
     )
-    print("agent: ", agent)
-    prompt = (
-        f"Vendor headers: {vendor_headers}\n"
-        f"JC headers: {target_headers}\n"
-        "Map each vendor header to the most appropriate JC header. "
-        "Return only a JSON list of objects with 'vendor_field', 'jc_field', and 'confidence'."
+    async def run_agent(headers: List[str], shard: int):
+        prompt = (
+            f"Vendor headers: {headers}\n"
+            f"JC headers: {target_headers}\n"
+        )
+        described = [describe_profile(header, profiles[header]) for header in headers if profiles and header in profiles]
+        if described:
+            prompt += "Sampled values of the vendor columns:\n" + "\n".join(described) + "\n"
+        prompt += (
+            "Map each vendor header to the most appropriate JC header. "
+            "Return only a JSON list of objects with 'vendor_field', 'jc_field', and 'confidence'."
+        )
+        run_config = RunConfig(group_id=current_request_id())
+        with track_stage("llm", shard=shard, headers=len(headers)):
+            if on_field is None:
+                response = await Runner.run(agent, prompt, run_config=run_config)
+                return response.final_output.dict()
+            streamed = Runner.run_streamed(agent, prompt, run_config=run_config)
+            parser = FieldStreamParser(target_headers)
+            async for event in streamed.stream_events():
+                delta = text_delta(event)
+                if delta:
+                    for jc_field, mapping in parser.feed(delta):
+                        on_field(jc_field, mapping)
+            return streamed.final_output.dict()
+
+    # Wide files are mapped in shards concurrently, so latency follows the shard
+    # size rather than the header count
+    shards = shard_headers(vendor_headers, settings.MAPPING_SHARD_SIZE, settings.MAPPING_SHARD_THRESHOLD)
+    if len(shards) > 1:
+        logger.info("Mapping headers in shards", extra={"shards": len(shards)})
+
+    # Queue behind other clients' calls instead of all hitting the provider at once
+    return await asyncio.gather(*(
+        llm_admission.run(client_number, run_agent, headers, shard) for shard, headers in enumerate(shards)
+    ))
+
+async def _queue_pinecone_upsert(ai_response: dict, file_id: str, client_number: Optional[str]) -> dict:
+    """
+    Record a mapping in the Pinecone outbox and describe the outcome like an upsert result.
+    """
+    try:
+        vector_id = await asyncio.to_thread(queue_pinecone_upsert, ai_response, file_id, client_number)
+    except Exception as e:
+        logger.warning("Failed to queue Pinecone upsert", extra={"file_id": file_id, "error": str(e)})
+        return {"success": False, "error": str(e), "message": "Failed to queue mapping data for Pinecone"}
+    outbox_dispatcher.wake()
+    return {"success": True, "mapping_id": vector_id, "message": "Mapping data queued for indexing in Pinecone"}
+
+# ============================================================================
+# MAPPING ENDPOINTS
+# ============================================================================
+
+def _cached_mapping_result(file_path: str, cache_key: str) -> Optional[dict]:
+    """
+    Response of an earlier mapping of the same content, if its result file still exists.
+    """
+    cached = load_upload_meta(file_path).get("mappings", {}).get(cache_key)
+    result_path = storage.resolve(cached["result_file"]) if cached else None
+    if not result_path:
+        return None
+    return {
+        "file_id": load_result_payload(result_path),
+        "message": "AI suggested mappings generated successfully",
+        "response": cached["response"],
+        "pinecone_saved": cached["pinecone_saved"],
+        "pinecone_id": cached["pinecone_id"],
+        "pinecone_message": cached["pinecone_message"],
+        "mapping_source": cached.get("mapping_source", "llm"),
+        "cached": True
+    }
+
+
+def _mapping_flight(
+    file_id: str,
+    file_path: str,
+    client_number: Optional[str],
+    cache_key: str,
+    on_field: Optional[Callable[[str, dict], None]] = None,
+) -> Awaitable[Tuple[dict, bool]]:
+    """
+    Map an upload, sharing the computation with concurrent requests for the same content.
+
+    Returns:
+        Awaitable of (result, whether it was computed by another request)
+    """
+    alias = storage.get_alias(file_id)
+    content_key = alias["content_hash"] if alias else os.path.basename(file_path)
+    return mapping_flights.run(
+        f"mapping:{content_key}:{client_number}:{SCHEMA_VERSION}",
+        lambda: _generate_ai_mapping(file_id, file_path, client_number, cache_key, on_field=on_field),
+        lambda: _cached_mapping_result(file_path, cache_key)
     )
-    response = await Runner.run(agent, prompt)
-    print("response final output :", response.final_output)
-    print("response  :", response)
-    
-    # Save AI response to Pinecone
+
+
+def _result_format(client_number: Optional[str], requested: Optional[str] = None) -> Optional[str]:
+    """
+    Result file format of a request: the requested one, else the client's
+    default (CLIENT_RESULT_FORMATS), else RESULT_FORMAT. None keeps the
+    legacy rule, where the result follows the upload's format.
+    """
+    output_format = requested or settings.CLIENT_RESULT_FORMATS.get(client_number or "") or settings.RESULT_FORMAT or None
+    if output_format and output_format not in RESULT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported output format: {output_format}. Allowed formats: {', '.join(RESULT_FORMATS)}"
+        )
+    return output_format
+
+
+async def _with_result_format(result: dict, file_id: str, output_format: Optional[str]) -> dict:
+    """
+    A mapping result whose result file is in output_format.
+
+    Cached and shared results keep the format they were rendered in; the
+    same mapping is rendered (or its memoized file reused) in the requested one.
+    """
+    payload = result["file_id"]
+    if not output_format or payload["file_path"].lower().endswith(RESULT_FORMATS[output_format]):
+        return result
+    response = result["response"]
+    final_output = response if isinstance(response, dict) else response.dict()
+    with span("generate_result"):
+        payload = await render_result(final_output, file_id, output_format)
+    return {**result, "file_id": payload}
+
+
+async def _set_file_status(file_id: str, status: str) -> None:
+    """
+    Record the pipeline status of an upload; a failed update is logged, not raised.
+    """
     try:
-        pinecone_result = upsert_mapping_data_to_pinecone(
-            ai_response=response.final_output.dict(),
-            file_id=file_id,
-            client_number=client_number
+        await asyncio.to_thread(set_file_status, file_id, status)
+    except Exception as e:
+        logger.warning("Failed to update file status", extra={"file_id": file_id, "status": status, "error": str(e)})
+
+
+@asynccontextmanager
+async def _file_status(file_id: str) -> AsyncIterator[None]:
+    """
+    Mark an upload processing for the duration of the block, then completed,
+    or failed when the block raises or is cancelled (a client leaving a
+    stream cancels its producer).
+    """
+    await _set_file_status(file_id, PROCESSING)
+    status = FAILED
+    try:
+        yield
+        status = COMPLETED
+    finally:
+        # Shielded, so a second cancellation cannot leave the file processing
+        await asyncio.shield(_set_file_status(file_id, status))
+
+
+@router.post("/mapping/ai-suggested")
+async def generate_ai_suggested_mappings(
+    file_id: str,
+    client_number: str = Form(None, description="Client number for the mapping"),
+    output_format: str = Form(None, description="Result file format (csv, xlsx or jsonl); defaults to the client's"),
+    # current_user: User = Depends(get_current_active_superuser),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    Generate AI-suggested field mappings using OpenAI and Pinecone.
+    """
+    output_format = _result_format(client_number, output_format)
+    # 1. Resolve the upload to its stored content
+    file_path = storage.resolve(file_id)
+    if not file_path:
+        raise HTTPException(status_code=404, detail=f"File not found: {file_id}")
+
+    # Identical content uploaded before reuses its mapping and result file
+    cache_key = f"{client_number}:{SCHEMA_VERSION}"
+    async with _file_status(file_id):
+        try:
+            # Reads the whole result file back, so it stays off the event loop
+            cached = await asyncio.to_thread(_cached_mapping_result, file_path, cache_key)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error reading file: {str(e)}")
+        if cached:
+            logger.info("Using cached mapping", extra={"file_id": file_id, "client_number": client_number})
+            return await _with_result_format(cached, file_id, output_format)
+
+        # Duplicate requests (retries, double clicks, other aliases of the same
+        # content) share one computation, also across workers
+        result, shared = await _mapping_flight(file_id, file_path, client_number, cache_key)
+        result = await _with_result_format(result, file_id, output_format)
+    if shared:
+        logger.info("Shared in-flight mapping", extra={"file_id": file_id, "client_number": client_number})
+        return {**result, "coalesced": True}
+    return result
+
+
+async def _decide_mapping(
+    file_id: str,
+    vendor_headers: List[str],
+    client_number: Optional[str],
+    on_field: Optional[Callable[[str, dict], None]],
+    profiles: Optional[Dict[str, Dict]],
+) -> Tuple[dict, str]:
+    """
+    Map one header row onto the JC fields.
+
+    Returns:
+        The mapping item and how it was decided (local, hybrid, llm or local_fallback)
+    """
+    # Headers the local matcher is confident about skip the LLM entirely
+    with track_stage("local_match", headers=len(vendor_headers)):
+        local_item = get_matcher().match(vendor_headers, profiles)
+    accepted = {
+        jc_field: local_item[jc_field] for jc_field in JC_FIELDS
+        if local_item[jc_field]["vendor_field"]
+        and local_item[jc_field]["confidence"] >= settings.MATCHER_ACCEPT_CONFIDENCE
+    }
+    decided = {mapping["vendor_field"] for mapping in accepted.values()}
+    remaining_headers = [header for header in vendor_headers if header not in decided]
+    target_headers = [jc_field for jc_field in JC_FIELDS if jc_field not in accepted]
+    if on_field is not None:
+        for jc_field, mapping in accepted.items():
+            on_field(jc_field, mapping)
+
+    local_output = {"items": [{
+        **{jc_field: accepted.get(jc_field, {"vendor_field": "", "confidence": 0.0}) for jc_field in JC_FIELDS},
+        "other_fields": []
+    }]}
+    logger.info("Local header match", extra={
+        "file_id": file_id, "accepted": len(accepted), "remaining_headers": len(remaining_headers)
+    })
+
+    if not remaining_headers or not target_headers:
+        local_output["items"][0]["other_fields"] = [
+            field for field in local_item["other_fields"] if field["vendor_field"] in remaining_headers
+        ]
+        return local_output["items"][0], "local"
+    try:
+        partial_outputs = await _map_headers_with_agent(
+            remaining_headers, target_headers, client_number, on_field, profiles
         )
-        print("Pinecone upsert result:", pinecone_result)
     except Exception as e:
-        print(f"Warning: Failed to save to Pinecone: {e}")
-        pinecone_result = {"success": False, "error": str(e)}
-    
+        if not settings.MATCHER_FALLBACK_ON_LLM_ERROR:
+            if isinstance(e, AdmissionTimeout):
+                raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+            raise
+        # A slow or failing provider degrades to the local mapping instead of an error
+        logger.warning("LLM mapping failed, using local matcher", extra={"file_id": file_id, "error": str(e)})
+        return local_item, "local_fallback"
+    # The agent's output model has every JC field; fields decided locally stay
+    # decided, and a header the agent put on one of them is only a candidate
+    for output in partial_outputs:
+        for item in output["items"]:
+            for jc_field in accepted:
+                candidate = item.pop(jc_field, None) or {}
+                if candidate.get("vendor_field"):
+                    item.setdefault("other_fields", []).append(candidate)
+    merged = merge_mapping_outputs([local_output, *partial_outputs])
+    return merged["items"][0], "hybrid" if accepted else "llm"
+
+
+async def _generate_ai_mapping(
+    file_id: str,
+    file_path: str,
+    client_number: Optional[str],
+    cache_key: str,
+    on_field: Optional[Callable[[str, dict], None]] = None,
+) -> dict:
+    """
+    Map the vendor headers, save the mapping to Pinecone, write the result
+    file and remember it against the stored content.
+
+    Fields the local matcher is confident about are decided without the
+    agent; the agent maps the rest, and the local mapping stands in for it
+    when it fails (MATCHER_FALLBACK_ON_LLM_ERROR). With on_field, the agent
+    output is streamed and on_field(jc_field, mapping) is called as soon as
+    each field's mapping has been decided. Workbooks whose sheets have
+    different header rows get one mapping item per layout (not streamed).
+    """
+    try:
+        # Only the header row is needed to build the prompt
+        vendor_headers = await asyncio.to_thread(read_vendor_headers, file_path)
+        layouts = None
+        if file_path.lower().endswith(EXCEL_EXTENSIONS):
+            layouts = await asyncio.to_thread(sheet_layouts, file_path)
+        logger.info("Read vendor headers", extra={
+            "file_id": file_id, "header_count": len(vendor_headers), "layouts": len(layouts) if layouts else 1
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading file: {str(e)}")
+
+    # Sampled column values disambiguate headers the names alone do not
     try:
-         file_name_output = generate_result_with_watch_data(response.final_output.dict(), file_id)
+        profiles = await asyncio.to_thread(get_column_profiles, file_path)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}. Raw response: {response}")
+        logger.warning("Failed to profile columns", extra={"file_id": file_id, "error": str(e)})
+        profiles = None
+
+    # Sheets with different header rows are mapped separately, one output item per layout
+    if layouts and len(layouts) > 1:
+        decisions = await asyncio.gather(*(
+            _decide_mapping(file_id, layout["headers"], client_number, None, profiles) for layout in layouts
+        ))
+        items = [item for item, _ in decisions]
+        sources = {source for _, source in decisions}
+        if "local_fallback" in sources:
+            mapping_source = "local_fallback"
+        else:
+            mapping_source = sources.pop() if len(sources) == 1 else "hybrid"
+    else:
+        item, mapping_source = await _decide_mapping(file_id, vendor_headers, client_number, on_field, profiles)
+        items = [item]
+    final_output = OutputModel.model_validate({"items": items})
+    logger.debug("Agent response", extra={"file_id": file_id, "final_output": final_output.dict()})
     
-    return {
+    try:
+        with span("generate_result"):
+            file_name_output = await render_result(final_output.dict(), file_id, _result_format(client_number))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}. Raw response: {final_output}")
+
+    # Index the mapping in Pinecone off the request path
+    pinecone_result = await _queue_pinecone_upsert(final_output.dict(), file_id, client_number)
+
+    result = {
         "file_id": file_name_output,
         "message": "AI suggested mappings generated successfully",
-        "response": response.final_output,
+        "response": final_output,
         "pinecone_saved": pinecone_result.get("success", False),
         "pinecone_id": pinecone_result.get("mapping_id") if pinecone_result.get("success") else None,
-        "pinecone_message": pinecone_result.get("message", "Failed to save to Pinecone")
+        "pinecone_message": pinecone_result.get("message", "Failed to save to Pinecone"),
+        "mapping_source": mapping_source
+    }
+
+    # Remember the mapping artifacts against the stored content; a fallback
+    # mapping is not, so the next request tries the LLM again
+    if mapping_source != "local_fallback":
+        _remember_mapping(file_id, file_path, cache_key, result)
+    audit_log.record(
+        MAPPING_GENERATED, client_number, file_id=file_id,
+        mapping_source=mapping_source, result_file=os.path.basename(file_name_output["file_path"])
+    )
+
+    return result
+
+
+def _remember_mapping(file_id: str, file_path: str, cache_key: str, result: dict) -> None:
+    """
+    Store a mapping response and its result file against the upload's content.
+    """
+    try:
+        response = result["response"]
+        mappings_cache = load_upload_meta(file_path).get("mappings", {})
+        previous = mappings_cache.get(cache_key)
+        result_path = result["file_id"]["file_path"]
+        storage.add_result_ref(result_path, file_path, cache_key)
+        if previous and previous["result_file"] != os.path.basename(result_path):
+            previous_path = storage.resolve(previous["result_file"])
+            if previous_path:
+                storage.release_result_ref(previous_path, file_path, cache_key)
+        mappings_cache[cache_key] = {
+            "response": response if isinstance(response, dict) else response.dict(),
+            "result_file": os.path.basename(result_path),
+            "pinecone_saved": result["pinecone_saved"],
+            "pinecone_id": result["pinecone_id"],
+            "pinecone_message": result["pinecone_message"],
+            "mapping_source": result["mapping_source"]
+        }
+        update_upload_meta(file_path, mappings=mappings_cache)
+    except Exception as e:
+        logger.warning("Failed to cache mapping", extra={"file_id": file_id, "error": str(e)})
+
+
+@router.post("/mapping/ai-suggested/stream")
+async def stream_ai_suggested_mappings(
+    file_id: str,
+    client_number: str = Form(None, description="Client number for the mapping"),
+    output_format: str = Form(None, description="Result file format (csv, xlsx or jsonl); defaults to the client's"),
+    # current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Streaming variant of /mapping/ai-suggested using Server-Sent Events.
+
+    Emits a ``field`` event per JC field as soon as the agent has decided it
+    (a later event for the same field supersedes an earlier one when wide
+    files are mapped in shards), then ``other_fields`` and a final ``result``
+    event carrying the result file ID. Before ``other_fields``, every field
+    whose final mapping differs from the one streamed last is sent again,
+    e.g. when the agent failed mid-stream and the local fallback decided
+    the mapping. Failures end the stream with an ``error`` event.
+    """
+    output_format = _result_format(client_number, output_format)
+    file_path = storage.resolve(file_id)
+    if not file_path:
+        raise HTTPException(status_code=404, detail=f"File not found: {file_id}")
+    cache_key = f"{client_number}:{SCHEMA_VERSION}"
+
+    events: asyncio.Queue = asyncio.Queue()
+    sent: Dict[str, dict] = {}
+
+    def emit_field(jc_field: str, mapping: dict, final: bool = False) -> None:
+        previous = sent.get(jc_field)
+        if previous is not None:
+            if final:
+                # The final mapping wins, whatever its confidence
+                if previous == mapping:
+                    return
+            elif (mapping.get("confidence") or 0.0) <= (previous.get("confidence") or 0.0):
+                # Only report a field again if a later shard found a better candidate
+                return
+        sent[jc_field] = dict(mapping)
+        events.put_nowait(("field", {"jc_field": jc_field, **mapping}))
+
+    async def produce() -> None:
+        try:
+            async with _file_status(file_id):
+                result = await asyncio.to_thread(_cached_mapping_result, file_path, cache_key)
+                shared = False
+                if result is None:
+                    result, shared = await _mapping_flight(file_id, file_path, client_number, cache_key, emit_field)
+                result = await _with_result_format(result, file_id, output_format)
+            response = result["response"]
+            items = (response if isinstance(response, dict) else response.dict())["items"]
+            if len(items) == 1:
+                # Cached and shared results arrive complete; replay their fields,
+                # and correct any streamed field the final mapping changed
+                for jc_field in JC_FIELDS:
+                    emit_field(jc_field, items[0][jc_field], final=True)
+                events.put_nowait(("other_fields", items[0].get("other_fields", [])))
+            else:
+                # Workbooks with several sheet layouts: one mapping per layout, tagged with its index
+                for layout, item in enumerate(items):
+                    for jc_field in JC_FIELDS:
+                        events.put_nowait(("field", {"jc_field": jc_field, "layout": layout, **item[jc_field]}))
+                    events.put_nowait(("other_fields", [
+                        {"layout": layout, **field} for field in item.get("other_fields", [])
+                    ]))
+            payload = result["file_id"]
+            events.put_nowait(("result", {
+                "result_file_id": os.path.basename(payload["file_path"]),
+                "headers": payload["headers"],
+                "total_rows": payload["total_rows"],
+                "total_columns": payload["total_columns"],
+                "pinecone_saved": result["pinecone_saved"],
+                "pinecone_id": result["pinecone_id"],
+                "mapping_source": result["mapping_source"],
+                "cached": result.get("cached", False),
+                "coalesced": shared
+            }))
+        except HTTPException as e:
+            events.put_nowait(("error", {"status_code": e.status_code, "detail": e.detail}))
+        except Exception as e:
+            logger.exception("Streaming mapping failed", extra={"file_id": file_id})
+            events.put_nowait(("error", {"status_code": 500, "detail": str(e)}))
+        finally:
+            events.put_nowait(None)
+
+    async def event_stream() -> AsyncIterator[str]:
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection while the agent works
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield format_sse(*event)
+        finally:
+            if not producer.done():
+                # The client went away; the shared computation carries on for others
+                producer.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _header_set(file_path: str) -> tuple:
+    """
+    Key under which uploads can share a mapping: their header set, or for
+    workbooks with several sheet layouts the header set of each layout.
+    """
+    if file_path.lower().endswith(EXCEL_EXTENSIONS):
+        layouts = sheet_layouts(file_path)
+        if len(layouts) > 1:
+            return tuple(tuple(sorted({header.strip() for header in layout["headers"]})) for layout in layouts)
+    return tuple(sorted({header.strip() for header in read_vendor_headers(file_path)}))
+
+
+def _error_status(error: Exception) -> Tuple[int, str]:
+    if isinstance(error, HTTPException):
+        return error.status_code, str(error.detail)
+    if isinstance(error, ValueError):
+        return 400, str(error)
+    return 500, str(error)
+
+
+@router.post("/mapping/ai-suggested/batch")
+async def generate_ai_suggested_mappings_batch(
+    request: BatchMappingRequest,
+    # current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Map many uploads in one request.
+
+    Files with identical header sets share one mapping: the first file of
+    each set is mapped as by /mapping/ai-suggested and the others only
+    render their result files with that mapping. Up to
+    BATCH_FILE_CONCURRENCY files are processed at once, and LLM calls are
+    further bounded by admission control. Returns the status of every file
+    and the wall time of the batch; result files are fetched via /export.
+    """
+    started = time.perf_counter()
+    file_ids = list(dict.fromkeys(request.file_ids))
+    if not file_ids:
+        raise HTTPException(status_code=400, detail="file_ids must not be empty")
+    if len(file_ids) > settings.BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_MAX_FILES} files per batch")
+    client_number = request.client_number
+    output_format = _result_format(client_number, request.output_format)
+    cache_key = f"{client_number}:{SCHEMA_VERSION}"
+    limiter = asyncio.Semaphore(settings.BATCH_FILE_CONCURRENCY)
+    summaries: Dict[str, dict] = {}
+    processing: List[str] = []
+
+    def finish(file_id: str, file_started: float, status: str, result: Optional[dict] = None, **extra: Any) -> None:
+        entry = {"file_id": file_id, "status": status}
+        if result is not None:
+            payload = result["file_id"]
+            response = result["response"]
+            entry.update({
+                "result_file_id": os.path.basename(payload["file_path"]),
+                "total_rows": payload["total_rows"],
+                "total_columns": payload["total_columns"],
+                "response": response if isinstance(response, dict) else response.dict(),
+                "mapping_source": result["mapping_source"],
+                "pinecone_id": result["pinecone_id"],
+            })
+        entry.update(extra)
+        entry["duration_ms"] = round((time.perf_counter() - file_started) * 1000, 1)
+        summaries[file_id] = entry
+
+    def fail(file_id: str, file_started: float, error: Exception) -> None:
+        status_code, detail = _error_status(error)
+        logger.warning("Batch file failed", extra={"file_id": file_id, "status_code": status_code, "error": detail})
+        finish(file_id, file_started, "error", status_code=status_code, detail=detail)
+
+    async def prepare(file_id: str) -> Optional[tuple]:
+        file_started = time.perf_counter()
+        async with limiter:
+            file_path = storage.resolve(file_id)
+            if not file_path:
+                fail(file_id, file_started, HTTPException(status_code=404, detail=f"File not found: {file_id}"))
+                return None
+            await _set_file_status(file_id, PROCESSING)
+            processing.append(file_id)
+            try:
+                cached = await asyncio.to_thread(_cached_mapping_result, file_path, cache_key)
+                if cached:
+                    finish(file_id, file_started, "cached", await _with_result_format(cached, file_id, output_format))
+                    return None
+                header_set = await asyncio.to_thread(_header_set, file_path)
+            except Exception as e:
+                fail(file_id, file_started, e)
+                return None
+        return file_id, file_path, header_set, file_started
+
+    async def render_shared(member: tuple, leader_result: dict, leader_id: str) -> None:
+        file_id, file_path, _, file_started = member
+        response = leader_result["response"]
+        final_output = response if isinstance(response, dict) else response.dict()
+        try:
+            async with limiter:
+                with span("generate_result"):
+                    payload = await render_result(final_output, file_id, output_format)
+        except Exception as e:
+            fail(file_id, file_started, e)
+            return
+        result = {**leader_result, "file_id": payload, "response": final_output}
+        if result["mapping_source"] != "local_fallback":
+            await asyncio.to_thread(_remember_mapping, file_id, file_path, cache_key, result)
+        finish(file_id, file_started, "shared_mapping", result, shared_with=leader_id)
+
+    async def map_group(members: List[tuple]) -> None:
+        # A file that fails (e.g. an unreadable body) hands the mapping over to the next one
+        pending = list(members)
+        while pending:
+            file_id, file_path, _, file_started = pending.pop(0)
+            try:
+                async with limiter:
+                    result, shared = await _mapping_flight(file_id, file_path, client_number, cache_key)
+                    result = await _with_result_format(result, file_id, output_format)
+            except Exception as e:
+                fail(file_id, file_started, e)
+                continue
+            finish(file_id, file_started, "coalesced" if shared else "mapped", result)
+            await asyncio.gather(*(render_shared(member, result, file_id) for member in pending))
+            return
+
+    try:
+        # Identical header sets need only one mapping
+        groups: Dict[Tuple[str, ...], List[tuple]] = {}
+        for prepared in await asyncio.gather(*(prepare(file_id) for file_id in file_ids)):
+            if prepared:
+                groups.setdefault(prepared[2], []).append(prepared)
+        await asyncio.gather(*(map_group(members) for members in groups.values()))
+    except BaseException:
+        # Cancelled or failed as a whole: nothing stays processing
+        await asyncio.shield(asyncio.gather(*(_set_file_status(file_id, FAILED) for file_id in processing)))
+        raise
+
+    files = [summaries[file_id] for file_id in file_ids]
+    await asyncio.gather(*(
+        _set_file_status(entry["file_id"], FAILED if entry["status"] == "error" else COMPLETED) for entry in files
+    ))
+    failed = sum(1 for entry in files if entry["status"] == "error")
+    wall_time_ms = round((time.perf_counter() - started) * 1000, 1)
+    logger.info("Batch mapping finished", extra={
+        "client_number": client_number, "files": len(files), "failed": failed,
+        "header_sets": len(groups), "wall_time_ms": wall_time_ms
+    })
+    return {
+        "client_number": client_number,
+        "files": files,
+        "total_files": len(files),
+        "succeeded": len(files) - failed,
+        "failed": failed,
+        "distinct_header_sets": len(groups),
+        "wall_time_ms": wall_time_ms
     }
 
 
@@ -345,16 +1580,37 @@ async def save_mappings(
 ) -> Any:
     """
     Save AI or manual mappings.
+
+    The edits are applied on top of the upload's last mapping for the
+    client, and its result file is re-rendered from the column cache, so
+    the upload is parsed only for vendor columns no earlier render kept.
+    The result file itself is always rewritten in full, since CSV and XLSX
+    cannot have single columns replaced.
     """
     try:
-        file_uuid = uuid.UUID(file_id)
         mappings_data = json.loads(mappings)
     except (ValueError, json.JSONDecodeError) as e:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid data format: {str(e)}"
         )
+    # Uploads are addressed by their alias (jc_07.csv), rows by a UUID
+    file_uuid = find_file_uuid(db, file_id)
+    if file_uuid is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown file: {file_id}"
+        )
     
+    # Create a simplified AI response format for manual mappings
+    manual_mapping_data = {
+        "items": [{
+            "mapping_type": "manual",
+            "mappings": mappings_data
+        }]
+    }
+    manual_client_number = mappings_data[0].get("client_number") if mappings_data else None
+
     saved_mappings = []
     for mapping_data in mappings_data:
         mapping = Mapping(
@@ -367,40 +1623,67 @@ async def save_mappings(
         )
         db.add(mapping)
         saved_mappings.append(mapping)
-    
+
+    # The vector write commits with the mapping rows and is indexed by the outbox dispatcher
+    pinecone_id = enqueue_pinecone_upsert(db, manual_mapping_data, file_id, manual_client_number)
     db.commit()
-    
-    # Optionally save to Pinecone as well
-    pinecone_result = None
-    try:
-        # Create a simplified AI response format for manual mappings
-        manual_mapping_data = {
-            "items": [{
-                "mapping_type": "manual",
-                "mappings": mappings_data
-            }]
-        }
-        
-        pinecone_result = upsert_mapping_data_to_pinecone(
-            ai_response=manual_mapping_data,
-            file_id=file_id,
-            client_number=mappings_data[0].get("client_number") if mappings_data else None
-        )
-        print("Pinecone upsert result for manual mappings:", pinecone_result)
-    except Exception as e:
-        print(f"Warning: Failed to save manual mappings to Pinecone: {e}")
-        pinecone_result = {"success": False, "error": str(e)}
+    outbox_dispatcher.wake()
+    audit_log.record(MAPPING_SAVED, manual_client_number, file_id=file_id, saved_count=len(saved_mappings))
+
+    result = await _rerender_saved_mapping(file_id, manual_client_number, mappings_data, pinecone_id)
     
     return {
         "file_id": file_id,
         "saved_count": len(saved_mappings),
         "message": "Mappings saved successfully",
-        "pinecone_saved": pinecone_result.get("success", False) if pinecone_result else False,
-        "pinecone_id": pinecone_result.get("mapping_id") if pinecone_result and pinecone_result.get("success") else None,
-        "pinecone_message": pinecone_result.get("message", "Failed to save to Pinecone") if pinecone_result else "Not attempted"
+        "pinecone_saved": True,
+        "pinecone_id": pinecone_id,
+        "pinecone_message": "Mapping data queued for indexing in Pinecone",
+        "result": result
     }
 
 
+async def _rerender_saved_mapping(
+    file_id: str,
+    client_number: Optional[str],
+    edits: List[dict],
+    pinecone_id: str,
+) -> Optional[dict]:
+    """
+    Apply saved edits to the cached mapping of an upload and re-render its result.
+
+    Uploads without a cached mapping for the client have nothing to
+    re-render. Failures are logged and leave the earlier result in place.
+    """
+    file_path = storage.resolve(file_id)
+    if not file_path:
+        return None
+    cache_key = f"{client_number}:{SCHEMA_VERSION}"
+    cached = load_upload_meta(file_path).get("mappings", {}).get(cache_key)
+    if not cached:
+        return None
+    previous_output = cached["response"]
+    final_output = apply_mapping_edits(previous_output, edits)
+    # The edited result keeps the format of the one it replaces
+    output_format = next(
+        (name for name, extension in RESULT_FORMATS.items() if cached["result_file"].endswith(extension)), None
+    )
+    try:
+        summary = await run_in_process(rerender_result, previous_output, final_output, file_id, output_format)
+    except Exception as e:
+        logger.warning("Failed to re-render edited mapping", extra={"file_id": file_id, "error": str(e)})
+        return None
+    _remember_mapping(file_id, file_path, cache_key, {
+        "response": final_output,
+        "file_id": {"file_path": summary["file_path"]},
+        "pinecone_saved": True,
+        "pinecone_id": pinecone_id,
+        "pinecone_message": "Mapping data queued for indexing in Pinecone",
+        "mapping_source": "manual",
+    })
+    return summary
+
+
 @router.delete("/mapping/{client_number}")
 def delete_mappings(
     client_number: str,
@@ -415,6 +1698,7 @@ def delete_mappings(
     ).delete()
     
     db.commit()
+    audit_log.record(MAPPING_DELETED, client_number, deleted_count=deleted_count)
     
     return {
         "client_number": client_number,
@@ -468,7 +1752,7 @@ async def configure_products(
 # ============================================================================
 
 @router.get("/mapping/search")
-def search_mappings_in_pinecone(
+async def search_mappings_in_pinecone(
     query: str = Query(..., description="Search query for mapping data"),
     top_k: int = Query(5, ge=1, le=20, description="Number of results to return"),
     client_number: str = Query(None, description="Filter by client number")
@@ -477,7 +1761,9 @@ def search_mappings_in_pinecone(
     Search for mapping data in Pinecone index.
     """
     try:
-        search_result = search_mapping_data(
+        search_result = await embedding_admission.run(
+            client_number,
+            search_mapping_data,
             query_text=query,
             top_k=top_k,
             client_number=client_number
@@ -497,6 +1783,10 @@ def search_mappings_in_pinecone(
                 detail=f"Search failed: {search_result.get('error', 'Unknown error')}"
             )
             
+    except HTTPException:
+        raise
+    except AdmissionTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Form, Query
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from typing import Any, List
-from datetime import datetime
+from typing import Any, List, Optional, Tuple
+import json
 
+from backend.core.audit import LOGIN, LOGIN_FAILED, audit_log
 from backend.core.database import get_db
 from backend.core.config import settings
 # from backend.dependencies.auth import get_current_active_user, get_current_active_superuser
+from backend.models.audit import AuditEvent
 from backend.models.user import User
 from backend.schemas.user import User as UserSchema, UserCreate, UserUpdate
 from backend.schemas.token import Token
+from backend.utils.pagination import encode_cursor, older_than
 from backend.utils.security import create_access_token, get_password_hash, verify_password
 
 router = APIRouter()
@@ -27,6 +30,7 @@ def login_access_token(
     """
     user = db.query(User).filter(User.email == form_data.username).first()
     if not user or not verify_password(form_data.password, user.hashed_password):
+        audit_log.record(LOGIN_FAILED, user_id=user.id if user else None, username=form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -38,6 +42,7 @@ def login_access_token(
         )
     
     access_token_expires = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    audit_log.record(LOGIN, user_id=user.id, username=form_data.username)
     return {
         "access_token": create_access_token(
             user.id, expires_delta=access_token_expires
@@ -158,40 +163,77 @@ def read_user_by_id(
 # AUDIT ENDPOINTS
 # ============================================================================
 
+@router.get("/audit/users/{user_id}")
+def get_user_audit_trail(
+    user_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    action: Optional[str] = Query(None, description="Only events of this action"),
+    # current_user: User = Depends(get_current_active_superuser),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    Retrieve the audit trail of a user, newest first.
+
+    Logins and failed logins belong to no client and are only listed here.
+    Failed logins for an unknown email have no user; their details keep the
+    username that was tried. Pages are read by keyset on
+    (user_id, created_at, id), as for client trails.
+    """
+    events, next_cursor = _audit_page(db, AuditEvent.user_id == user_id, limit, cursor, action)
+    return {"user_id": user_id, "audit_logs": events, "next_cursor": next_cursor}
+
+
 @router.get("/audit/{client_number}")
 def get_audit_trail(
     client_number: str,
     limit: int = Query(10, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    action: Optional[str] = Query(None, description="Only events of this action"),
     # current_user: User = Depends(get_current_active_superuser),
     db: Session = Depends(get_db)
 ) -> Any:
     """
-    Retrieve audit trail for mapping activities.
+    Retrieve the audit trail of a client, newest first.
+
+    Pages are read by keyset on (client_number, created_at, id): pass the
+    next_cursor of a page to get the following one. Events appear once the
+    audit log has flushed them, a fraction of a second after the action.
     """
-    # TODO: Implement audit trail logic
-    # This is a placeholder implementation
-    
-    mock_audit_logs = [
-        {
-            "action": "file_upload",
-            "timestamp": datetime.now().isoformat(),
-            "user_id": 1, #current_user.id
-            "details": f"Uploaded file for client {client_number}"
-        },
+    events, next_cursor = _audit_page(db, AuditEvent.client_number == client_number, limit, cursor, action)
+    return {"client_number": client_number, "audit_logs": events, "next_cursor": next_cursor}
+
+
+def _audit_page(
+    db: Session,
+    owner: Any,
+    limit: int,
+    cursor: Optional[str],
+    action: Optional[str],
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of the audit events matching owner, newest first, and the cursor of the next page.
+    """
+    try:
+        after_cursor = older_than(AuditEvent.created_at, AuditEvent.id, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    query = db.query(AuditEvent).filter(owner, after_cursor)
+    if action:
+        query = query.filter(AuditEvent.action == action)
+    events = query.order_by(AuditEvent.created_at.desc(), AuditEvent.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(events[limit - 1].created_at, events[limit - 1].id) if len(events) > limit else None
+    return [
         {
-            "action": "mapping_saved",
-            "timestamp": datetime.now().isoformat(),
-            "user_id": 1, #current_user.id
-            "details": f"Saved mappings for client {client_number}"
+            "action": event.action,
+            "timestamp": event.created_at.isoformat(),
+            "client_number": event.client_number,
+            "user_id": event.user_id,
+            "file_id": event.file_id,
+            "details": json.loads(event.details) if event.details else {}
         }
-    ]
-    
-    return {
-        "client_number": client_number,
-        "audit_logs": mock_audit_logs[offset:offset+limit],
-        "total": len(mock_audit_logs)
-    }
+        for event in events[:limit]
+    ], next_cursor
 
 # ============================================================================
 # UTILITY FUNCTIONS
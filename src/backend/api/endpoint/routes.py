@@ -11,8 +11,11 @@ from pydantic import BaseModel
 import json
 
 
+from backend.core.audit import EXPORT, audit_log
 from backend.core.database import get_db
 from backend.core.config import settings
+from backend.utils.readers import read_vendor_headers
+from backend.utils.storage import storage
 # from backend.dependencies.auth import get_current_active_user, get_current_active_superuser
 
 # from agents import Agent
@@ -45,6 +48,7 @@ router.include_router(mapping_router, tags=["mapping"])
 @router.get("/export/final.csv")
 async def export_final_csv(
     file_id: str = Query(...),
+    client_number: Optional[str] = Query(None, description="Client the export is audited for"),
     # current_user: User = Depends(get_current_active_superuser),
     db: Session = Depends(get_db)
 ) -> Any:
@@ -52,7 +56,10 @@ async def export_final_csv(
     Preview and download JC-compliant output files.
     """
 
-    file_to_return = os.path.join("uploads", file_id)
+    file_to_return = storage.resolve(file_id)
+    if not file_to_return:
+        raise HTTPException(status_code=404, detail=f"File not found: {file_id}")
+    audit_log.record(EXPORT, client_number, file_id=file_id)
 
     return FileResponse(
         path=file_to_return,
@@ -70,13 +77,24 @@ async def export_final_csv(
 @router.get("/file/headers")
 def get_xls_headers(filename: str):
     """
-    Read an .xls file from the uploads folder and return all headers.
+    Read a vendor file from the uploads folder and return all headers.
     """
-    file_path = os.path.join("uploads", filename)
+    file_path = storage.resolve(filename)
+    if not file_path:
+        raise HTTPException(status_code=404, detail=f"File not found: {filename}")
     try:
-        df = pd.read_excel(file_path)
-        headers = list(df.columns)
+        headers = read_vendor_headers(file_path)
         return {"headers": headers}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading file: {str(e)}")
-    
\ No newline at end of file
+
+
+@router.get("/storage/usage")
+def get_storage_usage():
+    """
+    Disk usage per artifact kind (raw uploads, results, caches) from the last GC sweep.
+    """
+    return {
+        "usage": storage.disk_usage(),
+        "ttl_seconds": storage.ttls
+    }
@@ -1,17 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
 from sqlalchemy.orm import Session
-from typing import Any
+from typing import Any, Optional
+import asyncio
 import uuid
 import os
 import json
 
-from backend.core.database import get_db
+from backend.core.audit import FILE_UPLOAD, audit_log
+from backend.core.database import engine, get_db
+from backend.core.files import FILE_STATUSES, UPLOADED, client_file_counts, record_upload, recorded_file_count
+from backend.core.log import get_logger
+from backend.core.metrics import BYTES_PROCESSED
 from backend.models.file import File as FileModel
+from backend.utils.pagination import encode_cursor, older_than
+from backend.utils.readers import DELIMITED_EXTENSIONS, get_dialect
+from backend.utils.storage import storage
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 # Counter file to track the next ID
 COUNTER_FILE = "file_counter.json"
+# Taken file IDs skipped at most per upload
+FILE_ID_ATTEMPTS = 100
 
 def get_next_file_id() -> str:
     """
@@ -37,12 +48,55 @@ def get_next_file_id() -> str:
         return f"jc_{next_count:02d}"
         
     except Exception as e:
-        print(f"Error managing file counter: {e}")
+        logger.error("Error managing file counter", extra={"error": str(e)})
         # Fallback to timestamp-based ID if counter fails
         import time
         timestamp = int(time.time())
         return f"jc_{timestamp}"
 
+
+def _advance_file_counter(count: int) -> None:
+    """
+    Move the counter up to count when it fell behind the recorded uploads.
+    """
+    try:
+        with open(COUNTER_FILE, 'r') as f:
+            current_count = json.load(f).get('count', 0)
+    except (OSError, ValueError):
+        current_count = 0
+    if current_count < count:
+        with open(COUNTER_FILE, 'w') as f:
+            json.dump({'count': count}, f)
+
+
+def claim_file_id(
+    extension: str,
+    client_number: str,
+    filename: str,
+    file_path: str,
+    file_size: Optional[int],
+    file_type: str,
+) -> str:
+    """
+    Record an upload under the next free sequential file ID (jc_XX plus extension).
+
+    The counter file only proposes IDs: it is not shared between processes
+    and starts over when the disk is replaced. The unique alias of the file
+    row decides which upload gets an ID, and IDs of uploads stored before
+    rows were kept are skipped. After a collision the counter catches up
+    with the number of recorded uploads.
+    """
+    for _ in range(FILE_ID_ATTEMPTS):
+        file_id = f"{get_next_file_id()}{extension}"
+        if storage.get_alias(file_id) is None and record_upload(
+            file_id, client_number, filename, file_path, file_size, file_type
+        ):
+            return file_id
+        with engine.connect() as connection:
+            _advance_file_counter(recorded_file_count(connection))
+    raise RuntimeError(f"No free file ID after {FILE_ID_ATTEMPTS} attempts")
+
+
 @router.post("/upload")
 async def upload_file(
     file: UploadFile = File(...),
@@ -53,17 +107,14 @@ async def upload_file(
     """
     Upload vendor files (CSV, XLS, JSON, TSV, TXT) with client number.
     """
-    print("\nfile_id1: ------------------------------\n")
     # Validate file type
     allowed_extensions = {'.csv', '.xls', '.xlsx', '.json', '.tsv', '.txt'}
     file_extension = os.path.splitext(file.filename)[1].lower()
-    print("\nfile_id:2 ------------------------------\n")
     if file_extension not in allowed_extensions:
         raise HTTPException(
             status_code=400,
             detail=f"File type {file_extension} not supported. Allowed: {allowed_extensions}"
         )
-    print("\nfile_id3: ------------------------------\n")
     # Validate file size (50MB limit)
     if file.size and file.size > 50 * 1024 * 1024:
         raise HTTPException(
@@ -71,50 +122,99 @@ async def upload_file(
             detail="File size exceeds 50MB limit"
         )
 
-    # Create upload directory if it doesn't exist
-    upload_dir = "uploads"
-    os.makedirs(upload_dir, exist_ok=True)
-    print("\nfile_id4: ------------------------------\n")
-    
-    # Generate sequential file ID
-    file_id = get_next_file_id()
     file_extension = os.path.splitext(file.filename)[1]
-    safe_filename = f"{file_id}{file_extension}"
-    file_path = os.path.join(upload_dir, safe_filename)
-    file_id_with_extension = f"{file_id}{file_extension}"
-    print("\nfile_id15: ------------------------------\n")
-    # Save file
+    # Save file by content hash; identical re-uploads reuse the stored object
     try:
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        stored = await storage.save_upload(file, file_extension)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to save file: {str(e)}"
         )
-    print("\nfile_id6: ------------------------------\n")
-
-    # Create file record in database
-    # file_record = FileModel(
-    #     file_id=file_id,  # Use the new sequential ID
-    #     client_number=client_number,
-    #     filename=file.filename,
-    #     file_path=file_path,
-    #     file_size=str(file.size) if file.size else None,
-    #     file_type=file_extension[1:].upper(),
-    #     status="uploaded"
-    # )
-
-    # db.add(file_record)
-    # db.commit()
-    # db.refresh(file_record)
-
-    print("file_id7: ", file_id)
+    file_path = stored["object_path"]
+    BYTES_PROCESSED.labels("upload").inc(stored["size"])
+
+    # Create file record in database under a free sequential file ID; the
+    # mapping pipeline moves it through its statuses
+    try:
+        file_id_with_extension = await asyncio.to_thread(
+            claim_file_id, file_extension, client_number, file.filename, file_path,
+            stored["size"], file_extension[1:].upper()
+        )
+        storage.add_alias(file_id_with_extension, stored["content_hash"], file_extension)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to record file: {str(e)}"
+        )
+    logger.info("File stored", extra={"file_id": file_id_with_extension, "client_number": client_number, **stored})
+    audit_log.record(
+        FILE_UPLOAD, client_number, file_id=file_id_with_extension,
+        filename=file.filename, size=stored["size"], deduplicated=stored["deduplicated"]
+    )
+
+    # Sniff delimited files once so every later read parses them in a single pass
+    if file_extension.lower() in DELIMITED_EXTENSIONS:
+        try:
+            dialect = get_dialect(file_path)
+            logger.debug("Sniffed dialect", extra={"file_id": file_id_with_extension, "dialect": dialect})
+        except Exception as e:
+            logger.warning("Failed to sniff upload", extra={"file_id": file_id_with_extension, "error": str(e)})
+
     return {
         "file_id": file_id_with_extension,
         "filename": file.filename,
         "client_number": client_number,
-        "status": "uploaded",
+        "content_hash": stored["content_hash"],
+        "deduplicated": stored["deduplicated"],
+        "status": UPLOADED,
         "message": "File uploaded successfully"
     }
+
+
+@router.get("/files/{client_number}")
+def list_client_files(
+    client_number: str,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    status: Optional[str] = Query(None, description="Only files in this status"),
+    # current_user: User = Depends(get_current_active_superuser),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    List a client's uploads, newest first.
+
+    Pages are read by keyset on (client_number, uploaded_at, file_id): pass
+    the next_cursor of a page to get the following one. Counts per status
+    come from the maintained file_counts table, not from counting rows.
+    """
+    if status is not None and status not in FILE_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unknown status: {status}. Allowed: {list(FILE_STATUSES)}")
+    try:
+        after_cursor = older_than(FileModel.uploaded_at, FileModel.file_id, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    query = db.query(FileModel).filter(FileModel.client_number == client_number, after_cursor)
+    if status:
+        query = query.filter(FileModel.status == status)
+    files = query.order_by(FileModel.uploaded_at.desc(), FileModel.file_id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(files[limit - 1].uploaded_at, files[limit - 1].file_id) if len(files) > limit else None
+    counts = client_file_counts(db, client_number)
+
+    return {
+        "client_number": client_number,
+        "files": [
+            {
+                "file_id": record.alias or str(record.file_id),
+                "filename": record.filename,
+                "file_type": record.file_type,
+                "file_size": int(record.file_size) if record.file_size else None,
+                "status": record.status,
+                "uploaded_at": record.uploaded_at.isoformat() if record.uploaded_at else None,
+                "processed_at": record.processed_at.isoformat() if record.processed_at else None
+            }
+            for record in files[:limit]
+        ],
+        "next_cursor": next_cursor,
+        "counts": {"total": sum(counts.values()), "by_status": counts}
+    }
@@ -0,0 +1,360 @@
+import asyncio
+import inspect
+import re
+import time
+from collections import OrderedDict, deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Deque, Dict, Mapping, Optional
+
+from backend.core.config import settings
+from backend.core.log import get_logger
+from backend.core.metrics import Counter, Gauge, Histogram, registry
+
+logger = get_logger(__name__)
+
+# Fallback pause after a 429 without usable headers, and the longest pause honored
+DEFAULT_RATE_LIMIT_PAUSE = 1.0
+MAX_RATE_LIMIT_PAUSE = 60.0
+
+ANONYMOUS_CLIENT = "anonymous"
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+ADMISSION_WAIT = registry.register(Histogram(
+    "admission_wait_seconds", "Time spent queued for an LLM or embedding slot", ("pool",)
+))
+RATE_LIMITED = registry.register(Counter(
+    "provider_rate_limited_total", "Provider 429 responses by pool", ("pool",)
+))
+REJECTED = registry.register(Counter(
+    "admission_rejected_total", "Calls that gave up waiting for a slot", ("pool",)
+))
+
+
+class AdmissionTimeout(Exception):
+    """Raised when a call waited longer than the pool's max_wait for a slot."""
+
+    def __init__(self, pool: str, waited: float):
+        super().__init__(f"No {pool} capacity available after {waited:.1f}s")
+        self.pool = pool
+        self.retry_after = max(1, int(waited))
+
+
+class RateLimitExhausted(AdmissionTimeout):
+    """Raised when the provider kept answering 429 through every retry."""
+
+    def __init__(self, pool: str, delay: float):
+        Exception.__init__(self, f"{pool} provider is rate limiting; retry in {delay:.1f}s")
+        self.pool = pool
+        self.retry_after = max(1, int(delay + 0.999))
+
+
+# ============================================================================
+# RATE-LIMIT HEADERS
+# ============================================================================
+
+def _parse_duration(value: str) -> Optional[float]:
+    """
+    Parse OpenAI reset durations ("1s", "6m0s", "250ms") or plain seconds.
+    """
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def rate_limit_delay(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Seconds to hold off according to provider rate-limit headers, if they ask for it.
+
+    Honors retry-after-ms, retry-after (seconds or HTTP date) and, when the
+    remaining request/token budget is exhausted, x-ratelimit-reset-*.
+    """
+    headers = {key.lower(): value for key, value in headers.items()}
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if "retry-after" in headers:
+        delay = _parse_duration(headers["retry-after"])
+        if delay is None:
+            try:
+                delay = parsedate_to_datetime(headers["retry-after"]).timestamp() - time.time()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return max(0.0, delay)
+    delays = []
+    for kind in ("requests", "tokens"):
+        remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+        reset = headers.get(f"x-ratelimit-reset-{kind}")
+        if remaining is not None and reset is not None and remaining.strip() == "0":
+            delay = _parse_duration(reset)
+            if delay is not None:
+                delays.append(delay)
+    return max(delays) if delays else None
+
+
+def _error_rate_limit_delay(error: BaseException) -> Optional[float]:
+    """
+    Pause requested by a provider error, or None if it is not a rate-limit error.
+    """
+    response = getattr(error, "response", None)
+    status_code = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status_code != 429:
+        return None
+    headers = getattr(response, "headers", None) or {}
+    delay = rate_limit_delay(headers)
+    return DEFAULT_RATE_LIMIT_PAUSE if delay is None else delay
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Whether a provider error is a rate-limit response, which callers running
+    under AdmissionController.run should let propagate rather than handle.
+    """
+    return _error_rate_limit_delay(error) is not None
+
+
+# ============================================================================
+# ADMISSION CONTROL
+# ============================================================================
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now: float) -> bool:
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return max(0.0, (1 - self.tokens) / self.rate) if self.rate else float("inf")
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class AdmissionController:
+    """
+    Global concurrency limit plus a per-client token bucket with fair queuing.
+
+    Waiting calls are queued per client and slots are handed out round-robin
+    across clients, so one client submitting thirty files only ever competes
+    with others for its turn. A client whose bucket is empty is skipped until
+    it refills. When the provider answers 429, the whole pool pauses for as
+    long as its rate-limit headers ask.
+
+    Usage:
+        result = await llm_admission.run(client_number, Runner.run, agent, prompt)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        rate_per_minute: float,
+        burst: int,
+        max_wait: float,
+        retries: int = 2,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_wait = max_wait
+        self.retries = retries
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._wait_histogram = ADMISSION_WAIT.labels(name)
+
+    # ------------------------------------------------------------------
+    # Queue
+    # ------------------------------------------------------------------
+
+    def queue_depth(self) -> int:
+        return sum(1 for queue in self._queues.values() for waiter in queue if not waiter.done())
+
+    def _bucket(self, client: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            if len(self._buckets) > 10_000:
+                # Forget idle clients; a full bucket carries no state
+                self._buckets = {key: value for key, value in self._buckets.items() if not value.is_full(now)}
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst, now)
+        return bucket
+
+    def _schedule(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        when = loop.time() + delay
+        if self._timer is not None and not self._timer.cancelled() and self._timer.when() <= when:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_at(when, self._dispatch)
+
+    def _dispatch(self) -> None:
+        """
+        Hand free slots to queued calls, one client at a time in round-robin order.
+        """
+        self._timer = None
+        now = time.monotonic()
+        if now < self.paused_until:
+            self._schedule(self.paused_until - now)
+            return
+        next_refill = None
+        while self.in_flight < self.max_concurrency and self._queues:
+            granted = False
+            for client in list(self._queues):
+                queue = self._queues[client]
+                while queue and queue[0].done():
+                    queue.popleft()
+                if not queue:
+                    del self._queues[client]
+                    continue
+                bucket = self._bucket(client, now) if self.rate > 0 else None
+                if bucket is not None and not bucket.try_take(now):
+                    wait = bucket.wait_time(now)
+                    next_refill = wait if next_refill is None else min(next_refill, wait)
+                    continue
+                queue.popleft().set_result(None)
+                self.in_flight += 1
+                if queue:
+                    self._queues.move_to_end(client)
+                else:
+                    del self._queues[client]
+                granted = True
+                break
+            if not granted:
+                break
+        if next_refill is not None and self._queues and self.in_flight < self.max_concurrency:
+            self._schedule(next_refill)
+
+    async def acquire(self, client: Optional[str]) -> None:
+        """
+        Wait for a slot; raises AdmissionTimeout after max_wait seconds.
+        """
+        client = client or ANONYMOUS_CLIENT
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(client, deque()).append(waiter)
+        start = time.monotonic()
+        self._dispatch()
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we gave up
+                self.release()
+            if isinstance(e, asyncio.TimeoutError):
+                REJECTED.labels(self.name).inc()
+                raise AdmissionTimeout(self.name, time.monotonic() - start)
+            raise
+        finally:
+            self._wait_histogram.observe(time.monotonic() - start)
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    def pause(self, seconds: float) -> None:
+        """
+        Stop admitting calls for the given time (e.g. after a provider 429).
+        """
+        seconds = min(seconds, MAX_RATE_LIMIT_PAUSE)
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def observe_error(self, error: BaseException) -> Optional[float]:
+        """
+        Pause the pool if the error is a provider rate-limit response.
+
+        Returns:
+            The pause in seconds, or None if the error was not a rate limit
+        """
+        delay = _error_rate_limit_delay(error)
+        if delay is not None:
+            RATE_LIMITED.labels(self.name).inc()
+            self.pause(delay)
+            logger.warning("Provider rate limit hit", extra={"pool": self.name, "pause_seconds": delay})
+        return delay
+
+    # ------------------------------------------------------------------
+    # Calls
+    # ------------------------------------------------------------------
+
+    async def run(self, client: Optional[str], func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run func under admission control, retrying after rate-limit responses.
+
+        Coroutine functions are awaited; plain functions run in a worker thread
+        so blocking SDK calls do not stall the event loop. Raises
+        AdmissionTimeout (or RateLimitExhausted) when no capacity was found.
+        """
+        for attempt in range(self.retries + 1):
+            await self.acquire(client)
+            try:
+                if inspect.iscoroutinefunction(func):
+                    return await func(*args, **kwargs)
+                return await asyncio.to_thread(func, *args, **kwargs)
+            except Exception as e:
+                delay = self.observe_error(e)
+                if delay is None:
+                    raise
+                if attempt == self.retries:
+                    raise RateLimitExhausted(self.name, delay) from e
+            finally:
+                self.release()
+
+
+llm_admission = AdmissionController(
+    "llm",
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    rate_per_minute=settings.LLM_CLIENT_RATE_PER_MINUTE,
+    burst=settings.LLM_CLIENT_BURST,
+    max_wait=settings.ADMISSION_MAX_WAIT_SECONDS,
+)
+embedding_admission = AdmissionController(
+    "embedding",
+    max_concurrency=settings.EMBEDDING_MAX_CONCURRENCY,
+    rate_per_minute=settings.EMBEDDING_CLIENT_RATE_PER_MINUTE,
+    burst=settings.EMBEDDING_CLIENT_BURST,
+    max_wait=settings.ADMISSION_MAX_WAIT_SECONDS,
+)
+
+_POOLS = (llm_admission, embedding_admission)
+
+registry.register(Gauge(
+    "admission_queue_depth", "Calls waiting for an LLM or embedding slot", ("pool",),
+    callback=lambda: {(pool.name, ): pool.queue_depth() for pool in _POOLS}
+))
+registry.register(Gauge(
+    "admission_in_flight", "LLM or embedding calls currently admitted", ("pool",),
+    callback=lambda: {(pool.name, ): pool.in_flight for pool in _POOLS}
+))
+registry.register(Gauge(
+    "admission_queued_clients", "Clients with at least one queued call", ("pool",),
+    callback=lambda: {(pool.name, ): len(pool._queues) for pool in _POOLS}
+))
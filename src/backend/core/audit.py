@@ -0,0 +1,150 @@
+import asyncio
+import json
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Optional
+
+from sqlalchemy import insert
+
+from backend.core.config import settings
+from backend.core.database import engine
+from backend.core.log import get_logger
+from backend.core.metrics import Counter, Gauge, registry
+from backend.models.audit import AuditEvent
+
+logger = get_logger(__name__)
+
+# Audited actions
+FILE_UPLOAD = "file_upload"
+MAPPING_GENERATED = "mapping_generated"
+MAPPING_SAVED = "mapping_saved"
+MAPPING_DELETED = "mapping_deleted"
+EXPORT = "export"
+LOGIN = "login"
+LOGIN_FAILED = "login_failed"
+
+EVENTS = registry.register(Counter(
+    "audit_events_total", "Audit events by outcome (queued, written, dropped)", ("result",)
+))
+QUEUED = registry.register(Gauge("audit_queue_depth", "Audit events waiting to be written"))
+
+_events = AuditEvent.__table__
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class AuditLog:
+    """
+    Buffer audit events in memory and write them to the audit table in batches.
+
+    record() only appends to a queue, so auditing adds no database round
+    trip to the request that performs the action; it may be called from the
+    event loop and from worker threads alike. The writer flushes the queue
+    every interval_ms, and sooner once batch_size events are waiting, with
+    one multi-row insert per batch. A batch that fails to insert goes back
+    to the front of the queue and is retried on the next flush. Beyond
+    max_queued waiting events (the database being down for long), new
+    events are dropped and counted rather than growing memory without bound.
+
+    Events are visible to queries once flushed, at most about one interval
+    after they were recorded.
+    """
+
+    def __init__(self, interval_ms: float = 200, batch_size: int = 500, max_queued: int = 100_000):
+        self.interval = interval_ms / 1000
+        self.batch_size = batch_size
+        self.max_queued = max_queued
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def record(
+        self,
+        action: str,
+        client_number: Optional[str] = None,
+        *,
+        file_id: Optional[str] = None,
+        user_id: Optional[int] = None,
+        **details: Any,
+    ) -> None:
+        """
+        Queue an audit event; details are stored as a JSON object.
+        """
+        event = {
+            "client_number": client_number[:50] if client_number else None,
+            "action": action,
+            "user_id": user_id,
+            "file_id": file_id[:255] if file_id else None,
+            "details": json.dumps(details, default=str) if details else None,
+            "created_at": _utcnow(),
+        }
+        with self._lock:
+            if len(self._queue) >= self.max_queued:
+                EVENTS.labels("dropped").inc()
+                return
+            self._queue.append(event)
+            full = len(self._queue) >= self.batch_size
+        EVENTS.labels("queued").inc()
+        if full:
+            self._wake()
+
+    def _wake(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # The loop has closed; the final flush picks the events up
+                pass
+
+    def flush(self) -> int:
+        """
+        Write every queued event, batch_size rows per insert.
+
+        Returns:
+            The number of events written
+        """
+        written = 0
+        while True:
+            with self._lock:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            if not batch:
+                break
+            try:
+                with engine.begin() as connection:
+                    connection.execute(insert(_events), batch)
+            except Exception:
+                with self._lock:
+                    self._queue.extendleft(reversed(batch))
+                raise
+            written += len(batch)
+            EVENTS.labels("written").inc(len(batch))
+        QUEUED.set(len(self._queue))
+        return written
+
+    async def run(self) -> None:
+        """
+        Flush forever: every interval, or as soon as a full batch is waiting.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.warning("Audit flush failed", extra={"queued": len(self._queue), "error": str(e)})
+
+
+audit_log = AuditLog(
+    interval_ms=settings.AUDIT_FLUSH_INTERVAL_MS,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    max_queued=settings.AUDIT_MAX_QUEUED,
+)
@@ -25,6 +25,13 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Storage (TTLs in hours, 0 keeps artifacts forever)
+    UPLOAD_DIR: str = "uploads"
+    STORAGE_RAW_TTL_HOURS: float = 24 * 30
+    STORAGE_RESULT_TTL_HOURS: float = 24 * 7
+    STORAGE_CACHE_TTL_HOURS: float = 24 * 3
+    STORAGE_GC_INTERVAL_SECONDS: int = 3600
+    
     # Database
     DATABASE_URL: str = "sqlite:///./app.db"
     
@@ -38,6 +45,81 @@ class Settings(BaseSettings):
     "https://*.railway.app"  # Allow Railway domains too
 ]
     
+    # Logging and tracing
+    LOG_LEVEL: str = "INFO"
+    # Requests slower than this log their full span tree
+    TRACE_SLOW_REQUEST_MS: float = 5000
+    # Fraction of other requests whose span tree is logged anyway
+    TRACE_SAMPLE_RATE: float = 0.0
+    
+    # Admission control for LLM and embedding calls: global concurrency plus a
+    # per-client rate (0 disables it) with a burst allowance
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_CLIENT_RATE_PER_MINUTE: float = 20
+    LLM_CLIENT_BURST: int = 4
+    EMBEDDING_MAX_CONCURRENCY: int = 16
+    EMBEDDING_CLIENT_RATE_PER_MINUTE: float = 120
+    EMBEDDING_CLIENT_BURST: int = 20
+    # Calls queued longer than this are rejected with 503
+    ADMISSION_MAX_WAIT_SECONDS: float = 120
+    
+    # Files with more headers than the threshold are mapped in concurrent shards
+    MAPPING_SHARD_SIZE: int = 80
+    MAPPING_SHARD_THRESHOLD: int = 120
+    
+    # Headers the local matcher scores at least this high skip the LLM
+    MATCHER_ACCEPT_CONFIDENCE: float = 0.9
+    # Answer with the local matcher's mapping when the LLM call fails
+    MATCHER_FALLBACK_ON_LLM_ERROR: bool = True
+    
+    # Batch mapping: most files per request and files processed at once
+    BATCH_MAX_FILES: int = 100
+    BATCH_FILE_CONCURRENCY: int = 8
+    
+    # Duplicate mapping requests wait at most this long for the worker holding the lease
+    SINGLE_FLIGHT_LEASE_SECONDS: float = 600
+    
+    # Pinecone outbox dispatching
+    OUTBOX_BATCH_SIZE: int = 32
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 5
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_BACKOFF_SECONDS: float = 2
+    OUTBOX_MAX_BACKOFF_SECONDS: float = 600
+    # Claimed rows become due again after this long if their worker died
+    OUTBOX_CLAIM_SECONDS: float = 300
+    
+    # Audit events are written in batches every interval, or once a batch is full;
+    # events beyond AUDIT_MAX_QUEUED waiting ones are dropped
+    AUDIT_FLUSH_INTERVAL_MS: float = 200
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_MAX_QUEUED: int = 100_000
+    
+    # Worker processes for CPU-bound parsing and rendering (0 uses one per available CPU, up to WORKER_PROCESSES_MAX)
+    WORKER_PROCESSES: int = 0
+    # Cap on the default pool size; every API process has its own pool of pandas-importing workers
+    WORKER_PROCESSES_MAX: int = 4
+    # Delimited uploads are rendered in row partitions of about this many bytes, one per worker at most
+    RENDER_PARTITION_BYTES: int = 16 * 1024 * 1024
+    # Vendor text columns with at most this many distinct values per value are read as categoricals
+    READ_CATEGORY_MAX_RATIO: float = 0.5
+    # Renders whose vendor frame is estimated above this size read the upload in chunks (0 disables)
+    READ_MEMORY_BUDGET_MB: int = 512
+    # Keep the vendor columns of rendered uploads, so mapping edits re-render without parsing the upload
+    RESULT_COLUMN_CACHE: bool = True
+    # Result file format (csv, xlsx or jsonl) when a request names none; empty follows the upload's format
+    RESULT_FORMAT: str = ""
+    # Per-client default result format, e.g. {"C1001": "jsonl"}; overrides RESULT_FORMAT
+    CLIENT_RESULT_FORMATS: dict = {}
+    # Workbooks with several sheets render into one concatenated table ("concat") or, for .xlsx
+    # results, one output sheet per vendor sheet ("per_sheet"), whether or not the sheets share a layout
+    EXCEL_SHEET_OUTPUT: str = "concat"
+    
+    # Health probing
+    HEALTH_PROBE_INTERVAL_SECONDS: float = 30
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 5
+    # Readiness fails while any of these is down
+    HEALTH_CRITICAL_SERVICES: list = ["database"]
+    
     # Environment
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
@@ -0,0 +1,142 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from backend.core.database import engine
+from backend.core.log import get_logger
+from backend.models.file import File, FileCount
+
+logger = get_logger(__name__)
+
+# File statuses, in pipeline order
+UPLOADED = "uploaded"
+PROCESSING = "processing"
+COMPLETED = "completed"
+FAILED = "failed"
+FILE_STATUSES = (UPLOADED, PROCESSING, COMPLETED, FAILED)
+
+_files = File.__table__
+_counts = FileCount.__table__
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _adjust_count(connection: Any, client_number: str, status: str, delta: int) -> None:
+    counted = (_counts.c.client_number == client_number) & (_counts.c.status == status)
+    if connection.execute(update(_counts).where(counted).values(count=_counts.c.count + delta)).rowcount:
+        return
+    try:
+        # First file of the client in this status
+        with connection.begin_nested():
+            connection.execute(insert(_counts).values(client_number=client_number, status=status, count=delta))
+    except IntegrityError:
+        # Another transaction inserted the row in the meantime
+        connection.execute(update(_counts).where(counted).values(count=_counts.c.count + delta))
+
+
+def record_upload(
+    file_id: str,
+    client_number: str,
+    filename: str,
+    file_path: str,
+    file_size: Optional[int],
+    file_type: str,
+) -> bool:
+    """
+    Store the file row of a new upload, in status uploaded, and count it for its client.
+
+    The row is keyed by a fresh UUID and found by its alias, the upload ID
+    file_id, which is unique.
+
+    Returns:
+        False, storing nothing, when another upload already has file_id
+    """
+    try:
+        with engine.begin() as connection:
+            connection.execute(insert(_files).values(
+                file_id=uuid.uuid4(),
+                alias=file_id,
+                client_number=client_number,
+                filename=filename,
+                file_path=file_path,
+                file_size=str(file_size) if file_size is not None else None,
+                file_type=file_type,
+                uploaded_at=_utcnow(),
+                status=UPLOADED,
+            ))
+            _adjust_count(connection, client_number, UPLOADED, 1)
+    except IntegrityError:
+        with engine.connect() as connection:
+            if find_file_uuid(connection, file_id) is None:
+                raise
+        return False
+    return True
+
+
+def find_file_uuid(connection: Any, file_id: str) -> Optional[uuid.UUID]:
+    """
+    UUID of the file row of an upload, found by its alias (jc_07.csv); rows
+    stored before aliases were kept are found by their UUID.
+    """
+    row_id = connection.execute(select(_files.c.file_id).where(_files.c.alias == file_id)).scalar()
+    if row_id is not None:
+        return row_id
+    try:
+        legacy_id = uuid.UUID(file_id)
+    except ValueError:
+        return None
+    return connection.execute(select(_files.c.file_id).where(_files.c.file_id == legacy_id)).scalar()
+
+
+def recorded_file_count(connection: Any) -> int:
+    """
+    Number of uploads with a file row, across clients, from the maintained counts.
+    """
+    return connection.execute(select(func.coalesce(func.sum(_counts.c.count), 0))).scalar()
+
+
+def set_file_status(file_id: str, status: str) -> bool:
+    """
+    Move an upload to status and move it between its client's counts.
+
+    Uploads without a file row (stored before rows were kept) are left
+    alone. A transition that lost a race against a concurrent one changes
+    nothing, so counts never drift from the rows.
+
+    Returns:
+        Whether the status changed
+    """
+    with engine.begin() as connection:
+        row = connection.execute(
+            select(_files.c.file_id, _files.c.client_number, _files.c.status).where(_files.c.alias == file_id)
+        ).first()
+        if row is None or row.status == status:
+            return False
+        values: Dict[str, Any] = {"status": status}
+        if status in (COMPLETED, FAILED):
+            values["processed_at"] = _utcnow()
+        changed = connection.execute(
+            update(_files).where(_files.c.file_id == row.file_id, _files.c.status == row.status).values(**values)
+        ).rowcount
+        if not changed:
+            return False
+        _adjust_count(connection, row.client_number, row.status, -1)
+        _adjust_count(connection, row.client_number, status, 1)
+    return True
+
+
+def client_file_counts(connection: Any, client_number: str) -> Dict[str, int]:
+    """
+    Number of the client's files in each status, from the maintained counts.
+    """
+    counts = dict.fromkeys(FILE_STATUSES, 0)
+    rows = connection.execute(
+        select(_counts.c.status, _counts.c.count).where(_counts.c.client_number == client_number)
+    ).all()
+    counts.update({status: count for status, count in rows})
+    return counts
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from backend.core.config import settings
+from backend.core.log import get_logger
+
+logger = get_logger(__name__)
+
+OK = "ok"
+ERROR = "error"
+TIMEOUT = "timeout"
+UNKNOWN = "unknown"
+
+
+# ============================================================================
+# PROBES
+# ============================================================================
+
+def probe_database() -> None:
+    from sqlalchemy import text
+    from backend.core.database import engine
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+def probe_openai() -> None:
+    from backend.api.endpoint.db import _get_openai_client
+
+    _get_openai_client().models.list(timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS)
+
+
+def probe_pinecone() -> None:
+    from backend.api.endpoint.db import _get_pinecone_index
+
+    _get_pinecone_index().describe_index_stats()
+
+
+DEFAULT_PROBES = {
+    "database": probe_database,
+    "openai": probe_openai,
+    "pinecone": probe_pinecone,
+}
+
+
+# ============================================================================
+# PROBER
+# ============================================================================
+
+class HealthProber:
+    """
+    Checks dependencies in the background and keeps the latest result of each.
+
+    Health endpoints only read the stored results, so polling them costs no
+    I/O no matter how often the load balancer asks. Each probe runs in a
+    worker thread under a deadline; a probe that misses it is reported as a
+    timeout (the thread is left to finish on its own).
+    """
+
+    def __init__(
+        self,
+        probes: Optional[Dict[str, Callable[[], None]]] = None,
+        interval: float = 30.0,
+        timeout: float = 5.0,
+        critical: Iterable[str] = ("database",),
+    ):
+        self.probes = probes or dict(DEFAULT_PROBES)
+        self.interval = interval
+        self.timeout = timeout
+        self.critical = tuple(critical)
+        self.results: Dict[str, Dict[str, Any]] = {
+            name: {"status": UNKNOWN, "latency_ms": None, "checked_at": None, "error": None}
+            for name in self.probes
+        }
+        self.last_run: Optional[float] = None
+
+    async def _check(self, name: str, probe: Callable[[], None]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        status, error = OK, None
+        try:
+            await asyncio.wait_for(asyncio.to_thread(probe), self.timeout)
+        except asyncio.TimeoutError:
+            status, error = TIMEOUT, f"no response within {self.timeout}s"
+        except Exception as e:
+            status, error = ERROR, str(e)
+        result = {
+            "status": status,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "checked_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "error": error,
+        }
+        if status != OK and self.results[name]["status"] == OK:
+            logger.warning("Dependency check failed", extra={"service": name, **result})
+        return result
+
+    async def check_all(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Run every probe concurrently and store the results.
+        """
+        names = list(self.probes)
+        results = await asyncio.gather(*(self._check(name, self.probes[name]) for name in names))
+        # Swap in a new dict so readers never see a half-updated set
+        self.results = dict(zip(names, results))
+        self.last_run = time.monotonic()
+        return self.results
+
+    async def run(self) -> None:
+        """
+        Probe now and then every interval seconds until cancelled.
+        """
+        while True:
+            try:
+                await self.check_all()
+            except Exception:
+                logger.exception("Health probing failed")
+            await asyncio.sleep(self.interval)
+
+    def is_stale(self) -> bool:
+        return self.last_run is None or time.monotonic() - self.last_run > 3 * self.interval
+
+    def is_ready(self) -> bool:
+        """
+        Ready once critical dependencies passed their latest, still fresh, check.
+        """
+        results = self.results
+        return not self.is_stale() and all(results[name]["status"] == OK for name in self.critical if name in results)
+
+    def status(self) -> str:
+        results = self.results
+        if not self.is_ready():
+            return "unhealthy"
+        if any(result["status"] != OK for result in results.values()):
+            return "degraded"
+        return "healthy"
+
+
+prober = HealthProber(
+    interval=settings.HEALTH_PROBE_INTERVAL_SECONDS,
+    timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS,
+    critical=settings.HEALTH_CRITICAL_SERVICES,
+)
@@ -0,0 +1,327 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from backend.core.tracing import span
+
+# Latency buckets in seconds; the upper ones cover LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    """
+    Base class for metrics with optional labels.
+
+    Label children are created once and cached, so the hot path is a dict
+    lookup plus an update under a per-child lock.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _samples(self) -> Iterable[Tuple[str, Tuple[str, ...], object]]:
+        if not self.labelnames:
+            return [((), self._default)]
+        return list(self._children.items())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._samples():
+            lines.extend(child.render(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def render(self, name, labelnames, values):
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(self.value)}"]
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def render(self, name, labelnames, values):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{name}_bucket{_format_labels(labelnames, values, le)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, values)} {self.sum}")
+        lines.append(f"{name}_count{_format_labels(labelnames, values)} {cumulative}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    """
+    Gauge that is either updated directly or computed at scrape time from a callback.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        self.callback = callback
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default.dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+    def _samples(self):
+        if self.callback is not None:
+            for values, value in self.callback().items():
+                self.labels(*values).set(value)
+        return super()._samples()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format (0.0.4).
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[Tuple[str, Tuple[str, ...]], Tuple]:
+        """
+        Current state of every counter and histogram child, for changes_since.
+        """
+        state = {}
+        for metric in self._metrics:
+            if isinstance(metric, Gauge):
+                continue
+            for values, child in metric._samples():
+                if isinstance(child, _HistogramChild):
+                    state[(metric.name, values)] = (tuple(child.counts), child.sum)
+                else:
+                    state[(metric.name, values)] = (child.value,)
+        return state
+
+    def changes_since(self, before: Dict[Tuple[str, Tuple[str, ...]], Tuple]) -> List[Tuple]:
+        """
+        Counter increments and histogram observations made since snapshot before.
+
+        Pool workers record into their own copy of the registry; they send
+        these changes back so the API process can merge them.
+        """
+        changes = []
+        for (name, values), state in self.snapshot().items():
+            previous = before.get((name, values))
+            if len(state) == 2:
+                counts = [count - old for count, old in zip(state[0], previous[0])] if previous else list(state[0])
+                if any(counts):
+                    changes.append((name, values, counts, state[1] - (previous[1] if previous else 0.0)))
+            elif state[0] != (previous[0] if previous else 0.0):
+                changes.append((name, values, state[0] - (previous[0] if previous else 0.0)))
+        return changes
+
+    def merge(self, changes: List[Tuple]) -> None:
+        """
+        Apply changes from changes_since recorded in another process.
+        """
+        metrics = {metric.name: metric for metric in self._metrics}
+        for name, values, *delta in changes:
+            metric = metrics.get(name)
+            if metric is None:
+                continue
+            child = metric.labels(*values) if metric.labelnames else metric._default
+            if isinstance(child, _HistogramChild):
+                counts, total = delta
+                with child._lock:
+                    child.counts = [count + added for count, added in zip(child.counts, counts)]
+                    child.sum += total
+            else:
+                child.inc(delta[0])
+
+
+registry = Registry()
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# ============================================================================
+# APPLICATION METRICS
+# ============================================================================
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+))
+REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+))
+IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+))
+STAGE_LATENCY = registry.register(Histogram(
+    "stage_duration_seconds", "Duration of pipeline stages (parse, llm, embedding, pinecone_upsert, "
+    "pinecone_query, result_write)", ("stage",)
+))
+BYTES_PROCESSED = registry.register(Counter(
+    "bytes_processed_total", "Bytes uploaded or parsed", ("stage",)
+))
+ROWS_PROCESSED = registry.register(Counter(
+    "rows_processed_total", "Rows parsed or written", ("stage",)
+))
+
+
+class track_stage:
+    """
+    Time a pipeline stage into stage_duration_seconds and record it as a trace span.
+
+    Usage:
+        with track_stage("parse"):
+            df = read_vendor_file(path)
+    """
+
+    __slots__ = ("_histogram", "_span", "_start")
+
+    def __init__(self, stage: str, **attributes):
+        self._histogram = STAGE_LATENCY.labels(stage)
+        self._span = span(stage, **attributes)
+
+    def __enter__(self) -> "track_stage":
+        self._span.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._histogram.observe(time.perf_counter() - self._start)
+        self._span.__exit__(*exc_info)
+
+
+def register_storage_metrics(disk_usage: Callable[[], Dict[str, Dict[str, int]]]) -> None:
+    """
+    Expose storage usage per artifact kind, read from the last GC sweep at scrape time.
+    """
+    registry.register(Gauge(
+        "storage_bytes", "Bytes on disk per artifact kind", ("kind",),
+        callback=lambda: {(kind, ): usage["bytes"] for kind, usage in disk_usage().items()}
+    ))
+    registry.register(Gauge(
+        "storage_files", "Files on disk per artifact kind", ("kind",),
+        callback=lambda: {(kind, ): usage["files"] for kind, usage in disk_usage().items()}
+    ))
+
+
+def register_health_metrics(results: Callable[[], Dict[str, Dict]]) -> None:
+    """
+    Expose the latest background dependency checks.
+    """
+    registry.register(Gauge(
+        "dependency_up", "1 if the dependency passed its latest health probe", ("service",),
+        callback=lambda: {(name, ): float(result["status"] == "ok") for name, result in results().items()}
+    ))
+    registry.register(Gauge(
+        "dependency_probe_latency_ms", "Latency of the latest health probe per dependency", ("service",),
+        callback=lambda: {(name, ): result["latency_ms"] or 0.0 for name, result in results().items()}
+    ))
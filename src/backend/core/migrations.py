@@ -0,0 +1,76 @@
+from typing import Any, List
+
+from sqlalchemy import inspect, text
+
+from backend.core.database import Base
+from backend.core.log import get_logger
+import backend.models  # noqa: F401  (registers every table)
+
+logger = get_logger(__name__)
+
+# ============================================================================
+# SCHEMA MIGRATIONS
+# ============================================================================
+
+def _add_missing_columns(connection: Any, table: Any, existing: List[str]) -> List[str]:
+    """
+    ALTER TABLE ... ADD COLUMN for the nullable columns of table the database lacks.
+    """
+    added = []
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        if not column.nullable:
+            raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} to an existing table")
+        column_type = column.type.compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+        added.append(column.name)
+    return added
+
+
+def _backfill_file_counts(connection: Any) -> None:
+    """
+    Seed file_counts from the existing file rows, counted once.
+    """
+    connection.execute(text(
+        "INSERT INTO file_counts (client_number, status, count) "
+        "SELECT client_number, COALESCE(status, 'uploaded'), COUNT(*) FROM files "
+        "GROUP BY client_number, COALESCE(status, 'uploaded')"
+    ))
+
+
+def migrate_schema(engine: Any) -> None:
+    """
+    Create missing tables and bring existing ones up to the models.
+
+    create_all only creates tables that do not exist yet, so columns and
+    indexes added to existing models are applied here, each step at most
+    once:
+
+    - files.alias (nullable), with the unique index ix_files_alias
+    - ix_files_client_uploaded and ix_audit_events_user_time
+    - file_counts, seeded from the existing file rows when it is created
+
+    Adding ix_files_alias fails if existing rows repeat an alias; those
+    must be renamed by hand first.
+    """
+    existing_tables = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            columns = [column["name"] for column in inspector.get_columns(table.name)]
+            added = _add_missing_columns(connection, table, columns)
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            created = [index.name for index in table.indexes if index.name not in indexes]
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(connection)
+            if added or created:
+                logger.info("Migrated table", extra={"table": table.name, "columns": added, "indexes": created})
+        if "files" in existing_tables and "file_counts" not in existing_tables:
+            _backfill_file_counts(connection)
+            logger.info("Seeded file counts from existing files")
@@ -0,0 +1,259 @@
+import asyncio
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+
+from backend.core.admission import embedding_admission
+from backend.core.config import settings
+from backend.core.database import engine
+from backend.core.log import get_logger
+from backend.core.metrics import Counter, Gauge, registry
+from backend.models.outbox import PineconeOutbox
+
+logger = get_logger(__name__)
+
+PENDING = "pending"
+FAILED = "failed"
+
+# Admission-control client the dispatcher queues as, next to request clients
+OUTBOX_CLIENT = "outbox"
+
+# Provider responses that reject what was sent rather than report the service unavailable
+PAYLOAD_ERROR_STATUSES = (400, 413, 422)
+
+DISPATCHED = registry.register(Counter(
+    "outbox_dispatched_total", "Outbox rows processed by outcome (ok, retry, failed)", ("result",)
+))
+ROWS = registry.register(Gauge(
+    "outbox_rows", "Outbox rows by status as of the last dispatcher pass", ("status",)
+))
+
+_outbox = PineconeOutbox.__table__
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _is_payload_error(error: BaseException) -> bool:
+    """
+    Whether an upsert failed because of the rows it sent (unreadable mapping
+    data, or an embedding input or vector the provider rejects) rather than
+    the provider being unreachable, failing or rate limiting.
+    """
+    if isinstance(error, (ValueError, TypeError, KeyError)):
+        return True
+    response = getattr(error, "response", None)
+    status_code = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    return status_code in PAYLOAD_ERROR_STATUSES
+
+
+def enqueue_pinecone_upsert(
+    connection: Any,
+    ai_response: Dict[str, Any],
+    file_id: str,
+    client_number: Optional[str],
+) -> str:
+    """
+    Record a Pinecone upsert as part of the caller's transaction.
+
+    Args:
+        connection: Connection or Session whose transaction the row joins
+        ai_response: Mapping data to embed
+        file_id: The ID of the uploaded file
+        client_number: The client number (optional)
+
+    Returns:
+        The vector ID the mapping will be stored under
+    """
+    vector_id = str(uuid.uuid4())
+    now = _utcnow()
+    connection.execute(insert(_outbox).values(
+        vector_id=vector_id,
+        file_id=file_id,
+        client_number=client_number,
+        payload=json.dumps(ai_response),
+        status=PENDING,
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now,
+    ))
+    return vector_id
+
+
+def queue_pinecone_upsert(ai_response: Dict[str, Any], file_id: str, client_number: Optional[str]) -> str:
+    """
+    Record a Pinecone upsert in a transaction of its own, for data not stored in the database.
+    """
+    with engine.begin() as connection:
+        return enqueue_pinecone_upsert(connection, ai_response, file_id, client_number)
+
+
+class OutboxDispatcher:
+    """
+    Drain the Pinecone outbox in batches.
+
+    Each pass claims up to batch_size due rows by pushing their next attempt
+    claim_seconds into the future, so other workers skip them and a crashed
+    worker's rows become due again. A batch is embedded in one request and
+    upserted in one call under embedding admission control. Failed rows are
+    retried with exponential backoff and jitter and marked failed after
+    max_attempts. When a batch is rejected for its content (see
+    _is_payload_error), its rows are retried one by one so a single bad row
+    does not hold back the others; after transport, provider, rate-limit or
+    capacity failures the whole batch backs off, since sending the rows one
+    by one would only multiply the failed calls.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 32,
+        interval: float = 5.0,
+        max_attempts: int = 8,
+        backoff: float = 2.0,
+        max_backoff: float = 600.0,
+        claim_seconds: float = 300.0,
+    ):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.claim_seconds = claim_seconds
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def wake(self) -> None:
+        """
+        Start the next pass now instead of at the next poll (call after committing rows).
+        """
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Outbox table
+    # ------------------------------------------------------------------
+
+    def _claim(self) -> List[Dict[str, Any]]:
+        token = uuid.uuid4().hex
+        now = _utcnow()
+        due = (_outbox.c.status == PENDING) & (_outbox.c.next_attempt_at <= now)
+        with engine.begin() as connection:
+            ids = connection.execute(
+                select(_outbox.c.id).where(due).order_by(_outbox.c.next_attempt_at, _outbox.c.id).limit(self.batch_size)
+            ).scalars().all()
+            if not ids:
+                return []
+            # Rows another worker claimed in the meantime no longer match `due`
+            connection.execute(
+                update(_outbox).where(_outbox.c.id.in_(ids), due)
+                .values(claimed_by=token, next_attempt_at=now + timedelta(seconds=self.claim_seconds))
+            )
+            rows = connection.execute(select(_outbox).where(_outbox.c.claimed_by == token)).mappings().all()
+        return [dict(row) for row in rows]
+
+    def _complete(self, rows: List[Dict[str, Any]]) -> None:
+        with engine.begin() as connection:
+            connection.execute(delete(_outbox).where(_outbox.c.id.in_([row["id"] for row in rows])))
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _fail(self, rows: List[Dict[str, Any]], error: str) -> None:
+        now = _utcnow()
+        with engine.begin() as connection:
+            for row in rows:
+                attempts = row["attempts"] + 1
+                values = {"attempts": attempts, "claimed_by": None, "last_error": error[:2000]}
+                if attempts >= self.max_attempts:
+                    values["status"] = FAILED
+                    DISPATCHED.labels("failed").inc()
+                    logger.error("Giving up on outbox row", extra={
+                        "vector_id": row["vector_id"], "file_id": row["file_id"], "error": error
+                    })
+                else:
+                    values["next_attempt_at"] = now + timedelta(seconds=self._retry_delay(attempts))
+                    DISPATCHED.labels("retry").inc()
+                connection.execute(update(_outbox).where(_outbox.c.id == row["id"]).values(**values))
+
+    def _count(self) -> Dict[str, int]:
+        with engine.connect() as connection:
+            counts = connection.execute(select(_outbox.c.status, func.count()).group_by(_outbox.c.status)).all()
+        return {status: count for status, count in counts}
+
+    # ------------------------------------------------------------------
+    # Dispatching
+    # ------------------------------------------------------------------
+
+    async def _send(self, rows: List[Dict[str, Any]]) -> None:
+        from backend.api.endpoint.db import upsert_mapping_vectors
+
+        try:
+            records = [{
+                "mapping_id": row["vector_id"],
+                "ai_response": json.loads(row["payload"]),
+                "file_id": row["file_id"],
+                "client_number": row["client_number"],
+                "created_at": row["created_at"].isoformat(),
+            } for row in rows]
+            await embedding_admission.run(OUTBOX_CLIENT, upsert_mapping_vectors, records)
+        except Exception as e:
+            if len(rows) > 1 and _is_payload_error(e):
+                logger.warning("Outbox batch failed, retrying rows one by one", extra={
+                    "rows": len(rows), "error": str(e)
+                })
+                for row in rows:
+                    await self._send([row])
+                return
+            logger.warning("Outbox dispatch failed", extra={"rows": len(rows), "error": str(e)})
+            await asyncio.to_thread(self._fail, rows, str(e))
+            return
+        await asyncio.to_thread(self._complete, rows)
+        DISPATCHED.labels("ok").inc(len(rows))
+        logger.info("Dispatched outbox rows", extra={"rows": len(rows)})
+
+    async def dispatch_once(self) -> int:
+        """
+        Claim and send one batch of due rows.
+
+        Returns:
+            The number of rows claimed
+        """
+        rows = await asyncio.to_thread(self._claim)
+        if rows:
+            await self._send(rows)
+        return len(rows)
+
+    async def run(self) -> None:
+        """
+        Dispatch forever: drain full batches back to back, then wait for a wake-up or the poll interval.
+        """
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                if await self.dispatch_once() >= self.batch_size:
+                    continue
+                counts = await asyncio.to_thread(self._count)
+                for status in (PENDING, FAILED):
+                    ROWS.labels(status).set(counts.get(status, 0))
+            except Exception as e:
+                logger.warning("Outbox dispatcher pass failed", extra={"error": str(e)})
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+outbox_dispatcher = OutboxDispatcher(
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    interval=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+    backoff=settings.OUTBOX_BACKOFF_SECONDS,
+    max_backoff=settings.OUTBOX_MAX_BACKOFF_SECONDS,
+    claim_seconds=settings.OUTBOX_CLAIM_SECONDS,
+)
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from backend.core.config import settings
+from backend.core.database import engine
+from backend.core.log import get_logger
+from backend.core.metrics import Counter, registry
+from backend.models.lock import MappingLock
+
+logger = get_logger(__name__)
+
+# Identifies this process as the owner of the leases it takes
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+COALESCED = registry.register(Counter(
+    "single_flight_coalesced_total", "Requests that shared another request's computation", ("scope",)
+))
+
+_locks = MappingLock.__table__
+
+
+# ============================================================================
+# CROSS-WORKER LEASES
+# ============================================================================
+
+def try_acquire_lease(key: str, lease_seconds: float) -> bool:
+    """
+    Take the lease on key unless a live one is held by another worker.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    expires_at = now + timedelta(seconds=lease_seconds)
+    try:
+        with engine.begin() as connection:
+            connection.execute(insert(_locks).values(key=key, owner=WORKER_ID, acquired_at=now, expires_at=expires_at))
+        return True
+    except IntegrityError:
+        pass
+    # Take over a lease whose holder died without releasing it
+    with engine.begin() as connection:
+        result = connection.execute(
+            update(_locks)
+            .where(_locks.c.key == key, _locks.c.expires_at < now)
+            .values(owner=WORKER_ID, acquired_at=now, expires_at=expires_at)
+        )
+    return result.rowcount == 1
+
+
+def release_lease(key: str) -> None:
+    with engine.begin() as connection:
+        connection.execute(delete(_locks).where(_locks.c.key == key, _locks.c.owner == WORKER_ID))
+
+
+# ============================================================================
+# SINGLE FLIGHT
+# ============================================================================
+
+class SingleFlight:
+    """
+    Coalesce concurrent computations of the same key onto one.
+
+    Within a worker, callers of an in-flight key await the same task. Across
+    workers, the task first takes a lease in the lock table; when another
+    worker holds it, the task polls ``reuse`` (which reads whatever the
+    holder stored) until the result appears or the lease goes away. If the
+    lock table cannot be reached the computation simply runs uncoordinated.
+    """
+
+    def __init__(self, lease_seconds: float = 600.0, poll_interval: float = 0.1, max_poll_interval: float = 1.0):
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    async def run(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        reuse: Callable[[], Optional[Any]],
+    ) -> Tuple[Any, bool]:
+        """
+        Run compute once for key, however many callers ask concurrently.
+
+        Args:
+            key: Identity of the computation
+            compute: Coroutine function producing the result (and storing it)
+            reuse: Blocking function returning a result stored by another worker, or None
+
+        Returns:
+            The result and whether it was shared with another caller
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            COALESCED.labels("local").inc()
+            result, _ = await asyncio.shield(task)
+            return result, True
+
+        task = asyncio.ensure_future(self._lead(key, compute, reuse))
+        self._calls[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        # Shielded so a caller that disconnects does not cancel the work others wait for
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away
+            task.exception()
+
+    async def _lead(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        reuse: Callable[[], Optional[Any]],
+    ) -> Tuple[Any, bool]:
+        deadline = time.monotonic() + self.lease_seconds
+        interval = self.poll_interval
+        waited = False
+        while True:
+            try:
+                acquired = await asyncio.to_thread(try_acquire_lease, key, self.lease_seconds)
+            except Exception as e:
+                logger.warning("Lock table unavailable, computing without coordination",
+                               extra={"key": key, "error": str(e)})
+                return await compute(), False
+
+            if acquired:
+                try:
+                    # A previous holder may have finished since the caller's cache check
+                    result = await asyncio.to_thread(reuse)
+                    if result is not None:
+                        return result, waited
+                    return await compute(), False
+                finally:
+                    try:
+                        await asyncio.to_thread(release_lease, key)
+                    except Exception as e:
+                        logger.warning("Failed to release lease", extra={"key": key, "error": str(e)})
+
+            if not waited:
+                COALESCED.labels("remote").inc()
+                logger.info("Waiting for another worker", extra={"key": key})
+                waited = True
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, self.max_poll_interval)
+            result = await asyncio.to_thread(reuse)
+            if result is not None:
+                return result, True
+            if time.monotonic() > deadline:
+                logger.warning("Gave up waiting for another worker", extra={"key": key})
+                return await compute(), False
+
+
+mapping_flights = SingleFlight(lease_seconds=settings.SINGLE_FLIGHT_LEASE_SECONDS)
@@ -0,0 +1,151 @@
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+
+class Span:
+    __slots__ = ("name", "attributes", "start", "end", "children")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.children: List["Span"] = []
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        node = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+        }
+        if self.attributes:
+            node["attributes"] = self.attributes
+        if self.children:
+            node["children"] = [child.to_dict(origin) for child in self.children]
+        return node
+
+
+class Trace:
+    """
+    All spans recorded while serving one request.
+    """
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.root = Span("request", {})
+        self.spans: List[Span] = []
+        self.tokens: tuple = ()
+
+    def finish(self) -> None:
+        self.root.end = time.perf_counter()
+
+    def server_timing(self) -> str:
+        """
+        Finished span durations summed per name, formatted for the Server-Timing header.
+        """
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            if span.end is not None:
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        entries = [f"{name};dur={duration:.1f}" for name, duration in totals.items()]
+        entries.append(f"total;dur={self.root.duration_ms:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.root.to_dict(self.root.start)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def start_trace(request_id: str) -> Trace:
+    """
+    Make a new trace current; pair with end_trace once the request is done.
+    """
+    trace = Trace(request_id)
+    trace.tokens = (_current_trace.set(trace), _current_span.set(trace.root))
+    return trace
+
+
+def end_trace(trace: Trace) -> None:
+    trace.finish()
+    trace_token, span_token = trace.tokens
+    _current_span.reset(span_token)
+    _current_trace.reset(trace_token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+
+class span:
+    """
+    Record a child span of the current span for the duration of the block.
+
+    Context variables follow awaits and ``asyncio.to_thread``, so spans
+    opened in worker threads attach to the request that started them.
+
+    Usage:
+        with span("llm", model="gpt-4o-mini"):
+            response = await Runner.run(agent, prompt)
+    """
+
+    __slots__ = ("_span", "_token")
+
+    def __init__(self, name: str, **attributes: Any):
+        self._span = Span(name, attributes)
+
+    def __enter__(self) -> Span:
+        parent = _current_span.get()
+        if parent is not None:
+            parent.children.append(self._span)
+            trace = _current_trace.get()
+            if trace is not None:
+                trace.spans.append(self._span)
+        self._token = _current_span.set(self._span)
+        self._span.start = time.perf_counter()
+        return self._span
+
+    def __exit__(self, *exc_info) -> None:
+        self._span.end = time.perf_counter()
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Exited in a different context than it was entered in
+            pass
+
+
+def attach_spans(nodes: List[Dict[str, Any]], duration_ms: float) -> None:
+    """
+    Add spans recorded in another process (Span.to_dict trees) under the current span.
+
+    The other process's clock is not comparable, so the spans are placed as
+    if its work of duration_ms ended just now.
+    """
+    parent = _current_span.get()
+    trace = _current_trace.get()
+    if parent is None:
+        return
+    origin = time.perf_counter() - duration_ms / 1000
+
+    def build(node: Dict[str, Any]) -> Span:
+        child = Span(node["name"], node.get("attributes", {}))
+        child.start = origin + node["start_ms"] / 1000
+        child.end = child.start + node["duration_ms"] / 1000
+        child.children = [build(grandchild) for grandchild in node.get("children", ())]
+        if trace is not None:
+            trace.spans.append(child)
+        return child
+
+    parent.children.extend(build(node) for node in nodes)
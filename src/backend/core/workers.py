@@ -0,0 +1,119 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+from backend.core.config import settings
+from backend.core.log import configure_logging, get_logger
+from backend.core.metrics import registry
+from backend.core.tracing import attach_spans, end_trace, start_trace
+
+logger = get_logger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Set in pool workers, which must not start pools of their own
+_in_worker = False
+
+
+def _init_worker() -> None:
+    global _in_worker
+    _in_worker = True
+    configure_logging(settings.LOG_LEVEL)
+
+
+def in_worker() -> bool:
+    """
+    Whether this process is a pool worker.
+    """
+    return _in_worker
+
+
+def _available_cpus() -> int:
+    # CPUs this process may be scheduled on, which os.cpu_count() (all host CPUs) ignores
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def pool_size() -> int:
+    """
+    Number of worker processes: WORKER_PROCESSES, or when unset one per
+    available CPU, at most WORKER_PROCESSES_MAX.
+
+    Every API process (uvicorn worker) has a pool of its own, each worker
+    importing pandas, so the default stays small.
+    """
+    if settings.WORKER_PROCESSES:
+        return settings.WORKER_PROCESSES
+    return max(1, min(_available_cpus(), settings.WORKER_PROCESSES_MAX))
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Shared pool for CPU-bound pandas work, started on first use.
+
+    Workers are spawned rather than forked: the API process holds an event
+    loop, database connections and threads that must not be copied.
+    Spawned pools start each worker only when queued work finds no idle
+    one, so an API process that never renders starts none.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=pool_size(), mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker
+            )
+            logger.info("Started process pool", extra={"workers": pool_size()})
+        return _pool
+
+
+def shutdown_process_pool() -> None:
+    """
+    Stop the worker processes, abandoning queued work.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _run_recorded(func: Callable[..., Any], args: tuple, kwargs: dict) -> Tuple[Any, List[tuple], float, list]:
+    """
+    Call func in a worker, collecting the metrics and spans it records.
+
+    Returns:
+        func's result, the metric changes, the duration in milliseconds and the span trees
+    """
+    before = registry.snapshot()
+    trace = start_trace("worker")
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        end_trace(trace)
+    spans = [child.to_dict(trace.root.start) for child in trace.root.children]
+    return result, registry.changes_since(before), trace.root.duration_ms, spans
+
+
+async def run_in_process(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run func in the shared pool without blocking the event loop.
+
+    func and its arguments are pickled to the worker, so func must be a
+    module-level function; keep arguments and results small and pass bulk
+    data through files. Metrics and stage spans func records in the worker
+    are merged into this process's registry and the current trace.
+    """
+    loop = asyncio.get_running_loop()
+    result, changes, duration_ms, spans = await loop.run_in_executor(
+        get_process_pool(), functools.partial(_run_recorded, func, args, kwargs)
+    )
+    registry.merge(changes)
+    attach_spans(spans, duration_ms)
+    return result
@@ -1,23 +1,38 @@
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from backend.core.audit import audit_log
 from backend.core.config import settings
 from backend.core.database import engine, Base
+from backend.core.health import prober
+from backend.core.migrations import migrate_schema
+from backend.core.outbox import outbox_dispatcher
+from backend.core.workers import shutdown_process_pool
+from backend.core.metrics import CONTENT_TYPE_LATEST, registry, register_health_metrics, register_storage_metrics
 from backend.middleware.cors import add_cors_middleware
+from backend.middleware.metrics import add_metrics_middleware
+from backend.middleware.tracing import add_tracing_middleware
+from backend.core.log import configure_logging, get_logger
 from backend.api.endpoint import routes
 from backend.models import User
+from backend.utils.storage import storage
+
+configure_logging(settings.LOG_LEVEL)
+logger = get_logger(__name__)
 
 
 # In src/backend/main.py, add better error handling
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     try:
-        # Create database tables
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database tables created successfully")
+        # Create database tables and migrate existing ones
+        migrate_schema(engine)
+        logger.info("Database tables created successfully")
         
         # Create superuser
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -37,17 +52,36 @@ async def lifespan(app: FastAPI):
                 )
                 db.add(superuser)
                 db.commit()
-                print("✅ Default superuser created: admin@example.com / admin123")
+                logger.info("Default superuser created: admin@example.com / admin123")
         except Exception as e:
-            print(f"⚠️ Error creating superuser: {e}")
+            logger.warning("Error creating superuser", extra={"error": str(e)})
         finally:
             db.close()
     except Exception as e:
-        print(f"❌ Error during startup: {e}")
+        logger.exception("Error during startup")
         raise e
+
+    # Expire old uploads, results and caches in the background
+    gc_task = asyncio.create_task(storage.run_gc(settings.STORAGE_GC_INTERVAL_SECONDS))
+    # Check dependencies in the background; readiness fails until the first round completes
+    health_task = asyncio.create_task(prober.run())
+    # Index mappings recorded in the Pinecone outbox
+    outbox_task = asyncio.create_task(outbox_dispatcher.run())
+    # Write audit events in batches off the request path
+    audit_task = asyncio.create_task(audit_log.run())
     
     yield
 
+    gc_task.cancel()
+    health_task.cancel()
+    outbox_task.cancel()
+    audit_task.cancel()
+    try:
+        audit_log.flush()
+    except Exception as e:
+        logger.warning("Failed to write queued audit events", extra={"error": str(e)})
+    shutdown_process_pool()
+
 # @asynccontextmanager
 # async def lifespan(app: FastAPI):
 #     # Startup
@@ -100,6 +134,14 @@ app = FastAPI(
 # Add CORS middleware
 add_cors_middleware(app)
 
+# Add request metrics middleware
+add_metrics_middleware(app)
+register_storage_metrics(storage.disk_usage)
+register_health_metrics(lambda: prober.results)
+
+# Add request tracing middleware (outermost, so its span covers everything)
+add_tracing_middleware(app)
+
 # Include routers
 app.include_router(routes.router, prefix=settings.API_V1_STR)
 
@@ -115,36 +157,51 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    health_status = {
-        "status": "healthy",
+    """
+    Service and dependency status from the latest background probes; does no I/O itself.
+    """
+    results = prober.results
+    return {
+        "status": prober.status(),
         "message": "Service is running",
         "version": settings.VERSION,
         "environment": settings.ENVIRONMENT,
         "services": {
-            "database": "connected",
-            "pinecone": "unknown",
-            "openai": "unknown"
-        }
+            name: "connected" if result["status"] == "ok" else (
+                f"{result['status']}: {result['error']}" if result["error"] else result["status"]
+            )
+            for name, result in results.items()
+        },
+        "checks": results
     }
-    
-    # Check Pinecone connection
-    try:
-        from backend.api.endpoint.db import _get_pinecone_client, _get_openai_client
-        _get_pinecone_client()
-        health_status["services"]["pinecone"] = "connected"
-    except Exception as e:
-        health_status["services"]["pinecone"] = f"error: {str(e)}"
-        health_status["status"] = "degraded"
-    
-    # Check OpenAI connection
-    try:
-        _get_openai_client()
-        health_status["services"]["openai"] = "connected"
-    except Exception as e:
-        health_status["services"]["openai"] = f"error: {str(e)}"
-        health_status["status"] = "degraded"
-    
-    return health_status
+
+
+@app.get("/health/live", include_in_schema=False)
+async def liveness():
+    """
+    Liveness: the process is serving requests.
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", include_in_schema=False)
+async def readiness():
+    """
+    Readiness: critical dependencies passed their latest probe.
+    """
+    ready = prober.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not ready", "stale": prober.is_stale(), "checks": prober.results}
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus scrape endpoint.
+    """
+    return Response(content=registry.render(), media_type=CONTENT_TYPE_LATEST)
 
 
 if __name__ == "__main__":
@@ -1,3 +1,5 @@
 from .cors import add_cors_middleware
+from .metrics import add_metrics_middleware
+from .tracing import add_tracing_middleware
  
-__all__ = ["add_cors_middleware"] 
\ No newline at end of file
+__all__ = ["add_cors_middleware", "add_metrics_middleware", "add_tracing_middleware"]
@@ -13,4 +13,5 @@ def add_cors_middleware(app: FastAPI) -> None:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Request-ID", "Server-Timing"],
     ) 
\ No newline at end of file
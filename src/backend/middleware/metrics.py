@@ -0,0 +1,47 @@
+import time
+from fastapi import FastAPI
+from backend.core.metrics import IN_FLIGHT, REQUEST_LATENCY, REQUESTS
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency, status counts and in-flight requests.
+
+    Requests are labelled with the route template (e.g. /mapping/{client_number})
+    so path parameters do not create new time series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], route_path).observe(elapsed)
+            REQUESTS.labels(scope["method"], route_path, str(status_code)).inc()
+
+
+def add_metrics_middleware(app: FastAPI) -> None:
+    """
+    Add request metrics middleware to the FastAPI application
+    """
+    app.add_middleware(MetricsMiddleware)
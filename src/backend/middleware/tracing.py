@@ -0,0 +1,79 @@
+import random
+import re
+import uuid
+from fastapi import FastAPI
+from backend.core.config import settings
+from backend.core.log import get_logger
+from backend.core.tracing import end_trace, start_trace
+
+logger = get_logger(__name__)
+
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware that starts a trace per request.
+
+    The request ID is taken from an incoming X-Request-ID header or generated,
+    echoed back in the response, and attached to every log line. Finished
+    stage spans are summarised in a Server-Timing header, and slow or sampled
+    requests log their full span tree.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        if not request_id or not _VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        trace = start_trace(request_id)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode()))
+                headers.append((b"server-timing", trace.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_trace(trace)
+            route = getattr(scope.get("route"), "path", None)
+            duration_ms = round(trace.root.duration_ms, 3)
+            fields = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route,
+                "status": status_code,
+                "duration_ms": duration_ms,
+                "request_id": request_id,
+            }
+            logger.info("request completed", extra=fields)
+            if duration_ms >= settings.TRACE_SLOW_REQUEST_MS or random.random() < settings.TRACE_SAMPLE_RATE:
+                logger.warning(
+                    "slow request" if duration_ms >= settings.TRACE_SLOW_REQUEST_MS else "sampled request",
+                    extra={**fields, "span_tree": trace.to_dict()}
+                )
+
+
+def add_tracing_middleware(app: FastAPI) -> None:
+    """
+    Add request tracing middleware to the FastAPI application
+    """
+    app.add_middleware(TracingMiddleware)
@@ -1,3 +1,9 @@
 from .user import User
+from .file import File, FileCount
+from .mapping import Mapping
+from .product import Product
+from .audit import AuditEvent
+from .lock import MappingLock
+from .outbox import PineconeOutbox
  
-__all__ = ["User"] 
\ No newline at end of file
+__all__ = ["User", "File", "FileCount", "Mapping", "Product", "AuditEvent", "MappingLock", "PineconeOutbox"]
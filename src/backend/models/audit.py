@@ -0,0 +1,29 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from backend.core.database import Base
+
+
+class AuditEvent(Base):
+    """
+    One audited action (upload, mapping generated/saved/deleted, export, login).
+
+    The table is append-only: rows are inserted in batches by the audit log
+    and never updated or deleted by the application. ``created_at`` is the
+    time the action happened, not the time its batch was flushed. Listings
+    page through a client's events newest first on
+    (client_number, created_at, id), and through a user's events (logins,
+    which belong to no client) on (user_id, created_at, id).
+    """
+    __tablename__ = "audit_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    client_number = Column(String(50), nullable=True)
+    action = Column(String(50), nullable=False)
+    user_id = Column(Integer, nullable=True)
+    file_id = Column(String(255), nullable=True)
+    details = Column(Text, nullable=True)  # JSON object
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_audit_events_client_time", "client_number", "created_at", "id"),
+        Index("ix_audit_events_user_time", "user_id", "created_at", "id"),
+    )
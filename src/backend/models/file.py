@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text
+from sqlalchemy import Column, String, DateTime, Text, Integer, Index
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -11,7 +11,10 @@ class File(Base):
     __tablename__ = "files"
 
     file_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    client_number = Column(String(50), nullable=False, index=True)
+    # Upload ID the API uses (jc_07.csv); unique (ix_files_alias), so concurrent
+    # uploads cannot claim the same one
+    alias = Column(String(255), nullable=True)
+    client_number = Column(String(50), nullable=False)
     filename = Column(String(255), nullable=False)
     file_path = Column(Text, nullable=False)  # Path to stored file
     file_size = Column(String(20), nullable=True)  # File size in bytes
@@ -22,3 +25,23 @@ class File(Base):
 
     mappings = relationship("Mapping", back_populates="file")
     products = relationship("Product", back_populates="file")
+
+    # Per-client listings page through this index newest first
+    __table_args__ = (
+        Index("ix_files_alias", "alias", unique=True),
+        Index("ix_files_client_uploaded", "client_number", "uploaded_at", "file_id"),
+    )
+
+
+class FileCount(Base):
+    """
+    Number of a client's files in each status, kept in step with ``files``.
+
+    Rows are adjusted in the same transaction as the file rows they count,
+    so listings report totals without counting the client's files.
+    """
+    __tablename__ = "file_counts"
+
+    client_number = Column(String(50), primary_key=True)
+    status = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
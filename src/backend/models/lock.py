@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, DateTime
+from backend.core.database import Base
+
+
+class MappingLock(Base):
+    """
+    Lease on an in-flight computation, shared by all workers.
+
+    A row exists while some worker computes the result for ``key``; other
+    workers wait for it to disappear and reuse the stored result. Leases
+    past ``expires_at`` belong to crashed workers and may be taken over.
+    """
+    __tablename__ = "mapping_locks"
+
+    key = Column(String(255), primary_key=True)
+    owner = Column(String(100), nullable=False)
+    acquired_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from backend.core.database import Base
+
+
+class PineconeOutbox(Base):
+    """
+    Pinecone write waiting to be dispatched.
+
+    Rows are inserted in the same transaction as the data they index and
+    drained by the outbox dispatcher; a row is deleted once its vector is
+    upserted. ``vector_id`` is fixed at insert time, so retrying a write
+    overwrites the vector instead of duplicating it. Rows that exhaust their
+    attempts stay behind with status ``failed``.
+    """
+    __tablename__ = "pinecone_outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    vector_id = Column(String(64), nullable=False, unique=True)
+    file_id = Column(String(255), nullable=True)
+    client_number = Column(String(50), nullable=True)
+    payload = Column(Text, nullable=False)  # JSON mapping data to embed
+    status = Column(String(20), nullable=False, default="pending")  # pending, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)
+    claimed_by = Column(String(64), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (Index("ix_pinecone_outbox_due", "status", "next_attempt_at"),)
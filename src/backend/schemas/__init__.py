@@ -1,4 +1,8 @@
 from .user import User, UserCreate, UserUpdate, UserInDB
 from .token import Token, TokenPayload
+from .mapping import FieldMapping, MappingItem, OutputModel, JC_FIELDS, SCHEMA_VERSION
  
-__all__ = ["User", "UserCreate", "UserUpdate", "UserInDB", "Token", "TokenPayload"] 
\ No newline at end of file
+__all__ = [
+    "User", "UserCreate", "UserUpdate", "UserInDB", "Token", "TokenPayload",
+    "FieldMapping", "MappingItem", "OutputModel", "JC_FIELDS", "SCHEMA_VERSION"
+]
@@ -0,0 +1,57 @@
+import hashlib
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+# Fixed JC headers every vendor file is mapped onto
+JC_FIELDS = [
+    "RetailerStockNumber", "StyleNumber", "VisibleAs", "ParentSKU", "ProductType",
+    "SelectedAttributes", "ProductName", "ProductDescription", "CustomAttribute",
+    "CustomAttributeLabel", "ConfigurableControlType", "IsConfigurableProduct",
+    "ControlDisplayOrder", "Categories", "Collections", "PriceType",
+    "WholesaleBasePrice", "MSRP", "MetalType", "MetalColor", "ImagePath", "Gender"
+]
+
+# Changes whenever the JC header set changes, so cached mappings are not reused across schemas
+SCHEMA_VERSION = hashlib.sha256("|".join(JC_FIELDS).encode()).hexdigest()[:12]
+
+
+class FieldMapping(BaseModel):
+    vendor_field: str
+    confidence: float
+
+
+class MappingItem(BaseModel):
+    RetailerStockNumber: FieldMapping
+    StyleNumber: FieldMapping
+    VisibleAs: FieldMapping
+    ParentSKU: FieldMapping
+    ProductType: FieldMapping
+    SelectedAttributes: FieldMapping
+    ProductName: FieldMapping
+    ProductDescription: FieldMapping
+    CustomAttribute: FieldMapping
+    CustomAttributeLabel: FieldMapping
+    ConfigurableControlType: FieldMapping
+    IsConfigurableProduct: FieldMapping
+    ControlDisplayOrder: FieldMapping
+    Categories: FieldMapping
+    Collections: FieldMapping
+    PriceType: FieldMapping
+    WholesaleBasePrice: FieldMapping
+    MSRP: FieldMapping
+    MetalType: FieldMapping
+    MetalColor: FieldMapping
+    ImagePath: FieldMapping
+    Gender: FieldMapping
+    other_fields: List[FieldMapping]
+
+
+class OutputModel(BaseModel):
+    items: List[MappingItem]
+
+
+class BatchMappingRequest(BaseModel):
+    file_ids: List[str]
+    client_number: Optional[str] = None
+    output_format: Optional[str] = None
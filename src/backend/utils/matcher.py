@@ -0,0 +1,232 @@
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.schemas.mapping import JC_FIELDS
+
+# Hashed feature space sizes
+NGRAM_DIMENSIONS = 4096
+TOKEN_DIMENSIONS = 2048
+
+# Weights of the similarity features in the combined score
+NGRAM_WEIGHT = 0.6
+TOKEN_WEIGHT = 0.4
+
+# Pairs scoring below this are never assigned
+MIN_SCORE = 0.45
+
+# How far value evidence from column profiles can lift a name score towards 1;
+# on its own it cannot reach MATCHER_ACCEPT_CONFIDENCE, so such guesses still go to the LLM
+VALUE_WEIGHT = 0.5
+
+# Profile pattern that supports each field (see backend.utils.profiling.PATTERNS)
+VALUE_PATTERNS = {
+    "RetailerStockNumber": "sku",
+    "StyleNumber": "sku",
+    "ParentSKU": "sku",
+    "WholesaleBasePrice": "price",
+    "MSRP": "price",
+    "MetalType": "metal",
+    "ImagePath": "url",
+}
+
+# Vendor phrasings of each JC field, besides the field name itself
+SYNONYMS: Dict[str, List[str]] = {
+    "RetailerStockNumber": ["sku", "stock number", "stock no", "retailer stock", "item number", "item no",
+                            "vendor stock", "vendor sku", "product code", "item code", "article number"],
+    "StyleNumber": ["style", "style number", "style no", "style code", "model", "model number", "design number"],
+    "VisibleAs": ["visibility", "visible", "visible as", "display"],
+    "ParentSKU": ["parent sku", "parent", "parent item", "master sku", "group sku", "parent style"],
+    "ProductType": ["product type", "type", "item type", "jewelry type"],
+    "SelectedAttributes": ["selected attributes", "attributes", "variant attributes", "options"],
+    "ProductName": ["name", "item name", "product name", "title", "product title", "short description"],
+    "ProductDescription": ["description", "desc", "long description", "product description", "details",
+                           "item description"],
+    "CustomAttribute": ["custom attribute", "custom field", "attribute value"],
+    "CustomAttributeLabel": ["custom attribute label", "attribute label", "attribute name"],
+    "ConfigurableControlType": ["control type", "configurable control", "option type", "swatch type"],
+    "IsConfigurableProduct": ["configurable", "is configurable", "has variants", "configurable product"],
+    "ControlDisplayOrder": ["display order", "sort order", "position", "order"],
+    "Categories": ["category", "categories", "department", "category path"],
+    "Collections": ["collection", "collections", "line", "series", "product line"],
+    "PriceType": ["price type", "pricing type", "pricing method"],
+    "WholesaleBasePrice": ["wholesale", "wholesale price", "cost", "net price", "dealer price", "base price",
+                           "unit cost", "wholesale cost"],
+    "MSRP": ["msrp", "retail", "retail price", "srp", "list price", "suggested retail", "price"],
+    "MetalType": ["metal", "metal type", "material", "karat", "metal purity", "gold karat"],
+    "MetalColor": ["metal color", "metal colour", "gold color", "color", "colour", "tone"],
+    "ImagePath": ["image", "image url", "image path", "photo", "picture", "img", "image link", "main image"],
+    "Gender": ["gender", "sex", "target gender"],
+}
+
+_ABBREVIATIONS = {
+    "#": " number ", "no": "number", "num": "number", "nbr": "number", "qty": "quantity",
+    "desc": "description", "img": "image", "pic": "picture", "url": "url", "colour": "color",
+}
+
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_SEPARATORS = re.compile(r"[^a-z0-9#]+")
+
+
+def normalize_header(header: str) -> str:
+    """
+    Lower-case a header, split camel case and punctuation and expand common abbreviations.
+    """
+    text = _CAMEL.sub(" ", str(header)).replace("#", " # ").lower()
+    tokens = []
+    for token in _SEPARATORS.split(text):
+        if token:
+            tokens.extend(_ABBREVIATIONS.get(token, token).split())
+    return " ".join(tokens)
+
+
+def _hash(feature: str, dimensions: int) -> int:
+    return zlib.crc32(feature.encode()) % dimensions
+
+
+def _ngram_matrix(texts: List[str], n: int = 3) -> np.ndarray:
+    """
+    L2-normalised hashed character n-gram counts, one row per text.
+    """
+    matrix = np.zeros((len(texts), NGRAM_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        padded = f" {text} "
+        indices = [_hash(padded[i:i + n], NGRAM_DIMENSIONS) for i in range(max(1, len(padded) - n + 1))]
+        np.add.at(matrix[row], indices, 1.0)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def _token_matrix(texts: List[str]) -> np.ndarray:
+    """
+    Binary hashed token sets, one row per text.
+    """
+    matrix = np.zeros((len(texts), TOKEN_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        indices = [_hash(token, TOKEN_DIMENSIONS) for token in text.split()]
+        matrix[row, indices] = 1.0
+    return matrix
+
+
+def _targets(fields: List[str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Candidate phrases of every field and the field index of each phrase.
+    """
+    phrases, owners = [], []
+    for index, field in enumerate(fields):
+        for phrase in dict.fromkeys([normalize_header(field)] + [normalize_header(s) for s in SYNONYMS.get(field, [])]):
+            phrases.append(phrase)
+            owners.append(index)
+    return phrases, np.asarray(owners)
+
+
+class HeaderMatcher:
+    """
+    Scores vendor headers against JC fields with vectorised string similarity.
+
+    Every (header, field) score is the best match over the field's name and
+    synonyms of: exact normalised equality (1.0), or a weighted mix of
+    character-trigram cosine and token Jaccard similarity. Target features are
+    built once; scoring a file is a couple of matrix products.
+    """
+
+    def __init__(self, fields: List[str] = JC_FIELDS):
+        self.fields = list(fields)
+        self._phrases, self._owners = _targets(self.fields)
+        self._phrase_index = {phrase: i for i, phrase in enumerate(self._phrases)}
+        self._ngrams = _ngram_matrix(self._phrases)
+        self._tokens = _token_matrix(self._phrases)
+        self._token_counts = self._tokens.sum(axis=1)
+        # Phrases are grouped by field, so each field's columns start at these offsets
+        self._starts = np.flatnonzero(np.r_[True, self._owners[1:] != self._owners[:-1]])
+
+    def _value_evidence(self, headers: List[str], profiles: Dict[str, Dict]) -> np.ndarray:
+        """
+        Pattern hit ratio of each header's column for the pattern backing each field.
+        """
+        names = sorted(set(VALUE_PATTERNS.values()))
+        hits = np.array([
+            [(profiles.get(header) or {}).get("patterns", {}).get(name, 0.0) for name in names] for header in headers
+        ], dtype=np.float32)
+        evidence = np.zeros((len(headers), len(self.fields)), dtype=np.float32)
+        for col, field in enumerate(self.fields):
+            if field in VALUE_PATTERNS:
+                evidence[:, col] = hits[:, names.index(VALUE_PATTERNS[field])]
+        return evidence
+
+    def score(self, headers: List[str], profiles: Optional[Dict[str, Dict]] = None) -> np.ndarray:
+        """
+        Similarity matrix of shape (len(headers), len(fields)) with values in [0, 1].
+
+        With column profiles, columns whose values look like what a field holds
+        (SKUs, prices, URLs, metal names) score higher for that field.
+        """
+        if not headers:
+            return np.zeros((0, len(self.fields)), dtype=np.float32)
+        normalized = [normalize_header(header) for header in headers]
+        cosine = _ngram_matrix(normalized) @ self._ngrams.T
+        tokens = _token_matrix(normalized)
+        intersection = tokens @ self._tokens.T
+        union = tokens.sum(axis=1, keepdims=True) + self._token_counts[None, :] - intersection
+        jaccard = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+        phrase_scores = NGRAM_WEIGHT * cosine + TOKEN_WEIGHT * jaccard
+        for row, text in enumerate(normalized):
+            exact = self._phrase_index.get(text)
+            if exact is not None:
+                phrase_scores[row, exact] = 1.0
+        scores = np.maximum.reduceat(phrase_scores, self._starts, axis=1).clip(0.0, 1.0)
+        if profiles:
+            scores += VALUE_WEIGHT * self._value_evidence(headers, profiles) * (1.0 - scores)
+        return scores
+
+    def match(
+        self,
+        headers: List[str],
+        profiles: Optional[Dict[str, Dict]] = None,
+        min_score: float = MIN_SCORE,
+    ) -> Dict:
+        """
+        One-to-one assignment of headers to fields, best scores first.
+
+        Returns:
+            Dict in the MappingItem shape: every field maps to
+            {"vendor_field", "confidence"} and unassigned headers are listed
+            in other_fields with their best score
+        """
+        scores = self.score(headers, profiles)
+        item = {field: {"vendor_field": "", "confidence": 0.0} for field in self.fields}
+        assigned_headers = set()
+        if scores.size:
+            order = np.argsort(-scores, axis=None, kind="stable")
+            rows, cols = np.unravel_index(order, scores.shape)
+            assigned_fields = set()
+            for row, col in zip(rows.tolist(), cols.tolist()):
+                value = float(scores[row, col])
+                if value < min_score:
+                    break
+                if row in assigned_headers or col in assigned_fields:
+                    continue
+                item[self.fields[col]] = {"vendor_field": headers[row], "confidence": round(value, 3)}
+                assigned_headers.add(row)
+                assigned_fields.add(col)
+                if len(assigned_fields) == len(self.fields):
+                    break
+        best = scores.max(axis=1) if scores.size else []
+        item["other_fields"] = [
+            {"vendor_field": header, "confidence": round(float(best[row]), 3)}
+            for row, header in enumerate(headers) if row not in assigned_headers
+        ]
+        return item
+
+
+_matcher: Optional[HeaderMatcher] = None
+
+
+def get_matcher() -> HeaderMatcher:
+    """Shared matcher for the JC fields, built on first use."""
+    global _matcher
+    if _matcher is None:
+        _matcher = HeaderMatcher()
+    return _matcher
@@ -0,0 +1,42 @@
+import base64
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+# ============================================================================
+# KEYSET PAGINATION
+# ============================================================================
+
+def encode_cursor(timestamp: datetime, row_id: Any) -> str:
+    """
+    Opaque cursor for the position after the row with this timestamp and id.
+    """
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{row_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Timestamp and id of a cursor from encode_cursor; raises ValueError for anything else.
+    """
+    try:
+        text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, row_id = text.split("|", 1)
+        return datetime.fromisoformat(timestamp), row_id
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}") from None
+
+
+def older_than(timestamp_column: Any, id_column: Any, cursor: Optional[str]) -> Any:
+    """
+    Filter for the rows after cursor in newest-first (timestamp, id) order.
+
+    Combined with an equality filter on the index's leading column, this is a
+    range scan of the index, so every page costs the same however deep it is.
+    Without a cursor it matches every row.
+    """
+    if not cursor:
+        return and_(True)
+    timestamp, row_id = decode_cursor(cursor)
+    row_id = id_column.type.python_type(row_id)
+    return or_(timestamp_column < timestamp, and_(timestamp_column == timestamp, id_column < row_id))
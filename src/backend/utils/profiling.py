@@ -0,0 +1,259 @@
+import csv
+import itertools
+import math
+import os
+import random
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.core.metrics import track_stage
+from backend.utils.readers import (
+    DELIMITED_EXTENSIONS,
+    EXCEL_EXTENSIONS,
+    JSON_EXTENSIONS,
+    get_dialect,
+    iter_json_records,
+    load_upload_meta,
+    read_vendor_file,
+    read_vendor_headers,
+    update_upload_meta,
+)
+
+# Bump when the profile contents change so cached profiles are recomputed
+PROFILE_VERSION = 2
+
+# Rows kept by the reservoir
+SAMPLE_ROWS = 2_000
+
+# Delimited files up to this size are streamed whole through the reservoir;
+# larger ones are sampled from random blocks so the cost does not grow with the file
+FULL_SCAN_BYTES = 8 * 1024 * 1024
+BLOCK_BYTES = 64 * 1024
+BLOCK_COUNT = 64
+
+# JSON records read at most (records must be decoded in order)
+SCAN_RECORDS = 50_000
+
+# Share of non-empty values that must agree for a column dtype to be inferred
+DTYPE_AGREEMENT = 0.95
+
+# Value patterns reported per column, as the share of non-empty values matching
+PATTERNS = {
+    "sku": r"^(?=.{3,40}$)(?=.*\d)(?=.*[A-Za-z])[A-Za-z0-9]+(?:[-_./#][A-Za-z0-9]+)*$",
+    "price": r"^(?:[$€£]\s?\d[\d,]*(?:\.\d{1,2})?|\d[\d,]*\.\d{2})$",
+    "url": r"(?i)^(?:(?:https?://|www\.)\S+|\S+\.(?:jpe?g|png|gif|webp|tiff?|bmp|svg))$",
+    "metal": r"(?i)\b(?:gold|silver|platinum|palladium|titanium|tungsten|sterling|brass|copper|stainless"
+             r"|rhodium|\d{1,2}\s?(?:k|kt|karat))\b|(?<![\d.])(?:925|950)(?![\d.])",
+}
+_TYPE_PATTERNS = {
+    "boolean": r"(?i)^(?:true|false|yes|no|y|n)$",
+    "integer": r"^[-+]?\d{1,18}$",
+    "float": r"^[-+]?(?:\d[\d,]*)?\.?\d+(?:[eE][-+]?\d+)?$",
+    "date": r"^(?:\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}/\d{2,4})(?:[ T]\d{1,2}:\d{2}(?::\d{2})?)?$",
+}
+
+_EXAMPLES = 3
+_EXAMPLE_CHARS = 40
+
+# ============================================================================
+# SAMPLING
+# ============================================================================
+
+class ReservoirSampler:
+    """
+    Uniform sample of at most k items from a stream of unknown length.
+
+    Uses Algorithm L: after the reservoir fills, the number of items to skip
+    before the next replacement is drawn directly, so the random number
+    generator is consulted O(k log(n/k)) times rather than once per item.
+    """
+
+    def __init__(self, k: int, seed: Optional[int] = None):
+        self.k = k
+        self.items: List[Any] = []
+        self.seen = 0
+        self._rng = random.Random(seed)
+        self._w = 1.0
+        self._next = 0
+
+    def _advance(self) -> None:
+        self._w *= math.exp(math.log(self._rng.random()) / self.k)
+        # Index of the next item to replace, counted from the item just taken
+        self._next = self.seen + 1 + int(math.log(self._rng.random()) / math.log(1 - self._w))
+
+    def extend(self, items: Iterable[Any]) -> None:
+        for item in items:
+            if len(self.items) < self.k:
+                self.items.append(item)
+                if len(self.items) == self.k:
+                    self._advance()
+            elif self.seen == self._next:
+                self.items[self._rng.randrange(self.k)] = item
+                self._advance()
+            self.seen += 1
+
+
+def _data_offset(file_path: str, skip_lines: int) -> int:
+    with open(file_path, 'rb') as f:
+        for _ in range(skip_lines):
+            f.readline()
+        return f.tell()
+
+
+def _block_lines(file_path: str, start: int, rng: random.Random) -> Iterable[bytes]:
+    """
+    Complete lines from BLOCK_COUNT blocks at stratified random offsets after start.
+    """
+    span = os.path.getsize(file_path) - start
+    stride = span / BLOCK_COUNT
+    with open(file_path, 'rb') as f:
+        for i in range(BLOCK_COUNT):
+            offset = start + int((i + rng.random()) * max(0.0, stride - BLOCK_BYTES))
+            f.seek(offset)
+            block = f.read(BLOCK_BYTES)
+            lines = block.split(b'\n')
+            # The first line is partial unless the block starts at a line boundary,
+            # the last one unless the block reached the end of the file
+            yield from lines[1:-1] if offset > start else lines[:-1]
+
+
+def _sample_delimited(file_path: str, width: int, seed: int) -> List[List[str]]:
+    dialect = get_dialect(file_path)
+    skip = dialect["header_row"] + (1 if dialect["has_header"] else 0)
+    sampler = ReservoirSampler(SAMPLE_ROWS, seed)
+    options = {"delimiter": dialect["delimiter"], "quotechar": dialect["quotechar"]}
+    single_byte_lines = not dialect["encoding"].startswith("utf-16")
+
+    if os.path.getsize(file_path) <= FULL_SCAN_BYTES or not single_byte_lines:
+        with open(file_path, 'r', encoding=dialect["encoding"], errors='replace', newline='') as f:
+            reader = csv.reader(f, **options)
+            for _ in range(skip):
+                next(reader, None)
+            # Without byte-addressable lines a big file can only be read from the start
+            sampler.extend(reader if single_byte_lines else itertools.islice(reader, SCAN_RECORDS))
+    else:
+        lines = _block_lines(file_path, _data_offset(file_path, skip), random.Random(seed))
+        text = (line.decode(dialect["encoding"], errors='replace').rstrip('\r') for line in lines)
+        # Lines cut inside a quoted value come out with the wrong width and are dropped
+        sampler.extend(row for row in csv.reader(text, **options) if len(row) == width)
+    return [row[:width] + [None] * (width - len(row)) for row in sampler.items]
+
+
+def sample_rows(file_path: str, seed: int = 0) -> pd.DataFrame:
+    """
+    Uniform row sample of an upload, with the vendor headers as columns.
+    """
+    lower_path = file_path.lower()
+    if lower_path.endswith(EXCEL_EXTENSIONS):
+        # Workbooks cannot be read out of order; the head of every sheet stands in for the sample
+        return read_vendor_file(file_path, nrows=SAMPLE_ROWS, compact=False).astype(object)
+    columns = read_vendor_headers(file_path)
+    if lower_path.endswith(DELIMITED_EXTENSIONS):
+        rows = _sample_delimited(file_path, len(columns), seed)
+    elif lower_path.endswith(JSON_EXTENSIONS):
+        sampler = ReservoirSampler(SAMPLE_ROWS, seed)
+        sampler.extend(itertools.islice(iter_json_records(file_path), SCAN_RECORDS))
+        rows = [[record.get(column) for column in columns] for record in sampler.items]
+    else:
+        raise ValueError(f"Unsupported file type: {os.path.basename(file_path)}")
+    return pd.DataFrame(rows, columns=columns, dtype=object)
+
+# ============================================================================
+# PROFILING
+# ============================================================================
+
+def profile_frame(frame: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-column statistics of a sampled frame.
+
+    Every distinct cell value is classified once; the results are broadcast
+    back to the (rows, columns) grid and reduced per column.
+
+    Returns:
+        Dict mapping each column to its dtype, null_ratio, distinct count,
+        pattern hit ratios and a few example values
+    """
+    if frame.empty:
+        return {
+            str(column): {"dtype": "empty", "null_ratio": 1.0, "distinct": 0, "patterns": {}, "examples": []}
+            for column in frame.columns
+        }
+    grid = frame.to_numpy(dtype=object)
+    codes, uniques = pd.factorize(grid.ravel(), use_na_sentinel=True)
+    codes = codes.reshape(grid.shape)
+    values = pd.Series(uniques, dtype=object).astype(str).str.strip()
+
+    def classify(pattern: str) -> np.ndarray:
+        # One slot past the uniques answers for missing values (code -1)
+        hits = values.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+        return np.append(hits, False)[codes]
+
+    null = (codes == -1) | np.append((values == "").to_numpy(), True)[codes]
+    present = ~null
+    non_null = present.sum(axis=0)
+    denominator = np.maximum(non_null, 1)
+    ratios = {name: (classify(pattern) & present).sum(axis=0) / denominator for name, pattern in PATTERNS.items()}
+    type_ratios = {name: (classify(pattern) & present).sum(axis=0) / denominator
+                   for name, pattern in _TYPE_PATTERNS.items()}
+
+    # Distinct non-null values per column: count value changes down each sorted column
+    ordered = np.sort(np.where(null, -1, codes), axis=0)
+    distinct = (ordered[0] >= 0).astype(int) + ((np.diff(ordered, axis=0) != 0) & (ordered[1:] >= 0)).sum(axis=0)
+
+    profiles = {}
+    for index, column in enumerate(frame.columns):
+        if non_null[index] == 0:
+            dtype = "empty"
+        else:
+            dtype = next(
+                (name for name in ("boolean", "integer", "float", "date")
+                 if type_ratios[name][index] >= DTYPE_AGREEMENT),
+                "string"
+            )
+        column_codes = codes[present[:, index], index]
+        examples = [values.iat[code][:_EXAMPLE_CHARS] for code in pd.unique(column_codes)[:_EXAMPLES]]
+        profiles[str(column)] = {
+            "dtype": dtype,
+            "null_ratio": round(float(null[:, index].mean()), 3),
+            "distinct": int(distinct[index]),
+            "patterns": {name: round(float(ratio[index]), 3) for name, ratio in ratios.items() if ratio[index] > 0},
+            "examples": examples,
+        }
+    return profiles
+
+
+def get_column_profiles(file_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Column profiles of an upload, computed from a row sample on first use and
+    recorded in its metadata.
+    """
+    cached = load_upload_meta(file_path).get("profile")
+    file_size = os.path.getsize(file_path)
+    if cached and cached.get("version") == PROFILE_VERSION and cached.get("file_size") == file_size:
+        return cached["columns"]
+    with track_stage("profile"):
+        sample = sample_rows(file_path)
+        profiles = profile_frame(sample)
+    update_upload_meta(file_path, profile={
+        "version": PROFILE_VERSION,
+        "file_size": file_size,
+        "rows_sampled": len(sample),
+        "columns": profiles,
+    })
+    return profiles
+
+
+def describe_profile(header: str, profile: Dict[str, Any]) -> str:
+    """
+    One-line summary of a column profile for the mapping prompt.
+    """
+    parts = [profile["dtype"], f"{profile['null_ratio']:.0%} empty", f"{profile['distinct']} distinct"]
+    patterns = [f"{name} {ratio:.0%}" for name, ratio in profile.get("patterns", {}).items() if ratio >= 0.5]
+    if patterns:
+        parts.append("looks like " + ", ".join(patterns))
+    line = f"- {header}: " + ", ".join(parts)
+    if profile.get("examples"):
+        line += "; e.g. " + ", ".join(repr(example) for example in profile["examples"])
+    return line
@@ -0,0 +1,756 @@
+import codecs
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter
+from concurrent.futures import wait
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.core.config import settings
+from backend.core.metrics import BYTES_PROCESSED, ROWS_PROCESSED, track_stage
+from backend.utils.storage import meta_path
+
+# Only the head of the file is inspected when sniffing
+SNIFF_BYTES = 64 * 1024
+
+DELIMITED_EXTENSIONS = ('.csv', '.tsv', '.txt')
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+JSON_EXTENSIONS = ('.json',)
+
+# Partition boundaries are searched in blocks of this size
+UPLOAD_SCAN_BYTES = 1024 * 1024
+
+# Streaming readers never hold more than this many rows / characters at once
+DEFAULT_CHUNK_ROWS = 50_000
+JSON_READ_CHARS = 1024 * 1024
+
+# Rows read to estimate the in-memory size of a vendor frame
+ESTIMATE_SAMPLE_ROWS = 1000
+
+try:
+    import pyarrow  # noqa: F401
+    ARROW_STRINGS = True
+except ImportError:
+    ARROW_STRINGS = False
+
+_CANDIDATE_DELIMITERS = ",\t;|"
+
+# ============================================================================
+# UPLOAD METADATA
+# ============================================================================
+
+def load_upload_meta(file_path: str) -> Dict[str, Any]:
+    """
+    Load the metadata record stored against an upload (empty if none yet).
+    """
+    try:
+        with open(meta_path(file_path), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def update_upload_meta(file_path: str, **fields: Any) -> Dict[str, Any]:
+    """
+    Merge fields into the metadata record of an upload and persist it atomically.
+    """
+    meta = load_upload_meta(file_path)
+    meta.update(fields)
+    record_path = meta_path(file_path)
+    os.makedirs(os.path.dirname(record_path), exist_ok=True)
+    tmp_path = f"{record_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, record_path)
+    return meta
+
+# ============================================================================
+# SNIFFING
+# ============================================================================
+
+def _detect_encoding(raw: bytes, truncated: bool) -> str:
+    if raw.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    try:
+        raw.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        # The sample may end in the middle of a multi-byte character
+        if truncated and e.reason == 'unexpected end of data':
+            return 'utf-8'
+    try:
+        raw.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def _looks_numeric(value: str) -> bool:
+    try:
+        float(value.replace(',', ''))
+        return True
+    except ValueError:
+        return False
+
+
+def sniff_delimited(file_path: str, sample_size: int = SNIFF_BYTES) -> Dict[str, Any]:
+    """
+    Detect encoding, delimiter, quoting and header row from the head of a delimited file.
+
+    Args:
+        file_path: Path of the uploaded CSV/TSV/TXT file
+        sample_size: Number of bytes to inspect
+
+    Returns:
+        Dict describing how the file should be parsed
+    """
+    with open(file_path, 'rb') as f:
+        raw = f.read(sample_size)
+        truncated = bool(f.read(1))
+
+    encoding = _detect_encoding(raw, truncated)
+    text = raw.decode(encoding, errors='ignore')
+    if truncated and '\n' in text:
+        # Drop the trailing partial line
+        text = text[:text.rfind('\n') + 1]
+
+    default_delimiter = '\t' if file_path.lower().endswith('.tsv') else ','
+    try:
+        dialect = csv.Sniffer().sniff(text, delimiters=_CANDIDATE_DELIMITERS)
+        delimiter, quotechar = dialect.delimiter, dialect.quotechar or '"'
+    except csv.Error:
+        delimiter, quotechar = default_delimiter, '"'
+
+    # Record the starting line of every non-blank row so preamble lines can be skipped
+    rows = []
+    reader = csv.reader(io.StringIO(text), delimiter=delimiter, quotechar=quotechar)
+    start_line = 0
+    try:
+        for row in reader:
+            if any(cell.strip() for cell in row):
+                rows.append((start_line, row))
+            start_line = reader.line_num
+    except csv.Error:
+        pass
+
+    header_row = 0
+    has_header = True
+    if rows:
+        modal_width = Counter(len(row) for _, row in rows).most_common(1)[0][0]
+        header_row, first = next((line, row) for line, row in rows if len(row) == modal_width)
+        cells = [cell.strip() for cell in first if cell.strip()]
+        has_header = not cells or not all(_looks_numeric(cell) for cell in cells)
+
+    return {
+        "encoding": encoding,
+        "delimiter": delimiter,
+        "quotechar": quotechar,
+        "header_row": header_row,
+        "has_header": has_header,
+        "file_size": os.path.getsize(file_path),
+    }
+
+
+def get_dialect(file_path: str) -> Dict[str, Any]:
+    """
+    Return the recorded dialect of a delimited upload, sniffing and recording it on first use.
+    """
+    dialect = load_upload_meta(file_path).get("dialect")
+    if dialect and dialect.get("file_size") == os.path.getsize(file_path):
+        return dialect
+    dialect = sniff_delimited(file_path)
+    update_upload_meta(file_path, dialect=dialect)
+    return dialect
+
+# ============================================================================
+# EXCEL WORKBOOKS
+# ============================================================================
+
+def excel_sheets(file_path: str) -> List[Dict[str, Any]]:
+    """
+    Name and header row of every non-empty sheet of a workbook, in workbook
+    order. The result is recorded against the upload.
+    """
+    meta = load_upload_meta(file_path)
+    file_size = os.path.getsize(file_path)
+    if meta.get("sheets") is not None and meta.get("sheets_file_size") == file_size:
+        return meta["sheets"]
+    frames = pd.read_excel(file_path, sheet_name=None, nrows=0)
+    sheets = [
+        {"name": str(name), "headers": [str(col) for col in frame.columns]}
+        for name, frame in frames.items() if len(frame.columns)
+    ]
+    update_upload_meta(file_path, sheets=sheets, sheets_file_size=file_size)
+    return sheets
+
+
+def sheet_layouts(file_path: str) -> List[Dict[str, Any]]:
+    """
+    Group the sheets of a workbook by header row.
+
+    Returns:
+        One {"headers", "sheets"} entry per distinct header row, in order of
+        first appearance
+    """
+    layouts: Dict[tuple, Dict[str, Any]] = {}
+    for sheet in excel_sheets(file_path):
+        layout = layouts.setdefault(tuple(sheet["headers"]), {"headers": sheet["headers"], "sheets": []})
+        layout["sheets"].append(sheet["name"])
+    return list(layouts.values())
+
+
+def _read_sheet(
+    file_path: str,
+    sheet_name: str,
+    usecols: Optional[List[str]],
+    nrows: Optional[int],
+    compact: bool = False,
+) -> pd.DataFrame:
+    # Sheets need not share every requested column
+    wanted = set(usecols) if usecols is not None else None
+    frame = pd.read_excel(
+        file_path, sheet_name=sheet_name, nrows=nrows,
+        usecols=(lambda column: str(column) in wanted) if wanted is not None else None,
+    )
+    frame.columns = [str(col) for col in frame.columns]
+    # Compacted in the worker, so the frame is also cheaper to hand back
+    return compact_frame(frame) if compact else frame
+
+
+def _read_sheet_to_file(
+    file_path: str,
+    sheet_name: str,
+    usecols: Optional[List[str]],
+    nrows: Optional[int],
+    compact: bool,
+    out_path: str,
+) -> str:
+    """
+    Parse one sheet in a pool worker into a pickle at out_path; returns out_path.
+    """
+    _read_sheet(file_path, sheet_name, usecols, nrows, compact).to_pickle(out_path)
+    return out_path
+
+
+def read_excel_sheets(
+    file_path: str,
+    usecols: Optional[List[str]] = None,
+    nrows: Optional[int] = None,
+    compact: bool = False,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Read every non-empty sheet of a workbook, parsing sheets in parallel in
+    the shared process pool. Workers write each sheet to a temporary file
+    and hand back only its path, like the row partitions of a render.
+
+    Returns:
+        Dict mapping each sheet name to its DataFrame, in workbook order
+    """
+    from backend.core.workers import get_process_pool, in_worker
+
+    names = [sheet["name"] for sheet in excel_sheets(file_path)]
+    if len(names) <= 1 or in_worker():
+        return {name: _read_sheet(file_path, name, usecols, nrows, compact) for name in names}
+    pool = get_process_pool()
+    sheet_dir = tempfile.mkdtemp(prefix="sheets-")
+    futures = [
+        pool.submit(
+            _read_sheet_to_file, file_path, name, usecols, nrows, compact,
+            os.path.join(sheet_dir, f"{index:05d}.pkl"),
+        )
+        for index, name in enumerate(names)
+    ]
+    try:
+        return {name: pd.read_pickle(future.result()) for name, future in zip(names, futures)}
+    finally:
+        # Sheets still being written after a failure would land in a removed directory
+        wait(futures)
+        shutil.rmtree(sheet_dir, ignore_errors=True)
+
+
+def excel_row_count(file_path: str) -> Optional[int]:
+    """
+    Total data rows across the sheets of an .xlsx workbook, taken from the
+    sheet dimensions without reading any cells (None when not recorded).
+    """
+    if not file_path.lower().endswith('.xlsx'):
+        return None
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True)
+    try:
+        rows = [sheet.max_row for sheet in workbook.worksheets]
+    finally:
+        workbook.close()
+    if any(count is None for count in rows):
+        return None
+    return sum(max(count - 1, 0) for count in rows)
+
+# ============================================================================
+# COMPACT DTYPES
+# ============================================================================
+
+def _is_text(series: pd.Series) -> bool:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    return series.dtype.kind in "OT" or isinstance(series.dtype, pd.StringDtype)
+
+
+def _text_dtype(sample: pd.Series, category_ratio: float) -> Optional[str]:
+    """
+    Compact dtype for a text column judged by a sample of its values, or None to keep it.
+    """
+    if not _is_text(sample):
+        return None
+    count = sample.notna().sum()
+    if not count:
+        return None
+    if sample.nunique() <= category_ratio * count:
+        return "category"
+    if ARROW_STRINGS and pd.api.types.infer_dtype(sample, skipna=True) == "string":
+        return "string[pyarrow]"
+    return None
+
+
+def _compact_number(series: pd.Series) -> pd.Series:
+    kind = series.dtype.kind
+    if kind in "iu":
+        return pd.to_numeric(series, downcast="unsigned" if kind == "u" else "integer")
+    if kind == "f":
+        # Only when every value survives float32 exactly and inside the range
+        # where float32 is written in the same notation, so rendered text is unchanged
+        magnitude = series.abs()
+        if ((magnitude >= 1e6) | ((magnitude < 1e-4) & (magnitude > 0))).any():
+            return series
+        narrow = series.astype(np.float32)
+        if (narrow.astype(np.float64) == series).sum() == series.notna().sum():
+            return narrow
+    return series
+
+
+def compact_frame(df: pd.DataFrame, category_ratio: Optional[float] = None, text: bool = True) -> pd.DataFrame:
+    """
+    Convert the columns of a vendor frame to compact dtypes in place.
+
+    Text columns with few distinct values (metal types, genders, ...) become
+    categoricals; other text columns become arrow-backed strings when
+    pyarrow is installed. Both are decided on the first ESTIMATE_SAMPLE_ROWS
+    values, as text_dtypes does for delimited files. Integers are downcast
+    to the narrowest type that holds them, and floats to float32 when no
+    value changes.
+
+    Args:
+        df: Frame as read by pandas
+        category_ratio: Most distinct values per non-null value for a
+            categorical (defaults to READ_CATEGORY_MAX_RATIO)
+        text: Also convert text columns; off for frames parsed with the
+            dtypes of text_dtypes
+
+    Returns:
+        The same frame
+    """
+    if category_ratio is None:
+        category_ratio = settings.READ_CATEGORY_MAX_RATIO
+    # Positional, since vendor files may repeat a header
+    for index in range(df.shape[1]):
+        series = df.iloc[:, index]
+        dtype = _text_dtype(series.iloc[:ESTIMATE_SAMPLE_ROWS], category_ratio) if text else None
+        df.isetitem(index, series.astype(dtype) if dtype else _compact_number(series))
+    return df
+
+
+def text_dtypes(sample: pd.DataFrame, category_ratio: Optional[float] = None) -> Dict[str, str]:
+    """
+    Parser dtypes (dtype=) for the text columns of a vendor file, decided on a sample of its rows.
+
+    Text is then stored compactly as it is parsed, instead of being
+    converted once the full object columns exist, which costs a second pass
+    and holds both forms at once. A column whose sample repeats values
+    becomes categorical even if the rest of the file does not; its values
+    are unchanged, it only saves less.
+    """
+    if category_ratio is None:
+        category_ratio = settings.READ_CATEGORY_MAX_RATIO
+    dtypes = {}
+    for column in sample.columns:
+        dtype = _text_dtype(sample[column], category_ratio)
+        if dtype:
+            dtypes[column] = dtype
+    return dtypes
+
+
+def estimate_frame_bytes(file_path: str, usecols: Optional[List[str]] = None, as_text: bool = False) -> int:
+    """
+    Estimate the memory a compacted read of a vendor file would take
+    (with as_text, as read_vendor_file reads it).
+
+    The head of the file is read and compacted. Its per-row footprint is
+    scaled by the row count: the sheet dimensions for .xlsx workbooks,
+    otherwise the file size over the size of the sampled rows as text.
+    """
+    sample = _read_frame(file_path, None, ESTIMATE_SAMPLE_ROWS, as_text=as_text)
+    if sample.empty:
+        return 0
+    lower_path = file_path.lower()
+    rows = excel_row_count(file_path)
+    if rows is None:
+        if lower_path.endswith(JSON_EXTENSIONS):
+            sample_bytes = len(sample.to_json(orient="records", lines=True).encode())
+        else:
+            sample_bytes = len(sample.to_csv(index=False, header=False).encode())
+        rows = os.path.getsize(file_path) * len(sample) / max(sample_bytes, 1)
+    if usecols is not None:
+        sample = sample[[column for column in sample.columns if column in set(usecols)]]
+    per_row = compact_frame(sample).memory_usage(index=False, deep=True).sum() / len(sample)
+    return int(per_row * rows)
+
+# ============================================================================
+# READERS
+# ============================================================================
+
+def _csv_options(file_path: str) -> Dict[str, Any]:
+    dialect = get_dialect(file_path)
+    options = {
+        "encoding": dialect["encoding"],
+        "encoding_errors": "replace",
+        "sep": dialect["delimiter"],
+        "quotechar": dialect["quotechar"],
+        "skiprows": dialect["header_row"],
+        "header": 0,
+    }
+    if not dialect["has_header"]:
+        options["header"] = None
+        width = len(pd.read_csv(file_path, nrows=1, **options).columns)
+        options["names"] = [f"Column{i + 1}" for i in range(width)]
+    return options
+
+
+def _iter_json_values(f: TextIO, read_size: int = JSON_READ_CHARS) -> Iterator[Any]:
+    """
+    Decode top-level values one at a time from a JSON array or NDJSON stream.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    in_array = None
+    while True:
+        # Skip whitespace and separators, pulling more text when the buffer runs dry
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            chunk = f.read(read_size)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+        if pos >= len(buffer):
+            return
+        if in_array is None:
+            in_array = buffer[pos] == "["
+            if in_array:
+                pos += 1
+                continue
+        if in_array and buffer[pos] == "]":
+            return
+        try:
+            value, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # The value straddles the end of the buffer
+            if eof:
+                raise
+            chunk = f.read(read_size)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+            continue
+        yield value
+
+
+def _flatten_record(record: Dict[str, Any], prefix: str = "", out: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    if out is None:
+        out = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            _flatten_record(value, f"{name}.", out)
+        elif isinstance(value, (dict, list)):
+            out[name] = json.dumps(value)
+        else:
+            out[name] = value
+    return out
+
+
+def iter_json_records(file_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream records from a JSON array or NDJSON file with nested objects
+    flattened to dotted column names.
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(2)
+    encoding = 'utf-16' if head in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE) else 'utf-8-sig'
+    with open(file_path, 'r', encoding=encoding, errors='replace') as f:
+        for value in _iter_json_values(f):
+            yield _flatten_record(value if isinstance(value, dict) else {"value": value})
+
+
+def json_columns(file_path: str) -> List[str]:
+    """
+    Return the union of flattened keys across all records of a JSON upload,
+    in order of first appearance. The result is recorded against the upload.
+    """
+    meta = load_upload_meta(file_path)
+    file_size = os.path.getsize(file_path)
+    if meta.get("columns") is not None and meta.get("columns_file_size") == file_size:
+        return meta["columns"]
+    columns: Dict[str, None] = {}
+    for record in iter_json_records(file_path):
+        for key in record:
+            columns.setdefault(key)
+    update_upload_meta(file_path, columns=list(columns), columns_file_size=file_size)
+    return list(columns)
+
+
+def _iter_json_frames(
+    file_path: str,
+    usecols: Optional[List[str]],
+    chunk_rows: int,
+    nrows: Optional[int] = None,
+) -> Iterator[pd.DataFrame]:
+    columns = list(usecols) if usecols is not None else json_columns(file_path)
+    batch: List[Dict[str, Any]] = []
+    emitted = 0
+    for record in iter_json_records(file_path):
+        if nrows is not None and emitted + len(batch) >= nrows:
+            break
+        if usecols is not None:
+            record = {key: record.get(key) for key in columns}
+        batch.append(record)
+        if len(batch) >= chunk_rows:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+            emitted += len(batch)
+            batch = []
+    if batch or not emitted:
+        yield pd.DataFrame.from_records(batch, columns=columns)
+
+
+def iter_vendor_chunks(
+    file_path: str,
+    usecols: Optional[List[str]] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    compact: bool = False,
+    as_text: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a vendor file as DataFrames of at most chunk_rows rows.
+
+    Args:
+        file_path: Path of the uploaded file
+        usecols: Only load these columns (optional)
+        chunk_rows: Maximum number of rows per chunk
+        compact: Convert each chunk to compact dtypes (see compact_frame)
+        as_text: Keep delimited values as written (see read_vendor_file)
+
+    Yields:
+        DataFrames sharing the same columns
+    """
+    lower_path = file_path.lower()
+    if lower_path.endswith(DELIMITED_EXTENSIONS):
+        options = _delimited_read_options(file_path, usecols, compact, as_text)
+        chunks = pd.read_csv(file_path, usecols=usecols, chunksize=chunk_rows, **options)
+    elif lower_path.endswith(JSON_EXTENSIONS):
+        chunks = _iter_json_frames(file_path, usecols, chunk_rows)
+    elif lower_path.endswith(EXCEL_EXTENSIONS):
+        yield _read_frame(file_path, usecols, None, compact)
+        return
+    else:
+        raise ValueError(f"Unsupported file type: {os.path.basename(file_path)}")
+    delimited = lower_path.endswith(DELIMITED_EXTENSIONS)
+    for chunk in chunks:
+        yield compact_frame(chunk, text=not delimited) if compact else chunk
+
+
+def _delimited_read_options(
+    file_path: str,
+    usecols: Optional[List[str]],
+    compact: bool,
+    as_text: bool,
+) -> Dict[str, Any]:
+    options = _csv_options(file_path)
+    if as_text:
+        options["dtype"] = str
+    if compact:
+        # Text is compacted while parsing
+        sample = pd.read_csv(file_path, usecols=usecols, nrows=ESTIMATE_SAMPLE_ROWS, **options)
+        dtypes = text_dtypes(sample)
+        if as_text:
+            # Columns left as plain text must not fall back to type inference
+            dtypes = {column: dtypes.get(column, str) for column in sample.columns}
+        options["dtype"] = dtypes
+    return options
+
+
+def _read_frame(
+    file_path: str,
+    usecols: Optional[List[str]],
+    nrows: Optional[int],
+    compact: bool = False,
+    as_text: bool = False,
+) -> pd.DataFrame:
+    lower_path = file_path.lower()
+    if lower_path.endswith(DELIMITED_EXTENSIONS):
+        options = _delimited_read_options(file_path, usecols, compact, as_text)
+        df = pd.read_csv(file_path, usecols=usecols, nrows=nrows, **options)
+        # Text was compacted while parsing; only numbers are narrowed afterwards
+        return compact_frame(df, text=False) if compact else df
+    if lower_path.endswith(JSON_EXTENSIONS):
+        frames = list(_iter_json_frames(file_path, usecols, DEFAULT_CHUNK_ROWS, nrows))
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    elif lower_path.endswith(EXCEL_EXTENSIONS):
+        # Sheets with different layouts are stacked on the union of their columns
+        frames = list(read_excel_sheets(file_path, usecols, nrows, compact).values())
+        if not frames:
+            return pd.DataFrame()
+        if len(frames) == 1:
+            return frames[0]
+        df = pd.concat(frames, ignore_index=True)
+    else:
+        raise ValueError(f"Unsupported file type: {os.path.basename(file_path)}")
+    return compact_frame(df) if compact else df
+
+
+def read_vendor_file(
+    file_path: str,
+    usecols: Optional[List[str]] = None,
+    nrows: Optional[int] = None,
+    compact: bool = True,
+    as_text: bool = False,
+) -> pd.DataFrame:
+    """
+    Read a vendor file in a single pass using its recorded dialect.
+
+    With as_text, delimited values are kept exactly as written ("001" and
+    "10.50" stay text) and parse the same as read_delimited_range, so a
+    file renders alike whether or not it is split into row partitions.
+
+    Args:
+        file_path: Path of the uploaded file
+        usecols: Only load these columns (optional)
+        nrows: Only load this many data rows (optional)
+        compact: Convert columns to compact dtypes (see compact_frame)
+        as_text: Skip type inference for delimited files
+
+    Returns:
+        DataFrame with the vendor headers as columns
+    """
+    with track_stage("parse"):
+        df = _read_frame(file_path, usecols, nrows, compact, as_text)
+    if nrows is None:
+        BYTES_PROCESSED.labels("parse").inc(os.path.getsize(file_path))
+        ROWS_PROCESSED.labels("parse").inc(len(df))
+    return df
+
+
+def read_vendor_headers(file_path: str) -> List[str]:
+    """
+    Read only the header row of a vendor file; for workbooks, the union of
+    the header rows of all sheets.
+    """
+    with track_stage("parse"):
+        if file_path.lower().endswith(JSON_EXTENSIONS):
+            return json_columns(file_path)
+        if file_path.lower().endswith(EXCEL_EXTENSIONS):
+            return list(dict.fromkeys(header for sheet in excel_sheets(file_path) for header in sheet["headers"]))
+        return [str(col) for col in _read_frame(file_path, None, 0).columns]
+
+# ============================================================================
+# ROW PARTITIONS
+# ============================================================================
+
+def delimited_partitions(file_path: str, parts: int, block_size: int = UPLOAD_SCAN_BYTES) -> List[Tuple[int, int]]:
+    """
+    Split the data rows of a delimited upload into at most `parts` byte
+    ranges of similar size that start and end on record boundaries.
+
+    A newline ends a record when an even number of quote characters precede
+    it, so quoted values spanning lines stay in one range. UTF-16 files
+    cannot be cut at arbitrary bytes and come back as a single range.
+
+    Returns:
+        List of (start, end) byte offsets, in file order
+    """
+    dialect = get_dialect(file_path)
+    size = os.path.getsize(file_path)
+    skip = dialect["header_row"] + (1 if dialect["has_header"] else 0)
+    if dialect["encoding"] == "utf-16":
+        parts = 1
+    quote = dialect["quotechar"].encode("latin-1")
+
+    starts: List[int] = []
+    data_start = 0 if skip == 0 else None
+    if data_start is not None:
+        starts.append(0)
+    step = (size / parts) if data_start is not None else 0
+    target = step
+    base = quotes = 0
+    with open(file_path, "rb") as f:
+        while len(starts) < parts:
+            block = f.read(block_size)
+            if not block:
+                break
+            position = max(int(target) - base, 0)
+            while position < len(block) and len(starts) < parts:
+                end = block.find(b"\n", position)
+                while end != -1 and (quotes + block.count(quote, 0, end)) % 2:
+                    end = block.find(b"\n", end + 1)
+                if end == -1:
+                    break
+                boundary = base + end + 1
+                if data_start is None:
+                    # Still inside the preamble and header rows
+                    skip -= 1
+                    position = end + 1
+                    if skip == 0:
+                        data_start = boundary
+                        starts.append(boundary)
+                        step = (size - data_start) / parts
+                        target = data_start + step
+                        position = int(target) - base
+                    continue
+                if boundary < size:
+                    starts.append(boundary)
+                target = max(data_start + step * len(starts), boundary)
+                position = int(target) - base
+            quotes += block.count(quote)
+            base += len(block)
+    if data_start is None:
+        return []
+    ends = starts[1:] + [size]
+    return [(start, end) for start, end in zip(starts, ends) if end > start]
+
+
+def read_delimited_range(
+    file_path: str,
+    start: int,
+    end: int,
+    columns: List[str],
+    usecols: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Read the records in a byte range from delimited_partitions as text.
+
+    Values are not type-inferred, so every range parses alike whatever
+    values it happens to hold; missing-value markers still become NaN.
+    """
+    options = _csv_options(file_path)
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return pd.read_csv(
+        io.BytesIO(data), header=None, names=columns, usecols=usecols, dtype=str,
+        encoding=options["encoding"], encoding_errors="replace",
+        sep=options["sep"], quotechar=options["quotechar"],
+    )
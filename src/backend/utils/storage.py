@@ -1,19 +1,357 @@
 # In src/backend/utils/storage.py
+import asyncio
+import hashlib
+import json
 import os
 import tempfile
-from typing import Optional
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from backend.core.config import settings
+from backend.core.log import get_logger
+
+logger = get_logger(__name__)
+
+# Uploads are hashed and written in pieces of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Artifact kinds and the directory each one lives in
+RAW = "raw"
+RESULT = "result"
+CACHE = "cache"
+ARTIFACT_DIRS = {RAW: "objects", RESULT: "results", CACHE: "cache"}
+
+# Partially written uploads older than this are abandoned
+_STALE_PART_SECONDS = 3600
+
+
+def meta_path(file_path: str) -> str:
+    """
+    Path of the metadata sidecar stored next to an artifact.
+    """
+    directory, name = os.path.split(file_path)
+    return os.path.join(directory, ".meta", f"{name}.json")
+
+
+def _shard(key: str) -> str:
+    return os.path.join(key[:2], key[2:4])
+
 
 class FileStorage:
-    def __init__(self, storage_path: str = "uploads"):
+    """
+    Content-addressed, sharded storage for uploads and generated artifacts.
+
+    Raw uploads are stored once under their SHA-256 in ``objects/`` and every
+    upload gets a cheap alias (the public ``file_id``) pointing at the object.
+    Results and cache artifacts live in ``results/`` and ``cache/``. Every
+    tree is sharded two levels deep and swept by ``collect_garbage``
+    according to the per-kind TTLs, except results that stored uploads
+    still reference.
+    """
+
+    def __init__(self, storage_path: str = "uploads", ttls: Optional[Dict[str, float]] = None):
         self.storage_path = storage_path
+        self.objects_path = os.path.join(storage_path, ARTIFACT_DIRS[RAW])
+        self.aliases_path = os.path.join(storage_path, ".aliases")
+        self.ttls = ttls or {
+            RAW: settings.STORAGE_RAW_TTL_HOURS * 3600,
+            RESULT: settings.STORAGE_RESULT_TTL_HOURS * 3600,
+            CACHE: settings.STORAGE_CACHE_TTL_HOURS * 3600,
+        }
+        self._usage: Dict[str, Dict[str, int]] = {}
         os.makedirs(storage_path, exist_ok=True)
-    
+
     def save_file(self, file_content: bytes, filename: str) -> str:
         file_path = os.path.join(self.storage_path, filename)
         with open(file_path, "wb") as f:
             f.write(file_content)
         return file_path
-    
+
     def get_file_path(self, filename: str) -> Optional[str]:
         file_path = os.path.join(self.storage_path, filename)
-        return file_path if os.path.exists(file_path) else None
\ No newline at end of file
+        return file_path if os.path.exists(file_path) else None
+
+    # ------------------------------------------------------------------
+    # Layout
+    # ------------------------------------------------------------------
+
+    def object_path(self, content_hash: str, extension: str) -> str:
+        return os.path.join(self.objects_path, _shard(content_hash), f"{content_hash}{extension.lower()}")
+
+    def artifact_path(self, kind: str, name: str) -> str:
+        """
+        Path of a named result or cache artifact, sharded by a hash of its name.
+        """
+        key = hashlib.sha1(name.encode()).hexdigest()
+        return os.path.join(self.storage_path, ARTIFACT_DIRS[kind], _shard(key), name)
+
+    def new_result_path(self, extension: str, key: Optional[str] = None) -> str:
+        """
+        Reserve the path of a result file and create its shard directory.
+
+        Results rendered from a known input are named after the key, so
+        rendering the same input again finds the earlier file; without a
+        key the name is random.
+        """
+        result_path = self.artifact_path(RESULT, f"{key or uuid.uuid4()}{extension}")
+        os.makedirs(os.path.dirname(result_path), exist_ok=True)
+        return result_path
+
+    def _alias_path(self, file_id: str) -> str:
+        name = os.path.basename(file_id)
+        return os.path.join(self.aliases_path, _shard(hashlib.sha1(name.encode()).hexdigest()), name)
+
+    # ------------------------------------------------------------------
+    # Uploads and aliases
+    # ------------------------------------------------------------------
+
+    async def save_upload(self, upload: Any, extension: str) -> Dict[str, Any]:
+        """
+        Stream an upload to disk while hashing it and store it by content hash.
+
+        Args:
+            upload: Object with an async read(size) method (e.g. fastapi.UploadFile)
+            extension: File extension of the upload, including the dot
+
+        Returns:
+            Dict with the content hash, object path, size and whether the
+            content was already stored
+        """
+        os.makedirs(self.objects_path, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.objects_path, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as buffer:
+                while True:
+                    chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    buffer.write(chunk)
+                    size += len(chunk)
+
+            content_hash = digest.hexdigest()
+            object_path = self.object_path(content_hash, extension)
+            deduplicated = os.path.exists(object_path)
+            if deduplicated:
+                os.remove(tmp_path)
+                self.touch(object_path)
+            else:
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(tmp_path, object_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return {
+            "content_hash": content_hash,
+            "object_path": object_path,
+            "size": size,
+            "deduplicated": deduplicated,
+        }
+
+    def add_alias(self, file_id: str, content_hash: str, extension: str) -> None:
+        """
+        Point a public file_id at a stored object.
+        """
+        alias_path = self._alias_path(file_id)
+        os.makedirs(os.path.dirname(alias_path), exist_ok=True)
+        tmp_path = f"{alias_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"content_hash": content_hash, "extension": extension.lower()}, f)
+        os.replace(tmp_path, alias_path)
+
+    def get_alias(self, file_id: str) -> Optional[Dict[str, str]]:
+        try:
+            with open(self._alias_path(file_id), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def resolve(self, file_id: str) -> Optional[str]:
+        """
+        Resolve a file_id to the path of its stored content.
+
+        Aliases resolve to their content-addressed object, result ids to the
+        sharded result file, and files written before the sharded layout
+        existed are found directly in the storage path. Resolving an
+        artifact counts as using it for retention purposes.
+        """
+        alias = self.get_alias(file_id)
+        if alias:
+            path = self.object_path(alias["content_hash"], alias["extension"])
+        else:
+            path = self.artifact_path(RESULT, os.path.basename(file_id))
+            if not os.path.exists(path):
+                return self.get_file_path(os.path.basename(file_id))
+        if not os.path.exists(path):
+            return None
+        self.touch(path)
+        return path
+
+    def touch(self, path: str) -> None:
+        """
+        Mark an artifact as recently used so the GC keeps it.
+        """
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    # ------------------------------------------------------------------
+    # Result references
+    # ------------------------------------------------------------------
+
+    def _result_refs(self, result_path: str) -> List[str]:
+        try:
+            with open(meta_path(result_path), "r") as f:
+                return json.load(f).get("refs", [])
+        except (OSError, ValueError):
+            return []
+
+    def _write_result_refs(self, result_path: str, refs: List[str]) -> None:
+        record_path = meta_path(result_path)
+        os.makedirs(os.path.dirname(record_path), exist_ok=True)
+        tmp_path = f"{record_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"refs": sorted(refs)}, f)
+        os.replace(tmp_path, record_path)
+
+    def add_result_ref(self, result_path: str, object_path: str, key: str) -> None:
+        """
+        Record that the upload stored at object_path uses a result under key.
+
+        Referenced results outlive the result TTL; a reference lapses when
+        the referencing upload is collected or the reference is released.
+        """
+        holder = f"{os.path.basename(object_path)}:{key}"
+        refs = self._result_refs(result_path)
+        if holder not in refs:
+            self._write_result_refs(result_path, refs + [holder])
+
+    def release_result_ref(self, result_path: str, object_path: str, key: str) -> None:
+        """
+        Drop a reference recorded by add_result_ref.
+        """
+        holder = f"{os.path.basename(object_path)}:{key}"
+        refs = self._result_refs(result_path)
+        if holder in refs:
+            refs.remove(holder)
+            self._write_result_refs(result_path, refs)
+
+    def _live_result_refs(self, result_path: str) -> List[str]:
+        """
+        References of a result whose uploads still exist; lapsed ones are pruned.
+        """
+        refs = self._result_refs(result_path)
+        live = []
+        for holder in refs:
+            name = holder.split(":", 1)[0]
+            content_hash, extension = os.path.splitext(name)
+            if os.path.exists(self.object_path(content_hash, extension)):
+                live.append(holder)
+        if len(live) != len(refs):
+            self._write_result_refs(result_path, live)
+        return live
+
+    # ------------------------------------------------------------------
+    # Retention
+    # ------------------------------------------------------------------
+
+    def _remove(self, path: str) -> None:
+        for target in (path, meta_path(path)):
+            try:
+                os.remove(target)
+            except FileNotFoundError:
+                pass
+
+    def collect_garbage(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Delete artifacts that have not been used within their TTL, drop aliases
+        whose object is gone and refresh the disk usage figures.
+
+        Results still referenced by a stored upload are kept whatever their
+        age; once their references lapse the result TTL applies again. Raw
+        objects are swept first, so references from uploads collected in the
+        same sweep have already lapsed.
+
+        Returns:
+            Dict with the number of removed files and the usage per artifact kind
+        """
+        now = now or time.time()
+        removed = {kind: 0 for kind in ARTIFACT_DIRS}
+        usage = {}
+        for kind, directory in ARTIFACT_DIRS.items():
+            ttl = self.ttls.get(kind) or 0
+            files = size = 0
+            root = os.path.join(self.storage_path, directory)
+            # Parents are visited before their .meta directory, so sidecars of
+            # expired artifacts are already gone when the sidecars are counted
+            for dirpath, _, filenames in os.walk(root):
+                in_meta = os.path.basename(dirpath) == ".meta"
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    age = now - stat.st_mtime
+                    if name.endswith((".part", ".tmp")):
+                        if age > _STALE_PART_SECONDS:
+                            os.remove(path)
+                        continue
+                    if in_meta:
+                        owner = os.path.join(os.path.dirname(dirpath), name[:-len(".json")])
+                        if not os.path.exists(owner):
+                            os.remove(path)
+                        else:
+                            size += stat.st_size
+                        continue
+                    if ttl and age > ttl and not (kind == RESULT and self._live_result_refs(path)):
+                        self._remove(path)
+                        removed[kind] += 1
+                        continue
+                    files += 1
+                    size += stat.st_size
+            for dirpath, _, _ in os.walk(root, topdown=False):
+                if dirpath != root and not os.listdir(dirpath):
+                    os.rmdir(dirpath)
+            usage[kind] = {"files": files, "bytes": size}
+
+        aliases = 0
+        for dirpath, _, filenames in os.walk(self.aliases_path):
+            for name in filenames:
+                alias = self.get_alias(name)
+                if alias and not os.path.exists(self.object_path(alias["content_hash"], alias["extension"])):
+                    os.remove(os.path.join(dirpath, name))
+                    aliases += 1
+        for dirpath, _, _ in os.walk(self.aliases_path, topdown=False):
+            if dirpath != self.aliases_path and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+
+        self._usage = usage
+        return {"removed": removed, "removed_aliases": aliases, "usage": usage}
+
+    def disk_usage(self) -> Dict[str, Dict[str, int]]:
+        """
+        Files and bytes per artifact kind as of the last GC sweep.
+        """
+        return self._usage
+
+    async def run_gc(self, interval: float) -> None:
+        """
+        Sweep expired artifacts every interval seconds until cancelled.
+        """
+        while True:
+            try:
+                result = await asyncio.to_thread(self.collect_garbage)
+                logger.info("Storage GC finished", extra=result)
+            except Exception as e:
+                logger.exception("Storage GC failed")
+            await asyncio.sleep(interval)
+
+
+storage = FileStorage(settings.UPLOAD_DIR)
@@ -0,0 +1,60 @@
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Encode one Server-Sent Event with a JSON payload.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def text_delta(event: Any) -> Optional[str]:
+    """
+    Text appended to the model output by an agents SDK stream event, if any.
+    """
+    if getattr(event, "type", None) != "raw_response_event":
+        return None
+    data = getattr(event, "data", None)
+    if getattr(data, "type", None) != "response.output_text.delta":
+        return None
+    return data.delta
+
+
+class FieldStreamParser:
+    """
+    Pick completed field objects out of a JSON document while it is still being streamed.
+
+    The agent's structured output looks like
+    ``{"items": [{"MSRP": {"vendor_field": "...", "confidence": 0.9}, ...}]}``;
+    as soon as the object of a watched field is closed it can be reported,
+    long before the whole document parses.
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        self._pending = {field: re.compile(r'"%s"\s*:\s*\{' % re.escape(field)) for field in fields}
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Append streamed text and return the fields whose objects completed.
+        """
+        self._buffer += delta
+        # Field objects are flat, so nothing can complete without a closing brace
+        if "}" not in delta or not self._pending:
+            return []
+        completed = []
+        for field, pattern in list(self._pending.items()):
+            match = pattern.search(self._buffer)
+            if not match:
+                continue
+            try:
+                value, _ = self._decoder.raw_decode(self._buffer, match.end() - 1)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(value, dict):
+                completed.append((field, value))
+            del self._pending[field]
+        return completed
@@ -0,0 +1,205 @@
+import csv
+import io
+import os
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Dict, List, Optional
+
+import pandas as pd
+
+from backend.core.metrics import ROWS_PROCESSED
+
+# Result file formats and the extension each one is written with
+RESULT_FORMATS = {"csv": ".csv", "xlsx": ".xlsx", "jsonl": ".jsonl"}
+
+# Doubles keep all their significant digits in JSON lines
+JSON_DOUBLE_PRECISION = 15
+
+# ============================================================================
+# WRITERS
+# ============================================================================
+
+class ResultWriter(ABC):
+    """
+    Streaming writer for one result file.
+
+    Rows are appended as DataFrames of any size and written out right away,
+    so memory stays bounded by the largest frame passed in, not by the file.
+    Writers are used as context managers; the file is complete once the
+    block exits without an error. On an error the writer only releases what
+    it holds, and the partial file is for the caller to discard.
+
+    Usage:
+        with open_result_writer(f, ".xlsx") as writer:
+            for frame in frames:
+                writer.write(frame)
+    """
+
+    def __init__(self, f: BinaryIO):
+        self._f = f
+        self._sheet: Optional[str] = None
+        self.rows = 0
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is not None:
+            self.abort()
+            return
+        self.close()
+        ROWS_PROCESSED.labels("result_write").inc(self.rows)
+
+    def write(self, frame: pd.DataFrame, sheet: str = "Sheet1") -> None:
+        """
+        Append the rows of frame; the first frame of a sheet also writes its header row.
+
+        Formats without sheets write every sheet into one table, with the
+        header row of the first sheet only.
+        """
+        if sheet != self._sheet:
+            self._start_sheet(sheet, [str(column) for column in frame.columns])
+            self._sheet = sheet
+        self._write_rows(frame)
+        self.rows += len(frame)
+
+    def close(self) -> None:
+        """
+        Finish the file.
+        """
+
+    def abort(self) -> None:
+        """
+        Release the writer's resources without finishing the file.
+        """
+
+    @abstractmethod
+    def _start_sheet(self, sheet: str, headers: List[str]) -> None:
+        ...
+
+    @abstractmethod
+    def _write_rows(self, frame: pd.DataFrame) -> None:
+        ...
+
+
+class CsvResultWriter(ResultWriter):
+    """
+    CSV through pandas' C writer, appended frame by frame.
+    """
+
+    def __init__(self, f: BinaryIO):
+        super().__init__(f)
+        self._text = io.TextIOWrapper(f, encoding="utf-8", newline="", write_through=True)
+        self._header_written = False
+
+    def _start_sheet(self, sheet: str, headers: List[str]) -> None:
+        if not self._header_written:
+            csv.writer(self._text, lineterminator="\n").writerow(headers)
+            self._header_written = True
+
+    def _write_rows(self, frame: pd.DataFrame) -> None:
+        frame.to_csv(self._text, header=False, index=False, lineterminator="\n")
+
+    def close(self) -> None:
+        # Hand the file back to the caller open
+        self._text.flush()
+        self._text.detach()
+
+    def abort(self) -> None:
+        # Otherwise the wrapper closes the caller's file once collected
+        self._text.detach()
+
+
+class JsonlResultWriter(ResultWriter):
+    """
+    One JSON object per row, keyed by column; missing values are null.
+    """
+
+    def _start_sheet(self, sheet: str, headers: List[str]) -> None:
+        pass
+
+    def _write_rows(self, frame: pd.DataFrame) -> None:
+        if frame.empty:
+            return
+        text = frame.to_json(
+            orient="records", lines=True, force_ascii=False,
+            double_precision=JSON_DOUBLE_PRECISION, date_format="iso",
+        )
+        self._f.write(text.encode("utf-8"))
+        if not text.endswith("\n"):
+            self._f.write(b"\n")
+
+
+class XlsxResultWriter(ResultWriter):
+    """
+    XLSX through openpyxl's write-only mode, which streams each sheet to a
+    temporary file instead of keeping every cell in memory. Cells hold the
+    same values DataFrame.to_excel writes.
+    """
+
+    def __init__(self, f: BinaryIO):
+        super().__init__(f)
+        from openpyxl import Workbook
+
+        self._workbook = Workbook(write_only=True)
+        self._worksheet = None
+
+    def _start_sheet(self, sheet: str, headers: List[str]) -> None:
+        self._worksheet = self._workbook.create_sheet(sheet)
+        self._worksheet.append(headers)
+
+    def _write_rows(self, frame: pd.DataFrame) -> None:
+        # Python scalars for openpyxl; missing values become empty cells
+        values = frame.astype(object).where(frame.notna(), None)
+        append = self._worksheet.append
+        for row in values.itertuples(index=False, name=None):
+            append(row)
+
+    def close(self) -> None:
+        if self._worksheet is None:
+            self._workbook.create_sheet("Sheet1")
+        self._workbook.save(self._f)
+
+    def abort(self) -> None:
+        # Saving would remove the sheets' temporary files but also write a
+        # workbook; close each sheet's stream and remove its file instead
+        for worksheet in self._workbook.worksheets:
+            if worksheet._writer is not None:
+                worksheet.close()
+                worksheet._writer.cleanup()
+
+
+_WRITERS = {".csv": CsvResultWriter, ".xlsx": XlsxResultWriter, ".jsonl": JsonlResultWriter}
+
+
+def open_result_writer(f: BinaryIO, extension: str) -> ResultWriter:
+    """
+    Writer for a result file of the given extension on an open binary file.
+
+    The file object is written to but not closed, so callers can write
+    under a temporary name and move the file into place.
+    """
+    try:
+        return _WRITERS[extension.lower()](f)
+    except KeyError:
+        raise ValueError(f"Unsupported result format: {extension}") from None
+
+
+def write_result_file(path: str, sheets: Dict[str, pd.DataFrame], extension: Optional[str] = None) -> int:
+    """
+    Write whole sheets to a result file; returns the number of rows written.
+    """
+    extension = extension or os.path.splitext(path)[1]
+    with open(path, "wb") as f, open_result_writer(f, extension) as writer:
+        for name, frame in sheets.items():
+            writer.write(frame, sheet=name)
+        return writer.rows
+
+
+def read_jsonl_result(path: str) -> pd.DataFrame:
+    """
+    Read a JSON lines result file back, keeping every value as written.
+    """
+    if not os.path.getsize(path):
+        return pd.DataFrame()
+    return pd.read_json(path, lines=True, dtype=False, convert_dates=False)
+
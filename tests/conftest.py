@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Keep test artifacts out of the real upload directory and database
+os.environ["UPLOAD_DIR"] = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(os.environ['UPLOAD_DIR'], 'test.db')}")
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
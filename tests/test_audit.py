@@ -0,0 +1,24 @@
+from backend.api.endpoint.outh_log import get_user_audit_trail
+from backend.core.audit import LOGIN, LOGIN_FAILED, AuditLog
+from backend.core.database import Base, SessionLocal, engine
+from backend.models.audit import AuditEvent
+
+
+def test_logins_are_listed_by_user():
+    Base.metadata.create_all(bind=engine, tables=[AuditEvent.__table__])
+    log = AuditLog()
+    log.record(LOGIN_FAILED, user_id=7, username="a@example.com")
+    log.record(LOGIN, user_id=7, username="a@example.com")
+    log.record(LOGIN, user_id=8, username="b@example.com")
+    log.flush()
+
+    db = SessionLocal()
+    try:
+        first = get_user_audit_trail(7, limit=1, cursor=None, action=None, db=db)
+        second = get_user_audit_trail(7, limit=1, cursor=first["next_cursor"], action=None, db=db)
+    finally:
+        db.close()
+
+    assert [event["action"] for event in first["audit_logs"] + second["audit_logs"]] == [LOGIN, LOGIN_FAILED]
+    assert first["audit_logs"][0]["client_number"] is None
+    assert second["next_cursor"] is None
@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from backend.api.endpoint import upload
+from backend.api.endpoint.mapping import save_mappings
+from backend.core.database import Base, SessionLocal, engine
+from backend.core.files import COMPLETED, find_file_uuid, record_upload, set_file_status
+from backend.models.file import File, FileCount
+from backend.models.mapping import Mapping
+
+
+@pytest.fixture
+def tables():
+    tables = [File.__table__, FileCount.__table__, Mapping.__table__]
+    Base.metadata.create_all(bind=engine, tables=tables)
+    yield
+    Base.metadata.drop_all(bind=engine, tables=tables)
+
+
+def _record(file_id: str) -> bool:
+    return record_upload(file_id, "C1", "catalog.csv", "/tmp/catalog.csv", 10, "CSV")
+
+
+def test_repeated_alias_is_refused(tables):
+    assert _record("jc_01.csv")
+    assert not _record("jc_01.csv")
+    assert set_file_status("jc_01.csv", COMPLETED)
+    with engine.connect() as connection:
+        assert find_file_uuid(connection, "jc_01.csv") is not None
+        assert find_file_uuid(connection, "jc_02.csv") is None
+
+
+def test_claim_skips_taken_ids_after_counter_reset(tables, tmp_path, monkeypatch):
+    monkeypatch.setattr(upload, "COUNTER_FILE", str(tmp_path / "file_counter.json"))
+    first = [upload.claim_file_id(".csv", "C1", "catalog.csv", "/tmp/catalog.csv", 10, "CSV") for _ in range(3)]
+    # The counter file is lost, as on a redeploy
+    (tmp_path / "file_counter.json").unlink()
+
+    claimed = upload.claim_file_id(".csv", "C1", "catalog.csv", "/tmp/catalog.csv", 10, "CSV")
+
+    assert first == ["jc_01.csv", "jc_02.csv", "jc_03.csv"]
+    assert claimed == "jc_04.csv"
+
+
+def test_saving_mappings_of_unknown_upload_is_rejected(tables):
+    db = SessionLocal()
+    try:
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(save_mappings(
+                file_id="jc_99.csv", mappings=json.dumps([{"vendor_field": "Style", "jc_field": "StyleNumber"}]), db=db
+            ))
+    finally:
+        db.close()
+    assert error.value.status_code == 400
+
+
+def test_cancelled_processing_marks_the_file_failed(tables):
+    from backend.api.endpoint.mapping import _file_status
+    from backend.core.files import FAILED
+
+    _record("jc_05.csv")
+
+    async def cancelled_stream():
+        async def produce():
+            async with _file_status("jc_05.csv"):
+                await asyncio.sleep(10)
+
+        producer = asyncio.create_task(produce())
+        await asyncio.sleep(0.2)
+        producer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await producer
+
+    asyncio.run(cancelled_stream())
+
+    with engine.connect() as connection:
+        status = connection.execute(
+            File.__table__.select().where(File.alias == "jc_05.csv")
+        ).first().status
+    assert status == FAILED
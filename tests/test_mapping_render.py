@@ -0,0 +1,132 @@
+import csv
+import os
+
+import pandas as pd
+
+from backend.api.endpoint import mapping as mapping_module
+from backend.api.endpoint.mapping import (
+    _cache_partition_columns,
+    _cached_columns,
+    _render_partition,
+    generate_result_with_watch_data,
+)
+from backend.core.config import settings
+from backend.utils.readers import delimited_partitions, read_vendor_headers
+from backend.utils.storage import storage
+from loadtest.fakes import fake_mapping
+
+SHEETS = {
+    "Rings": ("RingSize", "R"),
+    "Pendants": ("ChainLength", "P"),
+    "Earrings": ("BackType", "E"),
+}
+ROWS = 4
+
+
+def _store(path: str, file_id: str) -> None:
+    extension = os.path.splitext(path)[1]
+    content_hash = file_id.replace(".", "_").ljust(8, "_")
+    object_path = storage.object_path(content_hash, extension)
+    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+    os.replace(path, object_path)
+    storage.add_alias(file_id, content_hash, extension)
+
+
+def _multi_layout_workbook(tmp_path) -> tuple:
+    path = str(tmp_path / "catalog.xlsx")
+    items = []
+    with pd.ExcelWriter(path) as writer:
+        for name, (extra, prefix) in SHEETS.items():
+            headers = ["StyleNumber", extra]
+            pd.DataFrame({
+                "StyleNumber": [f"{prefix}{row}" for row in range(ROWS)],
+                extra: [f"{extra}-{row}" for row in range(ROWS)],
+            }).to_excel(writer, sheet_name=name, index=False)
+            items.append(fake_mapping(headers))
+    return path, {"items": items}
+
+
+def test_multi_layout_workbook_keeps_every_sheet_row(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EXCEL_SHEET_OUTPUT", "concat")
+    path, mapping = _multi_layout_workbook(tmp_path)
+    _store(path, "multi_layout.xlsx")
+
+    payload = generate_result_with_watch_data(mapping, "multi_layout.xlsx")
+
+    styles = [row[payload["headers"].index("StyleNumber")] for row in payload["data"][2:]]
+    # Headers, the vendor-field row, then every data row but the legacy
+    # first-row skip, applied once to the stacked output
+    assert payload["total_rows"] == 2 + len(SHEETS) * ROWS - 1
+    assert "R0" not in styles
+    assert {"R1", "P0", "E0", "P3", "E3"} <= set(styles)
+
+
+def test_partitioned_csv_renders_like_a_single_read(tmp_path):
+    path = str(tmp_path / "prices.csv")
+    with open(path, "w") as f:
+        f.write("StyleNumber,Price\n001,10.50\n002,7.00\n003,\n")
+    _store(path, "prices.csv")
+    file_path = storage.resolve("prices.csv")
+    mapping = {"items": [fake_mapping(["StyleNumber", "Price"])]}
+
+    payload = generate_result_with_watch_data(mapping, "prices.csv")
+
+    # The whole file as one row partition, as render_result renders large uploads
+    (start, end), = delimited_partitions(file_path, 1)
+    part_path = str(tmp_path / "part.csv")
+    _render_partition(file_path, start, end, read_vendor_headers(file_path), mapping["items"][0], part_path, True)
+    with open(part_path, newline="") as part:
+        partitioned = list(csv.reader(part))
+    assert [[str(value) for value in row] for row in payload["data"][2:]] == partitioned
+    assert ["002", "7.00"] == [partitioned[0][payload["headers"].index(name)] for name in ("StyleNumber", "Price")]
+
+
+def test_partitioned_render_fills_the_column_cache(tmp_path):
+    path = str(tmp_path / "partitioned.csv")
+    pd.DataFrame({"StyleNumber": [f"{row:03d}" for row in range(40)], "Metal": ["Gold"] * 40}).to_csv(path, index=False)
+    _store(path, "partitioned.csv")
+    file_path = storage.resolve("partitioned.csv")
+    item = fake_mapping(["StyleNumber", "Metal"])
+    headers = read_vendor_headers(file_path)
+    partitions = delimited_partitions(file_path, 2, block_size=64)
+    assert len(partitions) == 2
+
+    part_paths = [str(tmp_path / f"{index:05d}.csv") for index in range(len(partitions))]
+    for index, ((start, end), part_path) in enumerate(zip(partitions, part_paths)):
+        _render_partition(file_path, start, end, headers, item, part_path, index == 0, str(tmp_path))
+    _cache_partition_columns("partitioned.csv", str(tmp_path), part_paths, headers)
+
+    columns = _cached_columns("partitioned.csv", headers)
+    assert columns["StyleNumber"].tolist() == [f"{row:03d}" for row in range(40)]
+    assert columns["Metal"].tolist() == ["Gold"] * 40
+
+
+def test_upload_over_the_memory_budget_is_written_in_chunks(tmp_path, monkeypatch):
+    path = str(tmp_path / "large.csv")
+    pd.DataFrame({"StyleNumber": [f"{row:03d}" for row in range(30)], "Price": ["1.50"] * 30}).to_csv(path, index=False)
+    _store(path, "large.csv")
+    mapping = {"items": [fake_mapping(["StyleNumber", "Price"])]}
+    whole = generate_result_with_watch_data(mapping, "large.csv", "jsonl")
+
+    monkeypatch.setattr(mapping_module, "estimate_frame_bytes", lambda *args, **kwargs: 1 << 40)
+    # A whole read would fail
+    monkeypatch.setattr(mapping_module, "read_vendor_file", None)
+    chunked = generate_result_with_watch_data(mapping, "large.csv", "xlsx")
+
+    assert chunked["data"] == whole["data"]
+
+
+def test_single_layout_workbook_keeps_its_sheets_per_sheet(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EXCEL_SHEET_OUTPUT", "per_sheet")
+    path = str(tmp_path / "stores.xlsx")
+    with pd.ExcelWriter(path) as writer:
+        for name in ("North", "South"):
+            pd.DataFrame({"StyleNumber": [f"{name}{row}" for row in range(ROWS)]}).to_excel(
+                writer, sheet_name=name, index=False
+            )
+    _store(path, "single_layout.xlsx")
+
+    payload = generate_result_with_watch_data({"items": [fake_mapping(["StyleNumber"])]}, "single_layout.xlsx")
+
+    assert payload["sheets"] == ["North", "South"]
+    assert list(pd.read_excel(payload["file_path"], sheet_name=None)) == ["North", "South"]
@@ -0,0 +1,53 @@
+import asyncio
+import json
+import os
+
+from backend.api.endpoint import mapping
+from backend.utils.storage import storage
+from loadtest.fakes import fake_mapping
+
+HEADERS = ["StyleNumber", "Metal"]
+
+
+def _events(response) -> list:
+    async def collect():
+        return [chunk async for chunk in response.body_iterator]
+
+    events = []
+    for chunk in asyncio.run(collect()):
+        if chunk.startswith("event:"):
+            name, data = chunk.split("\n")[:2]
+            events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_stream_corrects_fields_the_final_mapping_changed(tmp_path, monkeypatch):
+    path = tmp_path / "stream.csv"
+    path.write_text("StyleNumber,Metal\nA1,Gold\n")
+    object_path = storage.object_path("stream_csv", ".csv")
+    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+    os.replace(path, object_path)
+    storage.add_alias("stream.csv", "stream_csv", ".csv")
+
+    jc_field = mapping.JC_FIELDS[0]
+    # The local fallback decided the mapping after the agent streamed a field and failed
+    final_item = fake_mapping(HEADERS)
+    final_item[jc_field] = {"vendor_field": "Metal", "confidence": 0.5}
+
+    async def flight(file_id, file_path, client_number, cache_key, on_field=None):
+        on_field(jc_field, {"vendor_field": "StyleNumber", "confidence": 0.9})
+        return {
+            "response": {"items": [final_item]},
+            "file_id": {"file_path": "result.csv", "headers": HEADERS, "total_rows": 2, "total_columns": 2},
+            "pinecone_saved": False, "pinecone_id": None, "mapping_source": "local_fallback",
+        }, False
+
+    async def same_format(result, file_id, output_format):
+        return result
+
+    monkeypatch.setattr(mapping, "_mapping_flight", flight)
+    monkeypatch.setattr(mapping, "_with_result_format", same_format)
+    response = asyncio.run(mapping.stream_ai_suggested_mappings("stream.csv", client_number="C1", output_format=None))
+
+    streamed = [data for name, data in _events(response) if name == "field" and data["jc_field"] == jc_field]
+    assert streamed[-1]["vendor_field"] == "Metal"
@@ -0,0 +1,45 @@
+from backend.core.metrics import Counter, Histogram, Registry
+from backend.core.tracing import attach_spans, end_trace, span, start_trace
+
+
+def _registry():
+    registry = Registry()
+    rows = registry.register(Counter("rows_total", "Rows", ("stage",)))
+    latency = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)))
+    return registry, rows, latency
+
+
+def test_changes_since_merge_into_another_registry():
+    worker, rows, latency = _registry()
+    rows.labels("parse").inc(5)
+    before = worker.snapshot()
+    rows.labels("parse").inc(10)
+    rows.labels("result_write").inc(3)
+    latency.observe(0.5)
+
+    parent, parent_rows, parent_latency = _registry()
+    parent_rows.labels("parse").inc(1)
+    parent.merge(worker.changes_since(before))
+
+    assert parent_rows.labels("parse").value == 11
+    assert parent_rows.labels("result_write").value == 3
+    assert parent_latency._default.counts == [0, 1, 0]
+    assert parent_latency._default.sum == 0.5
+
+
+def test_attach_spans_adds_to_current_trace():
+    worker = start_trace("worker")
+    with span("parse", rows=3):
+        with span("inner"):
+            pass
+    end_trace(worker)
+    nodes = [child.to_dict(worker.root.start) for child in worker.root.children]
+
+    trace = start_trace("request")
+    attach_spans(nodes, worker.root.duration_ms)
+    end_trace(trace)
+
+    assert [child.name for child in trace.root.children] == ["parse"]
+    assert trace.root.children[0].attributes == {"rows": 3}
+    assert {s.name for s in trace.spans} == {"parse", "inner"}
+    assert "parse;dur=" in trace.server_timing()
@@ -0,0 +1,29 @@
+from sqlalchemy import create_engine, inspect, text
+
+from backend.core.files import client_file_counts
+from backend.core.migrations import migrate_schema
+
+
+def test_existing_files_table_is_migrated(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        # The files table as created before aliases and counts
+        connection.execute(text(
+            "CREATE TABLE files (file_id CHAR(32) PRIMARY KEY, client_number VARCHAR(50) NOT NULL, "
+            "filename VARCHAR(255) NOT NULL, file_path TEXT NOT NULL, file_size VARCHAR(20), "
+            "file_type VARCHAR(10) NOT NULL, uploaded_at DATETIME, processed_at DATETIME, status VARCHAR(20))"
+        ))
+        connection.execute(text(
+            "INSERT INTO files (file_id, client_number, filename, file_path, file_type, status) VALUES "
+            "('a', 'C1', 'a.csv', '/a', 'CSV', 'completed'), ('b', 'C1', 'b.csv', '/b', 'CSV', NULL)"
+        ))
+
+    migrate_schema(engine)
+    migrate_schema(engine)
+
+    inspector = inspect(engine)
+    assert "alias" in {column["name"] for column in inspector.get_columns("files")}
+    assert {"ix_files_alias", "ix_files_client_uploaded"} <= {index["name"] for index in inspector.get_indexes("files")}
+    with engine.connect() as connection:
+        counts = client_file_counts(connection, "C1")
+    assert counts["completed"] == 1 and counts["uploaded"] == 1
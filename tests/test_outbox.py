@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from backend.api.endpoint import db
+from backend.core.database import Base, engine
+from backend.core.outbox import OutboxDispatcher, PENDING, queue_pinecone_upsert
+from backend.models.outbox import PineconeOutbox
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def outbox():
+    Base.metadata.create_all(bind=engine, tables=[PineconeOutbox.__table__])
+    for index in range(3):
+        queue_pinecone_upsert({"items": [], "index": index}, f"jc_{index:02d}.csv", "C1")
+    yield
+    Base.metadata.drop_all(bind=engine, tables=[PineconeOutbox.__table__])
+
+
+def _dispatch(monkeypatch, error: Exception) -> list:
+    calls = []
+
+    def upsert(records):
+        calls.append(len(records))
+        raise error
+
+    monkeypatch.setattr(db, "upsert_mapping_vectors", upsert)
+    asyncio.run(OutboxDispatcher(batch_size=10).dispatch_once())
+    return calls
+
+
+def test_outage_backs_off_the_whole_batch(outbox, monkeypatch):
+    assert _dispatch(monkeypatch, ProviderError(503)) == [3]
+    with engine.connect() as connection:
+        rows = connection.execute(select(PineconeOutbox.__table__)).mappings().all()
+    assert [(row["status"], row["attempts"]) for row in rows] == [(PENDING, 1)] * 3
+
+
+def test_rejected_batch_is_retried_row_by_row(outbox, monkeypatch):
+    assert _dispatch(monkeypatch, ProviderError(400)) == [3, 1, 1, 1]
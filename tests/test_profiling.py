@@ -0,0 +1,24 @@
+from backend.utils.profiling import ReservoirSampler
+
+
+def test_reservoir_sample_is_uniform():
+    sampler = ReservoirSampler(1000, seed=7)
+    sampler.extend(range(1_000_000))
+    assert sampler.seen == 1_000_000
+    assert len(sampler.items) == 1000
+    # Mean of a uniform sample of 0..999999 is about 500k (standard error ~9k)
+    mean = sum(sampler.items) / len(sampler.items)
+    assert 450_000 < mean < 550_000
+    assert max(sampler.items) > 990_000
+
+
+def test_reservoir_sample_replaces_past_the_first_items():
+    sampler = ReservoirSampler(10, seed=1)
+    sampler.extend(range(1000))
+    assert sorted(sampler.items) != list(range(10))
+
+
+def test_reservoir_keeps_short_streams_whole():
+    sampler = ReservoirSampler(10, seed=1)
+    sampler.extend(range(5))
+    assert sampler.items == list(range(5))
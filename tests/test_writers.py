@@ -0,0 +1,32 @@
+import glob
+import io
+import os
+import tempfile
+
+import pandas as pd
+import pytest
+
+from backend.utils.writers import RESULT_FORMATS, ResultWriter, open_result_writer
+
+
+def _openpyxl_temp_files() -> set:
+    return set(glob.glob(os.path.join(tempfile.gettempdir(), "openpyxl.*")))
+
+
+def test_result_writer_is_abstract():
+    with pytest.raises(TypeError):
+        ResultWriter(io.BytesIO())
+
+
+@pytest.mark.parametrize("extension", RESULT_FORMATS.values())
+def test_failed_write_releases_the_writer(extension):
+    before = _openpyxl_temp_files()
+    f = io.BytesIO()
+    with pytest.raises(RuntimeError):
+        with open_result_writer(f, extension) as writer:
+            writer.write(pd.DataFrame({"SKU": range(100)}), sheet="Rings")
+            writer.write(pd.DataFrame({"SKU": range(100)}), sheet="Pendants")
+            raise RuntimeError("render failed")
+
+    assert not f.closed
+    assert _openpyxl_temp_files() <= before